@@ -1,17 +1,27 @@
-from flask import jsonify, request
+from flask import current_app, jsonify, request, url_for
 from flask_login import current_user, login_required
 
 from api import api_bp
 from models import Transaction
 from services.transaction_service import (
-    calculate_transaction_totals,
+    count_filtered_transactions,
     create_transaction,
+    create_transactions_batch,
+    get_filtered_totals,
     get_filtered_transactions,
+    order_newest_first,
+    paginate_by_cursor,
     parse_positive_amount,
-    parse_transaction_datetime,
+    parse_transaction_payload,
+    TransactionBatchError,
 )
+from services.budget_service import get_unread_alerts, mark_alerts_read
+from services.job_service import get_job, is_job_expired, serialize_job
+from services.user_service import get_user_cache_stats
 from services.wallet_service import transfer_balance
+from utils.cache_utils import get_cache_stats, get_data_version
 from utils.datetime_utils import to_wib
+from utils.http_utils import conditional_by_data_version, get_conditional_stats
 
 
 def _serialize_transaction(transaction):
@@ -30,6 +40,7 @@ def _serialize_transaction(transaction):
 
 @api_bp.route("/transactions", methods=["GET"])
 @login_required
+@conditional_by_data_version
 def get_transactions():
     try:
         page = max(request.args.get("page", 1, type=int), 1)
@@ -45,17 +56,33 @@ def get_transactions():
             "search": request.args.get("search", ""),
         }
 
-        pagination = get_filtered_transactions(current_user.id, filters) \
-            .order_by(Transaction.date.desc()) \
-            .paginate(page=page, per_page=per_page, error_out=False)
+        include_total = request.args.get("include_total", "").lower() in {"1", "true", "yes"}
+        query = get_filtered_transactions(current_user.id, filters)
 
-        data = {
-            "items": [_serialize_transaction(transaction) for transaction in pagination.items],
-            "total": pagination.total,
-            "page": pagination.page,
-            "pages": pagination.pages,
-            "per_page": pagination.per_page,
-        }
+        if "cursor" in request.args:
+            result = paginate_by_cursor(query, request.args.get("cursor"), per_page)
+            data = {
+                "items": [_serialize_transaction(transaction) for transaction in result.items],
+                "next_cursor": result.next_cursor,
+                "has_more": result.has_next,
+                "per_page": result.per_page,
+            }
+            if include_total:
+                total = count_filtered_transactions(current_user.id, filters)
+                data["total"] = total
+                data["pages"] = -(-total // per_page)
+        else:
+            pagination = order_newest_first(query) \
+                .paginate(page=page, per_page=per_page, error_out=False, count=False)
+            pagination.total = count_filtered_transactions(current_user.id, filters)
+
+            data = {
+                "items": [_serialize_transaction(transaction) for transaction in pagination.items],
+                "total": pagination.total,
+                "page": pagination.page,
+                "pages": pagination.pages,
+                "per_page": pagination.per_page,
+            }
         return {"status": "success", "data": data}
     except Exception as e:
         return {"status": "error", "message": str(e)}, 400
@@ -66,24 +93,7 @@ def get_transactions():
 def create_transaction_api():
     try:
         payload = request.get_json(silent=True) or {}
-
-        amount = parse_positive_amount(payload.get("amount"))
-        category_id = int(payload.get("category_id"))
-        wallet_id = int(payload.get("wallet_id"))
-        transaction_type = str(payload.get("type", "")).strip()
-        if transaction_type not in {"income", "expense"}:
-            raise ValueError("Tipe transaksi tidak valid")
-
-        raw_date = payload.get("date")
-        transaction = create_transaction(
-            user_id=current_user.id,
-            wallet_id=wallet_id,
-            amount=amount,
-            category_id=category_id,
-            description=(payload.get("description") or "").strip(),
-            transaction_type=transaction_type,
-            date=parse_transaction_datetime(raw_date) if raw_date else None,
-        )
+        transaction = create_transaction(user_id=current_user.id, **parse_transaction_payload(payload))
 
         return {
             "status": "success",
@@ -93,6 +103,56 @@ def create_transaction_api():
         return {"status": "error", "message": str(e)}, 400
 
 
+def _serialize_batch_results(results):
+    return [
+        {**result, "transaction": _serialize_transaction(result["transaction"])} if "transaction" in result else result
+        for result in results
+    ]
+
+
+@api_bp.route("/transactions/batch", methods=["POST"])
+@login_required
+def create_transactions_batch_api():
+    """Body: {"mode": "atomic"|"best_effort", "transactions": [...], "user_id": opsional}.
+
+    Mode default atomic. "user_id" dikirim outbox offline agar antrean tidak
+    tersimpan ke akun lain bila sesi di browser sudah berganti user.
+
+    Item boleh membawa "client_id" unik buatan klien; kiriman ulang item yang sama
+    dijawab "duplicate" beserta transaksi yang sudah tersimpan.
+    """
+    payload = request.get_json(silent=True) or {}
+    # Outbox offline menyertakan pemilik antrean; tolak bila sesi sudah berganti user
+    owner = payload.get("user_id")
+    if owner is not None and str(owner) != str(current_user.id):
+        return {"status": "error", "message": "Antrean milik user lain"}, 409
+
+    mode = payload.get("mode", "atomic")
+    if mode not in {"atomic", "best_effort"}:
+        return {"status": "error", "message": "Mode harus atomic atau best_effort"}, 400
+
+    try:
+        results = create_transactions_batch(current_user.id, payload.get("transactions"), atomic=mode == "atomic")
+    except TransactionBatchError as e:
+        return {"status": "error", "message": str(e), "data": {"results": _serialize_batch_results(e.results)}}, 400
+    except Exception as e:
+        return {"status": "error", "message": str(e)}, 400
+
+    created = sum(1 for result in results if result["status"] == "created")
+    duplicates = sum(1 for result in results if result["status"] == "duplicate")
+    failed = len(results) - created - duplicates
+    data = {
+        "created": created,
+        "duplicates": duplicates,
+        "failed": failed,
+        "results": _serialize_batch_results(results),
+    }
+    if failed == len(results):
+        return {"status": "error", "message": "Tidak ada transaksi yang disimpan", "data": data}, 400
+    # 207: sebagian item gagal pada mode best_effort
+    return {"status": "success", "data": data}, 207 if failed else 201
+
+
 @api_bp.route("/transfer", methods=["POST"])
 @login_required
 def transfer_api():
@@ -128,6 +188,7 @@ def transfer_api():
 
 @api_bp.route("/reports/preview", methods=["GET"])
 @login_required
+@conditional_by_data_version
 def preview_report_api():
     try:
         filters = {
@@ -143,7 +204,7 @@ def preview_report_api():
             .order_by(Transaction.date.desc()) \
             .limit(100) \
             .all()
-        totals = calculate_transaction_totals(transactions)
+        totals = get_filtered_totals(current_user.id, filters)
 
         data = {
             "transactions": [
@@ -160,8 +221,70 @@ def preview_report_api():
                 "total_income": float(totals["total_income"]),
                 "total_expense": float(totals["total_expense"]),
                 "balance": float(totals["net_total"]),
+                "count": totals["count"],
             },
         }
         return jsonify({"status": "success", "data": data})
     except Exception as e:
-        return {"status": "error", "message": str(e)}, 400
\ No newline at end of file
+        return {"status": "error", "message": str(e)}, 400
+
+@api_bp.route("/jobs/<job_id>", methods=["GET"])
+@login_required
+def get_job_status(job_id):
+    job = get_job(current_user.id, job_id)
+    if not job:
+        return {"status": "error", "message": "Job tidak ditemukan"}, 404
+
+    data = serialize_job(job)
+    downloadable = job.status == "done" and not is_job_expired(job)
+    data["download_url"] = url_for("download_export_job", job_id=job.id) if downloadable else None
+    return {"status": "success", "data": data}
+
+
+@api_bp.route("/cache-stats", methods=["GET"])
+@login_required
+def get_cache_statistics():
+    """Versi data milik pemanggil; counter seluruh proses hanya bila CACHE_STATS_ENABLED"""
+    data = {"data_version": get_data_version(current_user.id)}
+    if current_app.config["CACHE_STATS_ENABLED"]:
+        data.update(get_cache_stats())
+        data["user_loader"] = get_user_cache_stats()
+        data["conditional_get"] = get_conditional_stats()
+    return {"status": "success", "data": data}
+
+
+@api_bp.route("/budget-alerts", methods=["GET"])
+@login_required
+def get_budget_alerts():
+    after_id = request.args.get("after", 0, type=int)
+    alerts = get_unread_alerts(current_user.id, after_id)
+    data = [
+        {
+            "id": alert.id,
+            "budget_id": alert.budget_id,
+            "category": alert.budget.category.name if alert.budget.category else None,
+            "threshold": alert.threshold,
+            "spent": float(alert.spent),
+            "amount": float(alert.amount),
+            "created_at": alert.created_at.strftime('%Y-%m-%d %H:%M:%S') if alert.created_at else None,
+            "message": (
+                f"Anggaran {alert.budget.category.name if alert.budget.category else ''} "
+                f"{'terlampaui' if alert.threshold >= 100 else f'sudah terpakai {alert.threshold}%'}"
+            ),
+        }
+        for alert in alerts
+    ]
+    return {"status": "success", "data": {"alerts": data}}
+
+
+@api_bp.route("/budget-alerts/read", methods=["POST"])
+@login_required
+def read_budget_alerts():
+    payload = request.get_json(silent=True) or {}
+    try:
+        up_to = int(payload.get("up_to", 0))
+    except (TypeError, ValueError):
+        return {"status": "error", "message": "up_to tidak valid"}, 400
+
+    updated = mark_alerts_read(current_user.id, up_to)
+    return {"status": "success", "data": {"updated": updated}}
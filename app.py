@@ -1,27 +1,84 @@
-from flask import Flask, render_template, redirect, url_for, request, flash, jsonify, send_file
-from flask_caching import Cache
+from flask import Flask, Response, g, render_template, redirect, url_for, request, flash, jsonify, send_file, send_from_directory, stream_with_context
+import click
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
-from models import db, User, Category, Wallet, Transaction, Budget, SharedWallet
-from collections import defaultdict
-from datetime import datetime, date
+from models import db, User, Category, Wallet, Transaction, Budget, SharedWallet, MonthlyRollup
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
+import mimetypes
 import os
 from urllib.parse import urlencode
 from sqlalchemy.orm import joinedload
 from dateutil.relativedelta import relativedelta
-from utils.datetime_utils import WIB, now_wib, to_wib
+from utils.datetime_utils import (
+    WIB,
+    BUCKET_LABEL_FORMATS,
+    last_n_months_bounds,
+    month_bounds,
+    now_wib,
+    to_wib,
+    year_bounds,
+)
+from utils.cache_utils import bump_data_version, cache, get_or_set_user_cache
+from utils.http_utils import compress_response, conditional_by_data_version, negotiate_encoding
+from utils.static_assets import (
+    ASSET_DIST_DIR,
+    ENCODING_SUFFIXES,
+    asset_url,
+    build_static_assets,
+    is_hashed_asset,
+)
 from utils.logger import setup_logger
+from config import configure_app, register_sqlite_pragmas
+from utils.sqlite_utils import start_wal_checkpointer, wal_checkpoint, wal_size
 from api import api_bp
 from services.transaction_service import (
-    calculate_transaction_totals,
     create_transaction,
     delete_transaction as delete_transaction_service,
+    get_filtered_totals,
+    count_filtered_transactions,
     get_filtered_transactions,
     normalize_wib_storage,
+    order_newest_first,
+    paginate_by_cursor,
     parse_positive_amount,
     parse_transaction_datetime,
     update_transaction,
 )
+from services.budget_service import (
+    budget_totals_query,
+    get_budget_period,
+    get_budget_summaries,
+    get_budget_summary,
+    get_budget_transactions,
+    get_user_budgets,
+    rebuild_budget_counters,
+    refresh_budget_counters,
+)
+from services.cashflow_service import cashflow_query, get_cashflow_series
+from services.export_service import iter_backup_csv
+from services.import_service import import_transactions_csv
+from services.image_service import (
+    PROFILE_IMAGE_DIR,
+    get_profile_photo_urls,
+    photo_srcset,
+    process_profile_upload,
+    stage_profile_upload,
+)
+from services.job_service import cleanup_expired_jobs, enqueue_job, get_job, is_job_expired, submit_background
+from services.rollup_service import (
+    get_expense_by_category,
+    get_month_totals,
+    rebuild_rollups,
+)
+from services.reference_service import REFERENCE_CACHE_TIMEOUT, get_category_options, get_wallet_options
+from services.series_service import get_income_expense_series
+from services.search_service import (
+    SEARCH_TABLE,
+    ensure_search_index,
+    rebuild_search_index,
+    search_index_enabled,
+)
+from services.user_service import get_user_record, invalidate_session_user, load_session_user
 from services.wallet_service import (
     create_wallet,
     delete_wallet as delete_wallet_service,
@@ -31,75 +88,34 @@ from services.wallet_service import (
 
 # load environment variables from .env file (if present)
 load_dotenv()
-from io import BytesIO
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter, landscape, portrait
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
+from werkzeug.local import LocalProxy
 from werkzeug.utils import secure_filename
 from werkzeug.security import generate_password_hash, check_password_hash
-from PIL import Image, ImageOps, UnidentifiedImageError
 
 app = Flask(__name__)
 logger = setup_logger()
-# gunakan environment variable untuk secret key agar tidak tersimpan di kode
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'kunci-rahasia-ubah-sekarang')
-# durasi cookie untuk fitur "ingat saya" (opsional, default 365 hari)
-from datetime import timedelta
-app.config['REMEMBER_COOKIE_DURATION'] = timedelta(days=30)
-
-BASE_DIR = os.path.abspath(os.path.dirname(__file__))
-
-
-def resolve_database_path():
-    db_path = os.environ.get('DB_PATH', 'dev.db').strip()
-    if not db_path:
-        db_path = 'dev.db'
-
-    if not os.path.isabs(db_path):
-        db_path = os.path.join(BASE_DIR, db_path)
-
-    return os.path.abspath(db_path)
-
-
-db_path = resolve_database_path()
-
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{db_path.replace(os.sep, '/')}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['UPLOAD_FOLDER'] = os.path.join(app.root_path, 'static', 'uploads')
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
-app.config['CACHE_TYPE'] = 'simple'
-app.config['CACHE_DEFAULT_TIMEOUT'] = 60
+# durasi cookie, path database, cache, SQLite, dll. (lihat config.py)
+db_path = configure_app(app)
 
 ALLOWED_IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
-MAX_PROFILE_IMAGE_DIMENSION = 720
-MAX_PROFILE_IMAGE_PIXELS = 20_000_000
-PROFILE_JPEG_QUALITY = 78
 
 db.init_app(app)
-cache = Cache(config={"CACHE_TYPE": "simple"})
 cache.init_app(app)
 app.register_blueprint(api_bp)
 
-from sqlalchemy import event
-from sqlalchemy.engine import Engine
-import sqlite3
+register_sqlite_pragmas(app)
 
-@event.listens_for(Engine, "connect")
-def set_sqlite_pragma(dbapi_connection, connection_record):
-    if not app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite:///') or not isinstance(dbapi_connection, sqlite3.Connection):
-        return
 
-    cursor = dbapi_connection.cursor()
-    cursor.execute("PRAGMA journal_mode=DELETE;")
-    cursor.execute("PRAGMA synchronous=NORMAL")
-    cursor.execute("PRAGMA cache_size=10000")
-    cursor.execute("PRAGMA temp_store=MEMORY")
-    cursor.close()
+@app.before_request
+def ensure_wal_checkpointer():
+    # Thread dimulai per proses worker, bukan di master gunicorn (preload_app)
+    if app.config['SQLITE_JOURNAL_MODE'] == 'WAL':
+        start_wal_checkpointer(
+            db_path,
+            app.config['SQLITE_CHECKPOINT_INTERVAL'],
+            app.config['SQLITE_WAL_TRUNCATE_BYTES'],
+            app.config['SQLITE_BUSY_TIMEOUT'],
+        )
 
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -107,11 +123,25 @@ login_manager.login_view = 'login'
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return load_session_user(int(user_id))
+
+
+DASHBOARD_CACHE_TIMEOUT = 300
+CASHFLOW_DEFAULT_POINTS = 180
 
 
-@cache.memoize(timeout=60)
 def get_dashboard_data(user_id, selected_month=None, trend_year=None):
+    # Kunci memuat versi data user, jadi perubahan data cukup menaikkan versinya
+    return get_or_set_user_cache(
+        user_id,
+        'dashboard',
+        (selected_month, trend_year),
+        lambda: _build_dashboard_data(user_id, selected_month, trend_year),
+        timeout=DASHBOARD_CACHE_TIMEOUT,
+    )
+
+
+def _build_dashboard_data(user_id, selected_month=None, trend_year=None):
     now = normalize_wib_storage(now_wib())
 
     total_balance = db.session.query(db.func.sum(Wallet.balance)).filter_by(user_id=user_id).scalar() or 0
@@ -119,56 +149,25 @@ def get_dashboard_data(user_id, selected_month=None, trend_year=None):
     if not selected_month:
         selected_month = now.strftime('%Y-%m')
 
-    chart_query = Transaction.query.options(
-        joinedload(Transaction.category),
-    ).filter_by(user_id=user_id)
-
-    if selected_month:
-        try:
-            year, month = map(int, selected_month.split('-'))
-            chart_query = chart_query.filter(
-                db.extract('year', Transaction.date) == year,
-                db.extract('month', Transaction.date) == month,
-            )
-        except (TypeError, ValueError):
-            selected_month = now.strftime('%Y-%m')
-            year, month = map(int, selected_month.split('-'))
-            chart_query = chart_query.filter(
-                db.extract('year', Transaction.date) == year,
-                db.extract('month', Transaction.date) == month,
-            )
-
-    transactions = chart_query.order_by(Transaction.date.desc()).all()
-    totals = calculate_transaction_totals(transactions)
-
-    expense_by_category = {}
-    for transaction in transactions:
-        if transaction.type != 'expense':
-            continue
+    try:
+        year, month = map(int, selected_month.split('-'))
+        if not 1 <= month <= 12:
+            raise ValueError
+    except (TypeError, ValueError):
+        selected_month = now.strftime('%Y-%m')
+        year, month = now.year, now.month
 
-        category_name = transaction.category.name if transaction.category else 'Tanpa Kategori'
-        expense_by_category[category_name] = expense_by_category.get(category_name, 0.0) + float(transaction.amount or 0)
+    totals = get_month_totals(user_id, year, month)
+    expense_by_category = get_expense_by_category(user_id, year, month)
 
     if not trend_year:
         trend_year = now.year
 
-    trend_transactions = Transaction.query.filter_by(user_id=user_id).filter(
-        db.extract('year', Transaction.date) == trend_year
-    ).all()
-
-    income_map = defaultdict(float)
-    expense_map = defaultdict(float)
-    for transaction in trend_transactions:
-        month_key = transaction.date.strftime('%m')
-        if transaction.type == 'income':
-            income_map[month_key] += float(transaction.amount or 0)
-        else:
-            expense_map[month_key] += float(transaction.amount or 0)
+    trend_series = get_income_expense_series(user_id, *year_bounds(trend_year), granularity='month')
 
     trend_labels = ['Jan', 'Feb', 'Mar', 'Apr', 'Mei', 'Jun', 'Jul', 'Agu', 'Sep', 'Okt', 'Nov', 'Des']
-    month_keys = [str(i).zfill(2) for i in range(1, 13)]
-    income_data = [income_map[month] for month in month_keys]
-    expense_data = [expense_map[month] for month in month_keys]
+    income_data = trend_series['income']
+    expense_data = trend_series['expense']
 
     recent_transactions = Transaction.query.options(
         joinedload(Transaction.category),
@@ -189,26 +188,58 @@ def get_dashboard_data(user_id, selected_month=None, trend_year=None):
         'trend_expense_data': expense_data,
     }
 
+def warm_dashboard_cache(limit):
+    """Isi cache dashboard bulan berjalan untuk user yang paling baru bertransaksi"""
+    now = normalize_wib_storage(now_wib())
+    user_ids = [
+        user_id for user_id, in db.session.query(Transaction.user_id)
+        .group_by(Transaction.user_id)
+        .order_by(db.func.max(Transaction.date).desc())
+        .limit(limit)
+    ]
+    for user_id in user_ids:
+        get_dashboard_data(user_id, now.strftime('%Y-%m'), now.year)
+    return len(user_ids)
+
+def _request_memo(name, loader, default):
+    # Dihitung paling banyak sekali per request, dan hanya jika template memakainya
+    memo = g.setdefault('template_refs', {})
+    if name not in memo:
+        try:
+            memo[name] = loader()
+        except Exception:
+            logger.error('Failed to load template data: %s', name, exc_info=True)
+            memo[name] = default
+    return memo[name]
+
+
+def get_cached_profile_photo(user_id):
+    # Kunci memakai versi data user; worker foto menaikkan versi setelah manifest baru tersimpan
+    return get_or_set_user_cache(
+        user_id,
+        'profile-photo',
+        (),
+        lambda: get_profile_photo_urls(user_id) or '',
+        timeout=REFERENCE_CACHE_TIMEOUT,
+    ) or None
+
+
 @app.context_processor
 def inject_categories_wallets():
-    try:
-        if current_user.is_authenticated:
-            categories = Category.query.filter_by(user_id=current_user.id).all()
-            wallets = Wallet.query.filter_by(user_id=current_user.id).all()
-            shared_wallets = SharedWallet.query.filter_by(shared_with_id=current_user.id, permission='add').all()
-            shared_wallet_objects = [sw.wallet for sw in shared_wallets]
-            all_wallets = wallets + shared_wallet_objects
-            return dict(
-                categories=categories,
-                wallets=all_wallets,
-                datetime=datetime,
-                to_wib=to_wib,
-                now_wib=now_wib,
-                profile_photo_url=get_profile_photo_url(current_user.photo)
-            )
-    except Exception:
-        pass
-    return dict(categories=[], wallets=[], datetime=datetime, to_wib=to_wib, now_wib=now_wib, profile_photo_url=None)
+    context = dict(datetime=datetime, to_wib=to_wib, now_wib=now_wib, asset_url=asset_url)
+    if not current_user.is_authenticated:
+        return dict(context, categories=[], wallets=[], profile_photo=None)
+
+    user_id = current_user.id
+    return dict(
+        context,
+        categories=LocalProxy(lambda: _request_memo('categories', lambda: get_category_options(user_id), [])),
+        wallets=LocalProxy(lambda: _request_memo('wallets', lambda: get_wallet_options(user_id), [])),
+        profile_photo=LocalProxy(lambda: _request_memo(
+            'profile_photo', lambda: get_cached_profile_photo(user_id), None,
+        )),
+        photo_srcset=photo_srcset,
+    )
 
 # Buat direktori instance jika belum ada
 os.makedirs(os.path.join(app.root_path, 'instance'), exist_ok=True)
@@ -226,16 +257,261 @@ with app.app_context():
             db.session.execute(db.text("ALTER TABLE budget ADD COLUMN start_date DATE"))
             db.session.commit()
 
+        columns = [row[1] for row in db.session.execute(db.text("PRAGMA table_info(budget)"))]
+        if 'spent' not in columns:
+            db.session.execute(db.text("ALTER TABLE budget ADD COLUMN spent FLOAT NOT NULL DEFAULT 0"))
+            db.session.execute(db.text("ALTER TABLE budget ADD COLUMN received FLOAT NOT NULL DEFAULT 0"))
+            db.session.commit()
+            rebuild_budget_counters()
+
+        columns = [row[1] for row in db.session.execute(db.text('PRAGMA table_info("transaction")'))]
+        # Kolom period (yyyymm) tidak pernah dipakai filter; hanya menambah beban tulis
+        if 'period' in columns:
+            db.session.execute(db.text('DROP INDEX IF EXISTS idx_trans_user_period'))
+            db.session.execute(db.text('ALTER TABLE "transaction" DROP COLUMN period'))
+            db.session.commit()
+
+        if 'client_id' not in columns:
+            db.session.execute(db.text('ALTER TABLE "transaction" ADD COLUMN client_id VARCHAR(64)'))
+            db.session.execute(db.text(
+                'CREATE UNIQUE INDEX IF NOT EXISTS idx_trans_user_client ON "transaction" (user_id, client_id)'
+            ))
+            db.session.commit()
+
+        columns = [row[1] for row in db.session.execute(db.text('PRAGMA table_info("user")'))]
+        if 'photo_manifest' not in columns:
+            db.session.execute(db.text('ALTER TABLE "user" ADD COLUMN photo_manifest TEXT'))
+            db.session.commit()
+
+        # Index keyset pagination (date, id) menggantikan index (user_id, date) lama
+        db.session.execute(db.text('DROP INDEX IF EXISTS idx_trans_user_date'))
+        db.session.execute(db.text(
+            'CREATE INDEX IF NOT EXISTS idx_trans_user_date_id ON "transaction" (user_id, date, id)'
+        ))
+        # Index jendela anggaran (kategori + rentang tanggal) menggantikan (user_id, category_id)
+        db.session.execute(db.text('DROP INDEX IF EXISTS idx_trans_user_cat'))
+        db.session.execute(db.text(
+            'CREATE INDEX IF NOT EXISTS idx_trans_user_cat_date ON "transaction" (user_id, category_id, date)'
+        ))
+        # Arus kas per dompet (termasuk catatan user lain di dompet yang dibagikan)
+        db.session.execute(db.text(
+            'CREATE INDEX IF NOT EXISTS idx_trans_wallet_date ON "transaction" (wallet_id, date)'
+        ))
+        db.session.commit()
+
+        # Index full-text deskripsi transaksi (FTS5), diisi ulang saat pertama kali dibuat
+        fts_exists = db.session.execute(
+            db.text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': SEARCH_TABLE},
+        ).first()
+        if ensure_search_index(db.session.connection()) and not fts_exists:
+            rebuild_search_index(db.session.connection())
+        db.session.commit()
+
+    # Isi tabel rollup untuk database lama yang sudah memiliki transaksi
+    if not db.session.query(MonthlyRollup.id).first() and db.session.query(Transaction.id).first():
+        rebuild_rollups()
+
+    if app.config['CACHE_WARM_ON_BOOT']:
+        warm_dashboard_cache(app.config['CACHE_WARM_USERS'])
+
+
+@app.cli.command('rebuild-rollups')
+@click.option('--user-id', type=int, default=None, help='Bangun ulang hanya untuk user tertentu')
+def rebuild_rollups_command(user_id):
+    """Bangun ulang tabel rollup bulanan dari data transaksi"""
+    rows = rebuild_rollups(user_id)
+    click.echo(f'Rollup dibangun ulang: {rows} baris')
+
+
+@app.cli.command('warm-cache')
+@click.option('--users', type=int, default=None, help='Jumlah user yang dipanaskan')
+def warm_cache_command(users):
+    """Isi cache dashboard bersama untuk user yang paling aktif"""
+    count = warm_dashboard_cache(users or app.config['CACHE_WARM_USERS'])
+    click.echo(f'Cache dashboard dipanaskan untuk {count} user')
+
+
+@app.cli.command('rebuild-budget-counters')
+@click.option('--user-id', type=int, default=None, help='Hitung ulang hanya untuk user tertentu')
+def rebuild_budget_counters_command(user_id):
+    """Hitung ulang counter terpakai/pemasukan anggaran dari data transaksi"""
+    count = rebuild_budget_counters(user_id)
+    click.echo(f'{count} anggaran dihitung ulang')
+
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Isi ulang index full-text transaksi dari tabel transaksi"""
+    if not search_index_enabled():
+        click.echo('SQLite tidak mendukung FTS5, pencarian memakai LIKE')
+        raise SystemExit(1)
+    rows = rebuild_search_index(db.session.connection())
+    db.session.commit()
+    click.echo(f'Index pencarian dibangun ulang: {rows} transaksi')
+
+
+@app.cli.command('bench-search')
+@click.option('--rows', type=int, default=1_000_000, show_default=True)
+@click.option('--repeat', type=int, default=5, show_default=True)
+def bench_search_command(rows, repeat):
+    """Bandingkan pencarian LIKE dengan FTS5 pada dataset sintetis"""
+    from benchmarks import bench_search
+    bench_search(rows, repeat, echo=click.echo)
+
+
+@app.cli.command('bench-excel')
+@click.option('--sizes', default='100000,1000000', show_default=True, help='Jumlah baris, dipisah koma')
+@click.option('--legacy', is_flag=True, help='Bandingkan juga dengan openpyxl Workbook + ORM penuh')
+def bench_excel_command(sizes, legacy):
+    """Ukur waktu dan puncak memori export Excel"""
+    from benchmarks import bench_excel
+    bench_excel([int(size) for size in sizes.split(',') if size.strip()], legacy=legacy, echo=click.echo)
+
+
+@app.cli.command('wal-checkpoint')
+@click.option('--mode', type=click.Choice(['passive', 'full', 'restart', 'truncate']), default='truncate', show_default=True)
+def wal_checkpoint_command(mode):
+    """Jalankan checkpoint WAL secara manual (misal dari cron)"""
+    before = wal_size(db_path)
+    busy, frames, checkpointed = wal_checkpoint(db_path, mode, app.config['SQLITE_BUSY_TIMEOUT'])
+    click.echo(
+        f'Checkpoint {mode}: {checkpointed}/{frames} frame, busy={busy}, '
+        f'WAL {before / 1024:.0f} KB -> {wal_size(db_path) / 1024:.0f} KB'
+    )
+
+
+@app.cli.command('bench-concurrency')
+@click.option('--rows', type=int, default=200_000, show_default=True)
+@click.option('--duration', type=float, default=10.0, show_default=True, help='Detik per mode')
+@click.option('--readers', type=int, default=4, show_default=True)
+@click.option('--writers', type=int, default=2, show_default=True)
+@click.option('--exporters', type=int, default=1, show_default=True, help='Pembaca panjang (scan penuh)')
+@click.option('--modes', default='DELETE,WAL', show_default=True)
+def bench_concurrency_command(rows, duration, readers, writers, exporters, modes):
+    """Bandingkan throughput dan latensi p99 baca/tulis campuran untuk tiap journal_mode"""
+    from benchmarks import bench_concurrency
+    bench_concurrency(
+        rows,
+        [mode.strip().upper() for mode in modes.split(',') if mode.strip()],
+        duration=duration,
+        readers=readers,
+        writers=writers,
+        exporters=exporters,
+        busy_timeout=app.config['SQLITE_BUSY_TIMEOUT'],
+        mmap_size=app.config['SQLITE_MMAP_SIZE'],
+        echo=click.echo,
+    )
+
+
+@app.cli.command('bench-balance')
+@click.option('--threads', type=int, default=8, show_default=True)
+@click.option('--operations', type=int, default=200, show_default=True, help='Operasi per thread')
+def bench_balance_command(threads, operations):
+    """Uji stres update saldo dompet bersama: pola baca-tulis lama vs UPDATE atomik"""
+    from benchmarks import bench_balance_updates
+    bench_balance_updates(
+        threads,
+        operations,
+        busy_timeout=app.config['SQLITE_BUSY_TIMEOUT'],
+        echo=click.echo,
+    )
+
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    """Buat salinan CSS/JS ber-hash beserta varian .gz/.br di static/dist"""
+    manifest = build_static_assets(app.static_folder)
+    for source, target in sorted(manifest.items()):
+        click.echo(f'{source} -> {target}')
+    click.echo(f'{len(manifest)} aset di-build; restart worker agar manifest baru dipakai')
+
+
+@app.cli.command('cleanup-jobs')
+def cleanup_jobs_command():
+    """Hapus job export yang kedaluwarsa beserta filenya"""
+    click.echo(f'Job dihapus: {cleanup_expired_jobs()}')
+
+
+@app.cli.command('import-csv')
+@click.argument('csv_path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--user-id', type=int, required=True)
+@click.option('--dry-run', is_flag=True, help='Hanya validasi, tanpa menyimpan')
+def import_csv_command(csv_path, user_id, dry_run):
+    """Impor file CSV format backup untuk user tertentu"""
+    with open(csv_path, encoding='utf-8', newline='') as stream:
+        result = import_transactions_csv(user_id, stream, dry_run=dry_run)
+
+    click.echo(
+        f"{'Valid' if dry_run else 'Diimpor'}: {result['imported']} baris, "
+        f"{len(result['errors'])} error, {result['rows_per_second']:,.0f} baris/detik"
+    )
+    for error in result['errors'][:20]:
+        click.echo(f'  {error}')
+
+
+def _explain_query_plan(query):
+    compiled = query.statement.compile(dialect=db.engine.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = db.session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+    return [row[-1] for row in rows]
+
+
+@app.cli.command('check-query-plans')
+def check_query_plans_command():
+    """Pastikan filter periode/tanggal memakai index seek, bukan scan tabel"""
+    now = normalize_wib_storage(now_wib())
+    start, end = last_n_months_bounds(now, 6)
+    checks = [
+        (
+            'rentang tanggal',
+            'idx_trans_user_date_id',
+            Transaction.query.filter(
+                Transaction.user_id == 1,
+                Transaction.date >= start,
+                Transaction.date < end,
+            ),
+            False,
+        ),
+        (
+            'keyset cursor',
+            'idx_trans_user_date_id',
+            order_newest_first(Transaction.query.filter(
+                Transaction.user_id == 1,
+                db.tuple_(Transaction.date, Transaction.id) < (end, 1000),
+            )).limit(10),
+            False,
+        ),
+        (
+            'total anggaran',
+            'idx_trans_user_cat_date',
+            budget_totals_query(1, [
+                Budget(id=1, category_id=1, amount=0, start_date=start.date()),
+                Budget(id=2, category_id=2, amount=0, start_date=now.date()),
+            ]),
+            # GROUP BY hanya atas baris jendela anggaran (sebanyak jumlah anggaran)
+            True,
+        ),
+        (
+            'arus kas dompet',
+            'idx_trans_wallet_date',
+            cashflow_query(1, start, end, 'day'),
+            # GROUP BY per bucket tanggal
+            True,
+        ),
+    ]
+
+    failed = False
+    for label, index_name, query, allow_temp_btree in checks:
+        plan = _explain_query_plan(query)
+        ok = any(detail.startswith('SEARCH') and index_name in detail for detail in plan)
+        ok = ok and (allow_temp_btree or not any('TEMP B-TREE' in detail for detail in plan))
+        failed = failed or not ok
+        click.echo(f"[{'OK' if ok else 'GAGAL'}] {label}: {' | '.join(plan)}")
+
+    if failed:
+        raise SystemExit(1)
 
-def _get_budget_period(budget):
-    start = budget.start_date
-    if not start:
-        if budget.year and budget.month:
-            start = date(int(budget.year), int(budget.month), 1)
-        else:
-            start = date.today()
-    end = start + relativedelta(months=1)
-    return start, end
 
 @app.route('/register', methods=['GET', 'POST'])
 def register():
@@ -285,6 +561,7 @@ def login():
 @app.route('/logout')
 @login_required
 def logout():
+    invalidate_session_user(current_user.id)
     logout_user()
     return redirect(url_for('login'))
 
@@ -300,6 +577,48 @@ def configure_service_worker(response):
         response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
     return response
 
+@app.after_request
+def compress_dynamic_response(response):
+    return compress_response(
+        response,
+        min_size=app.config['COMPRESS_MIN_SIZE'],
+        gzip_level=app.config['COMPRESS_GZIP_LEVEL'],
+        brotli_quality=app.config['COMPRESS_BROTLI_QUALITY'],
+    )
+
+
+@app.route('/static/dist/<path:filename>')
+def hashed_static(filename):
+    """Aset ber-hash: varian .br/.gz siap pakai dan cache immutable setahun"""
+    path = f'{ASSET_DIST_DIR}/{filename}'
+    if not is_hashed_asset(app.static_folder, path):
+        # manifest dan sw-assets.js namanya tetap, jadi harus selalu divalidasi ulang
+        return app.send_static_file(path)
+
+    encoding = negotiate_encoding(request.accept_encodings)
+    encoded_path = path + ENCODING_SUFFIXES[encoding] if encoding else None
+    if encoded_path and os.path.isfile(os.path.join(app.static_folder, encoded_path)):
+        response = send_from_directory(app.static_folder, encoded_path, mimetype=mimetypes.guess_type(path)[0])
+        response.headers['Content-Encoding'] = encoding
+    else:
+        response = app.send_static_file(path)
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.max_age = app.config['STATIC_IMMUTABLE_MAX_AGE']
+    response.cache_control.immutable = True
+    response.cache_control.no_cache = None
+    return response
+
+@app.route('/static/uploads/profile/<path:filename>')
+def profile_image_static(filename):
+    """Varian foto profil bernama hash isi: aman di-cache immutable setahun"""
+    response = app.send_static_file(f'{PROFILE_IMAGE_DIR}/{filename}')
+    response.cache_control.public = True
+    response.cache_control.max_age = app.config['STATIC_IMMUTABLE_MAX_AGE']
+    response.cache_control.immutable = True
+    response.cache_control.no_cache = None
+    return response
+
 @app.route('/')
 @app.route('/dashboard')
 @login_required
@@ -374,6 +693,7 @@ def add_category():
     cat = Category(name=name, type=type_, user_id=current_user.id)
     db.session.add(cat)
     db.session.commit()
+    bump_data_version(current_user.id)
     flash('Kategori ditambahkan')
     return redirect(url_for('categories'))
 
@@ -387,6 +707,7 @@ def edit_category(id):
     cat.name = request.form['name']
     cat.type = request.form['type']
     db.session.commit()
+    bump_data_version(current_user.id)
     flash('Kategori diperbarui')
     return redirect(url_for('categories'))
 
@@ -399,6 +720,7 @@ def delete_category(id):
         return redirect(url_for('categories'))
     db.session.delete(cat)
     db.session.commit()
+    bump_data_version(current_user.id)
     flash('Kategori dihapus')
     return redirect(url_for('categories'))
 
@@ -489,17 +811,22 @@ def transactions():
     }
 
     query = get_filtered_transactions(current_user.id, filters)
-    trans = query.order_by(Transaction.date.desc()).paginate(
-        page=page,
-        per_page=per_page,
-        error_out=False,
-    )
-    categories = Category.query.filter_by(user_id=current_user.id).all()
-    wallets = Wallet.query.filter_by(user_id=current_user.id).all()
-    # Tambahkan dompet bersama yang memiliki izin 'add'
-    shared_wallets = SharedWallet.query.filter_by(shared_with_id=current_user.id, permission='add').all()
-    shared_wallet_objects = [sw.wallet for sw in shared_wallets]
-    all_wallets = wallets + shared_wallet_objects
+    cursor = request.args.get('cursor')
+    if cursor is not None:
+        # Mode cursor: biaya per halaman konstan berapapun kedalamannya
+        try:
+            trans = paginate_by_cursor(query, cursor, per_page)
+        except ValueError as exc:
+            flash(str(exc), 'danger')
+            return redirect(url_for('transactions'))
+    else:
+        trans = order_newest_first(query).paginate(
+            page=page,
+            per_page=per_page,
+            error_out=False,
+            count=False,
+        )
+        trans.total = count_filtered_transactions(current_user.id, filters)
     pagination_params = {
         'category_id': category_filter,
         'wallet_id': wallet_filter,
@@ -513,7 +840,7 @@ def transactions():
         key: value for key, value in pagination_params.items()
         if value not in (None, '')
     })
-    return render_template('transactions.html', transactions=trans, categories=categories, wallets=all_wallets,
+    return render_template('transactions.html', transactions=trans,
                            category_filter=category_filter, wallet_filter=wallet_filter,
                            start_date=start_date, end_date=end_date, type_filter=type_filter, search=search,
                            per_page=per_page, pagination_query=pagination_query)
@@ -532,7 +859,7 @@ def report_preview():
     }
 
     transactions = get_filtered_transactions(current_user.id, filters).order_by(Transaction.date.desc()).limit(100).all()
-    totals = calculate_transaction_totals(transactions)
+    totals = get_filtered_totals(current_user.id, filters)
 
     return render_template(
         'report_preview.html',
@@ -572,8 +899,8 @@ def add_transaction():
             description=desc,
             transaction_type=ttype,
             date=trans_date,
+            client_id=(request.form.get('client_id') or '').strip()[:64] or None,
         )
-        cache.delete_memoized(get_dashboard_data)
         logger.info(f"Transaction created: user={current_user.id}, amount={amount}")
         flash('Transaksi disimpan')
     except Exception as exc:
@@ -606,7 +933,6 @@ def edit_transaction(id):
             transaction_type=new_type,
             date=trans_date,
         )
-        cache.delete_memoized(get_dashboard_data)
         logger.info(f"Transaction updated: user={current_user.id}, transaction_id={id}, amount={new_amount}")
         flash('Transaksi diperbarui')
     except Exception as exc:
@@ -620,7 +946,6 @@ def delete_transaction(id):
     trans = Transaction.query.get_or_404(id)
     try:
         delete_transaction_service(trans, current_user.id)
-        cache.delete_memoized(get_dashboard_data)
         logger.info(f"Transaction deleted: user={current_user.id}, transaction_id={id}")
         flash('Transaksi dihapus')
     except Exception as exc:
@@ -631,38 +956,17 @@ def delete_transaction(id):
 @app.route('/budgets')
 @login_required
 def budgets():
-    budgets = Budget.query.filter_by(user_id=current_user.id).order_by(Budget.start_date.desc(), Budget.id.desc()).all()
+    budgets = get_user_budgets(current_user.id)
     categories = Category.query.filter_by(user_id=current_user.id).all()
+    summaries = get_budget_summaries(current_user.id, budgets)
 
     budget_data = []
     for budget in budgets:
-        start_date, end_date = _get_budget_period(budget)
-        transactions = Transaction.query.filter(
-            Transaction.user_id == current_user.id,
-            Transaction.category_id == budget.category_id,
-            Transaction.date >= start_date,
-            Transaction.date < end_date,
-        ).all()
-        total_expense = sum(
-            t.amount for t in transactions
-            if t.type == 'expense'
-        )
-        total_income = sum(
-            t.amount for t in transactions
-            if t.type == 'income'
-        )
-        remaining = budget.amount - total_expense
-        net = total_income - total_expense
-
+        summary = summaries[budget.id]
         budget_data.append({
             'budget': budget,
-            'terpakai': float(total_expense),
-            'total_expense': float(total_expense),
-            'total_income': float(total_income),
-            'remaining': float(remaining),
-            'net': float(net),
-            'start_date': start_date,
-            'end_date': end_date,
+            'terpakai': summary['total_expense'],
+            **summary,
         })
 
     return render_template('budgets.html', budget_data=budget_data, categories=categories)
@@ -696,7 +1000,10 @@ def add_budget():
         year=start_date.year,
     )
     db.session.add(new_budget)
+    db.session.flush()
+    refresh_budget_counters(current_user.id, [new_budget], alerts=True)
     db.session.commit()
+    bump_data_version(current_user.id)
     flash('Anggaran disimpan')
     return redirect(url_for('budgets'))
 
@@ -706,6 +1013,7 @@ def delete_budget(id):
     budget = Budget.query.filter_by(id=id, user_id=current_user.id).first_or_404()
     db.session.delete(budget)
     db.session.commit()
+    bump_data_version(current_user.id)
     flash('Anggaran dihapus')
     return redirect(url_for('budgets'))
 
@@ -713,34 +1021,19 @@ def delete_budget(id):
 @login_required
 def budget_details(budget_id):
     budget = Budget.query.filter_by(id=budget_id, user_id=current_user.id).first_or_404()
-    start_date, end_date = _get_budget_period(budget)
-    transactions = Transaction.query.filter(
-        Transaction.user_id == current_user.id,
-        Transaction.category_id == budget.category_id,
-        Transaction.date >= start_date,
-        Transaction.date < end_date,
-    ).order_by(Transaction.date.desc()).all()
-
-    total_expense = sum(
-        t.amount for t in transactions
-        if t.type == 'expense'
-    )
-    total_income = sum(
-        t.amount for t in transactions
-        if t.type == 'income'
-    )
-    remaining = budget.amount - total_expense
-    net = total_income - total_expense
+    summary = get_budget_summary(current_user.id, budget)
+    transactions = get_budget_transactions(current_user.id, budget)
+    start_date, end_date = summary['start_date'], summary['end_date']
 
     data = {
         'budget_category': budget.category.name,
         'budget_amount': budget.amount,
         'start_date': start_date.strftime('%d/%m/%Y'),
         'end_date': (end_date - relativedelta(days=1)).strftime('%d/%m/%Y'),
-        'total_expense': float(total_expense),
-        'total_income': float(total_income),
-        'remaining': float(remaining),
-        'net': float(net),
+        'total_expense': summary['total_expense'],
+        'total_income': summary['total_income'],
+        'remaining': summary['remaining'],
+        'net': summary['net'],
         'transactions': [{
             'date': to_wib(t.date).strftime('%d/%m/%Y'),
             'description': t.description,
@@ -754,222 +1047,91 @@ def budget_details(budget_id):
 @login_required
 def export_budget_pdf(budget_id):
     budget = Budget.query.filter_by(id=budget_id, user_id=current_user.id).first_or_404()
-    start_date, end_date = _get_budget_period(budget)
-    transactions = Transaction.query.filter(
-        Transaction.user_id == current_user.id,
-        Transaction.category_id == budget.category_id,
-        Transaction.date >= start_date,
-        Transaction.date < end_date,
-    ).order_by(Transaction.date.asc()).all()
-
-    total_expense = sum(
-        t.amount for t in transactions
-        if t.type == 'expense'
-    )
-    total_income = sum(
-        t.amount for t in transactions
-        if t.type == 'income'
-    )
-    remaining = budget.amount - total_expense
-    net = total_income - total_expense
-    
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=portrait(letter), 
-                            rightMargin=50, leftMargin=50, 
-                            topMargin=50, bottomMargin=50)
-    elements = []
-    
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'TitleStyle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        spaceAfter=20,
-        alignment=1, # Center
-        textColor=colors.HexColor("#1e40af")
-    )
-    
-    subtitle_style = ParagraphStyle(
-        'SubtitleStyle',
-        parent=styles['Normal'],
-        fontSize=12,
-        spaceAfter=12,
-        alignment=1, # Center
-        textColor=colors.grey
-    )
-    
-    section_title_style = ParagraphStyle(
-        'SectionTitle',
-        parent=styles['Heading2'],
-        fontSize=14,
-        spaceBefore=15,
-        spaceAfter=10,
-        textColor=colors.HexColor("#1e40af"),
-        borderPadding=5,
-        borderWidth=0,
-        borderStyle=None
-    )
-
-    normal_style = styles['Normal']
-    
-    # Header
-    elements.append(Paragraph("Laporan Detail Anggaran", title_style))
-    elements.append(Paragraph(f"Periode: {start_date.strftime('%d/%m/%Y')} - {(end_date - relativedelta(days=1)).strftime('%d/%m/%Y')}", subtitle_style))
-    elements.append(Spacer(1, 0.2 * inch))
-    
-    # Summary Info
-    summary_data = [
-        [Paragraph("<b>Kategori</b>", normal_style), f": {budget.category.name}"],
-        [Paragraph("<b>Target Anggaran</b>", normal_style), f": Rp {budget.amount:,.0f}"],
-        [Paragraph("<b>Total Pengeluaran</b>", normal_style), f": Rp {total_expense:,.0f}"],
-        [Paragraph("<b>Total Pemasukan</b>", normal_style), f": Rp {total_income:,.0f}"],
-        [Paragraph("<b>Sisa Anggaran</b>", normal_style), f": Rp {remaining:,.0f}"],
-        [Paragraph("<b>Selisih (Informasi)</b>", normal_style), f": Rp {net:,.0f}"],
-        [Paragraph("<b>Status</b>", normal_style), f": {'Melebihi' if total_expense > budget.amount else 'Aman'}"]
-    ]
-    
-    summary_table = Table(summary_data, colWidths=[1.5*inch, 4*inch])
-    summary_table.setStyle(TableStyle([
-        ('ALIGN', (0,0), (-1,-1), 'LEFT'),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('TEXTCOLOR', (1,2), (1,2), colors.red if total_expense > budget.amount else colors.green),
-        ('TEXTCOLOR', (1,3), (1,3), colors.green),
-        ('TEXTCOLOR', (1,5), (1,5), colors.green if net >= 0 else colors.red),
-        ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
-        ('FONTSIZE', (0,0), (-1,-1), 11),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 8),
-    ]))
-    elements.append(summary_table)
-    elements.append(Spacer(1, 0.3 * inch))
-    
-    # Transactions Table
-    elements.append(Paragraph("Rincian Transaksi", section_title_style))
-    
-    table_data = [['Tanggal', 'Deskripsi', 'Dompet', 'Jumlah']]
-    for t in transactions:
-        table_data.append([
-            to_wib(t.date).strftime('%d/%m/%Y'),
-            Paragraph(t.description, normal_style),
-            t.wallet.name,
-            f"Rp {t.amount:,.0f}"
-        ])
-    
-    if len(transactions) == 0:
-        table_data.append(['-', 'Tidak ada transaksi', '-', '-'])
-
-    t_table = Table(table_data, colWidths=[1.0*inch, 2.5*inch, 1.2*inch, 1.3*inch])
-    t_table.setStyle(TableStyle([
-        ('BACKGROUND', (0,0), (-1,0), colors.HexColor("#1e40af")),
-        ('TEXTCOLOR', (0,0), (-1,0), colors.whitesmoke),
-        ('ALIGN', (0,0), (-1,0), 'CENTER'),
-        ('ALIGN', (3,1), (3,-1), 'RIGHT'),
-        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0,0), (-1,0), 10),
-        ('BOTTOMPADDING', (0,0), (-1,0), 10),
-        ('TOPPADDING', (0,0), (-1,0), 10),
-        ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.whitesmoke, colors.white])
-    ]))
-    elements.append(t_table)
-    
-    # Footer
-    elements.append(Spacer(1, 0.5 * inch))
-    footer_text = f"Dicetak pada: {now_wib().strftime('%d/%m/%Y %H:%M:%S')}"
-    elements.append(Paragraph(footer_text, ParagraphStyle('Footer', parent=styles['Italic'], alignment=2, fontSize=8)))
-
-    doc.build(elements)
-    buffer.seek(0)
-    filename = f"Laporan_Anggaran_{budget.category.name}_{start_date.strftime('%Y%m%d')}.pdf"
-    return send_file(buffer, download_name=filename, as_attachment=True)
+    job = enqueue_job(current_user.id, 'budget_pdf', {'budget_id': budget.id})
+    return _export_job_response(job)
 
 @app.route('/reports')
 @login_required
 def reports():
-    return render_template('reports.html')
+    recent_transactions = Transaction.query.options(
+        joinedload(Transaction.category),
+        joinedload(Transaction.wallet),
+    ).filter_by(user_id=current_user.id).order_by(Transaction.id.desc()).limit(10).all()
+    return render_template('reports.html', recent_transactions=recent_transactions)
 
 @app.route('/api/chart-data')
 @login_required
+@conditional_by_data_version
 def chart_data():
-    from sqlalchemy import func, extract
     now = normalize_wib_storage(now_wib())
-    data = db.session.query(Category.name, func.sum(Transaction.amount)).\
-           join(Transaction).\
-           filter(Transaction.user_id == current_user.id,
-                  Transaction.type == 'expense',
-                  extract('month', Transaction.date) == now.month,
-                  extract('year', Transaction.date) == now.year).\
-           group_by(Category.id).all()
-    return jsonify({'labels': [d[0] for d in data], 'values': [float(d[1]) for d in data]})
+    expense_by_category = get_expense_by_category(current_user.id, now.year, now.month)
+    return jsonify({'labels': list(expense_by_category.keys()), 'values': list(expense_by_category.values())})
 
 @app.route('/api/income-expense-data')
 @login_required
+@conditional_by_data_version
 def income_expense_data():
-    from sqlalchemy import func, extract
     now = normalize_wib_storage(now_wib())
-    
-    # Get monthly income and expense totals
-    income = db.session.query(func.sum(Transaction.amount)).\
-             filter(Transaction.user_id == current_user.id,
-                    Transaction.type == 'income',
-                    extract('month', Transaction.date) == now.month,
-                    extract('year', Transaction.date) == now.year).scalar() or 0
-    
-    expense = db.session.query(func.sum(Transaction.amount)).\
-              filter(Transaction.user_id == current_user.id,
-                     Transaction.type == 'expense',
-                     extract('month', Transaction.date) == now.month,
-                     extract('year', Transaction.date) == now.year).scalar() or 0
-    
+
+    # Total pemasukan dan pengeluaran bulan berjalan
+    series = get_income_expense_series(current_user.id, *month_bounds(now.year, now.month), granularity='month')
+
     return jsonify({
         'labels': ['Pemasukan', 'Pengeluaran'],
-        'income': float(income),
-        'expense': float(expense)
+        'income': series['income'][0],
+        'expense': series['expense'][0]
     })
 
 @app.route('/api/income-expense-line')
 @login_required
+@conditional_by_data_version
 def income_expense_line():
-    from sqlalchemy import func, extract
     now = normalize_wib_storage(now_wib())
-    labels = []
-    incomes = []
-    expenses = []
     # last 6 months
-    for i in range(5, -1, -1):
-        year = now.year
-        month = now.month - i
-        while month <= 0:
-            month += 12
-            year -= 1
-        label = f"{month}/{year}"
-        inc = db.session.query(func.sum(Transaction.amount)).filter(
-            Transaction.user_id == current_user.id,
-            Transaction.type == 'income',
-            extract('month', Transaction.date) == month,
-            extract('year', Transaction.date) == year
-        ).scalar() or 0
-        exp = db.session.query(func.sum(Transaction.amount)).filter(
-            Transaction.user_id == current_user.id,
-            Transaction.type == 'expense',
-            extract('month', Transaction.date) == month,
-            extract('year', Transaction.date) == year
-        ).scalar() or 0
-        labels.append(label)
-        incomes.append(float(inc))
-        expenses.append(float(exp))
-    return jsonify({'labels': labels, 'income': incomes, 'expense': expenses})
+    series = get_income_expense_series(current_user.id, *last_n_months_bounds(now, 6), granularity='month')
+    return jsonify({
+        'labels': [f"{bucket.month}/{bucket.year}" for bucket in series['buckets']],
+        'income': series['income'],
+        'expense': series['expense'],
+    })
+
+@app.route('/api/income-expense-series')
+@login_required
+@conditional_by_data_version
+def income_expense_series():
+    """?start=YYYY-MM-DD&end=YYYY-MM-DD (inklusif)&granularity=day|week|month|year"""
+    now = normalize_wib_storage(now_wib())
+    try:
+        granularity = request.args.get('granularity', 'month')
+        end_raw = request.args.get('end')
+        end = datetime.strptime(end_raw, '%Y-%m-%d') + timedelta(days=1) if end_raw else last_n_months_bounds(now, 12)[1]
+        start_raw = request.args.get('start')
+        start = datetime.strptime(start_raw, '%Y-%m-%d') if start_raw else last_n_months_bounds(now, 12)[0]
+        series = get_income_expense_series(current_user.id, start, end, granularity=granularity)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+
+    label_format = BUCKET_LABEL_FORMATS[granularity]
+    return jsonify({
+        'granularity': granularity,
+        'labels': [bucket.strftime(label_format) for bucket in series['buckets']],
+        'dates': [bucket.isoformat() for bucket in series['buckets']],
+        'income': series['income'],
+        'expense': series['expense'],
+        'net': series['net'],
+    })
 
 @app.route('/api/budget-realization')
 @login_required
+@conditional_by_data_version
 def budget_realization():
-    today = date.today()
+    today = normalize_wib_storage(now_wib()).date()
 
-    budgets = Budget.query.filter_by(user_id=current_user.id).order_by(Budget.start_date.desc(), Budget.id.desc()).all()
+    budgets = get_user_budgets(current_user.id)
 
     active_budget = None
     for b in budgets:
-        start, end = _get_budget_period(b)
+        start, end = get_budget_period(b)
         if start <= today < end:
             active_budget = b
             break
@@ -977,46 +1139,40 @@ def budget_realization():
     if not active_budget and budgets:
         active_budget = budgets[0]
 
-    print("ACTIVE BUDGET:", active_budget.id if active_budget else None)
-
     labels = []
     budget_vals = []
     real_vals = []
 
     if active_budget:
-        start_date, end_date = _get_budget_period(active_budget)
-        transactions = Transaction.query.filter(
-            Transaction.user_id == current_user.id,
-            Transaction.category_id == active_budget.category_id,
-            Transaction.date >= start_date,
-            Transaction.date < end_date,
-        ).all()
-
-        total_expense = sum(t.amount for t in transactions if t.type == 'expense')
+        summary = get_budget_summary(current_user.id, active_budget)
         labels.append(active_budget.category.name)
         budget_vals.append(float(active_budget.amount))
-        real_vals.append(float(total_expense))
+        real_vals.append(summary['total_expense'])
 
     return jsonify({'labels': labels, 'budget': budget_vals, 'real': real_vals})
 
 @app.route('/api/cashflow-data')
 @login_required
+@conditional_by_data_version
 def cashflow_data():
+    """?start=YYYY-MM-DD&end=YYYY-MM-DD (inklusif)&granularity=day|week|month|year&points=N"""
     now = normalize_wib_storage(now_wib())
-    start = now - timedelta(days=30)
-    transactions = Transaction.query.filter(Transaction.user_id == current_user.id,
-                                         Transaction.date >= start).order_by(Transaction.date).all()
-    labels = []
-    balances = []
-    bal = 0
-    for t in transactions:
-        if t.type == 'income':
-            bal += t.amount
-        else:
-            bal -= t.amount
-        labels.append(to_wib(t.date).strftime('%d/%m'))
-        balances.append(bal)
-    return jsonify({'labels': labels, 'balance': balances})
+    try:
+        end_raw = request.args.get('end')
+        end = datetime.strptime(end_raw, '%Y-%m-%d') + timedelta(days=1) if end_raw else now
+        start_raw = request.args.get('start')
+        start = datetime.strptime(start_raw, '%Y-%m-%d') if start_raw else end - timedelta(days=30)
+        max_points = request.args.get('points', CASHFLOW_DEFAULT_POINTS, type=int)
+        series = get_cashflow_series(
+            current_user.id,
+            start,
+            end,
+            granularity=request.args.get('granularity', 'day'),
+            max_points=max(max_points, 3),
+        )
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+    return jsonify(series)
 
 @app.route('/export/excel')
 @login_required
@@ -1029,49 +1185,8 @@ def export_excel():
         'type': (request.args.get('type') or '').strip(),
         'search': request.args.get('search', ''),
     }
-    transactions = get_filtered_transactions(current_user.id, filters).order_by(Transaction.date.desc()).all()
-    
-    # Create a new workbook and select the active sheet
-    wb = Workbook()
-    ws = wb.active
-    ws.title = 'Transaksi'
-    
-    # Define header style
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_alignment = Alignment(horizontal="center", vertical="center")
-    
-    # Add headers
-    headers = ['Tanggal', 'Deskripsi', 'Jumlah', 'Tipe', 'Kategori', 'Dompet']
-    for col_num, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col_num)
-        cell.value = header
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_alignment
-    
-    # Add data rows
-    for row_num, transaction in enumerate(transactions, 2):
-        ws.cell(row=row_num, column=1).value = to_wib(transaction.date).strftime('%Y-%m-%d %H:%M')
-        ws.cell(row=row_num, column=2).value = transaction.description
-        ws.cell(row=row_num, column=3).value = transaction.amount
-        ws.cell(row=row_num, column=4).value = 'Pemasukan' if transaction.type == 'income' else 'Pengeluaran'
-        ws.cell(row=row_num, column=5).value = transaction.category.name
-        ws.cell(row=row_num, column=6).value = transaction.wallet.name
-    
-    # Adjust column widths
-    ws.column_dimensions['A'].width = 18
-    ws.column_dimensions['B'].width = 25
-    ws.column_dimensions['C'].width = 12
-    ws.column_dimensions['D'].width = 12
-    ws.column_dimensions['E'].width = 15
-    ws.column_dimensions['F'].width = 15
-    
-    # Save to BytesIO
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    return send_file(output, download_name='laporan_keuangan.xlsx', as_attachment=True)
+    job = enqueue_job(current_user.id, 'excel', {'filters': filters})
+    return _export_job_response(job)
 
 @app.route('/export/pdf')
 @login_required
@@ -1084,148 +1199,47 @@ def export_pdf():
         'type': (request.args.get('type') or '').strip(),
         'search': request.args.get('search', ''),
     }
-    start_date = filters['start_date']
-    end_date = filters['end_date']
+    job = enqueue_job(current_user.id, 'pdf', {'filters': filters, 'username': current_user.username})
+    return _export_job_response(job)
 
-    transactions = get_filtered_transactions(current_user.id, filters).order_by(Transaction.date.asc()).all()
-    
-    # Calculate summary
-    totals = calculate_transaction_totals(transactions)
-    total_income = totals['total_income']
-    total_expense = totals['total_expense']
-    net_flow = totals['net_total']
-
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=portrait(letter),
-                            rightMargin=40, leftMargin=40,
-                            topMargin=40, bottomMargin=40)
-    elements = []
-    
-    styles = getSampleStyleSheet()
-    
-    # Custom Styles
-    title_style = ParagraphStyle(
-        'TitleStyle',
-        parent=styles['Heading1'],
-        fontSize=20,
-        spaceAfter=10,
-        alignment=1,  # Center
-        textColor=colors.HexColor("#1e40af")
-    )
-    
-    subtitle_style = ParagraphStyle(
-        'SubtitleStyle',
-        parent=styles['Normal'],
-        fontSize=11,
-        spaceAfter=20,
-        alignment=1,  # Center
-        textColor=colors.grey
-    )
 
-    header_style = ParagraphStyle(
-        'HeaderStyle',
-        parent=styles['Heading2'],
-        fontSize=14,
-        spaceBefore=15,
-        spaceAfter=10,
-        textColor=colors.HexColor("#1e40af")
-    )
+def _export_job_response(job):
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({
+            'status': 'success',
+            'data': {
+                'job_id': job.id,
+                'status_url': url_for('api.get_job_status', job_id=job.id),
+                'download_url': url_for('download_export_job', job_id=job.id),
+            },
+        }), 202
+    return redirect(url_for('export_job_page', job_id=job.id))
 
-    normal_style = styles['Normal']
-    
-    # 1. Title & Header
-    elements.append(Paragraph("LAPORAN KEUANGAN", title_style))
-    date_range = "Semua Waktu"
-    if start_date and end_date:
-        date_range = f"{start_date} s/d {end_date}"
-    elif start_date:
-        date_range = f"Mulai {start_date}"
-    elif end_date:
-        date_range = f"Hingga {end_date}"
-        
-    elements.append(Paragraph(f"Periode: {date_range}", subtitle_style))
-    elements.append(Paragraph(f"User: {current_user.username}", subtitle_style))
-    elements.append(Spacer(1, 0.2 * inch))
-
-    # 2. Summary Card
-    elements.append(Paragraph("Ringkasan", header_style))
-    summary_data = [
-        ["Total Pemasukan", f"Rp {total_income:,.0f}"],
-        ["Total Pengeluaran", f"Rp {total_expense:,.0f}"],
-        ["Arus Kas Bersih", f"Rp {net_flow:,.0f}"]
-    ]
-    
-    summary_table = Table(summary_data, colWidths=[2.5*inch, 2.5*inch])
-    summary_table.setStyle(TableStyle([
-        ('ALIGN', (0,0), (0,-1), 'LEFT'),
-        ('ALIGN', (1,0), (1,-1), 'RIGHT'),
-        ('FONTNAME', (0,0), (-1,-1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0,0), (-1,-1), 11),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 8),
-        ('LINEBELOW', (0,0), (-1,-1), 0.5, colors.lightgrey),
-        ('TEXTCOLOR', (1,2), (1,2), colors.green if net_flow >= 0 else colors.red),
-    ]))
-    elements.append(summary_table)
-    elements.append(Spacer(1, 0.4 * inch))
-
-    # 3. Transactions Table
-    elements.append(Paragraph("Rincian Transaksi", header_style))
-    
-    table_data = [['Tanggal', 'Deskripsi', 'Kategori', 'Tipe', 'Jumlah']]
-    for t in transactions:
-        table_data.append([
-            to_wib(t.date).strftime('%d/%m/%Y'),
-            Paragraph(t.description, normal_style),
-            t.category.name,
-            'Masuk' if t.type == 'income' else 'Keluar',
-            f"Rp {t.amount:,.0f}"
-        ])
-    
-    if not transactions:
-        table_data.append(['-', 'Tidak ada transaksi ditemukan', '-', '-', '-'])
-
-    t_table = Table(table_data, colWidths=[1.0*inch, 2.4*inch, 1.2*inch, 0.8*inch, 1.5*inch])
-    t_table.setStyle(TableStyle([
-        ('BACKGROUND', (0,0), (-1,0), colors.HexColor("#1e40af")),
-        ('TEXTCOLOR', (0,0), (-1,0), colors.whitesmoke),
-        ('ALIGN', (0,0), (-1,0), 'CENTER'),
-        ('ALIGN', (4,1), (4,-1), 'RIGHT'),
-        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0,0), (-1,0), 10),
-        ('BOTTOMPADDING', (0,0), (-1,0), 10),
-        ('TOPPADDING', (0,0), (-1,0), 10),
-        ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.whitesmoke, colors.white]),
-        ('TEXTCOLOR', (3,1), (3,-1), colors.green), # Default column 3 color (Type)
-    ]))
-    
-    # Conditional coloring for type column
-    if transactions:
-        for i, t in enumerate(transactions, 1):
-            if t.type == 'expense':
-                t_table.setStyle(TableStyle([
-                    ('TEXTCOLOR', (3, i), (3, i), colors.red),
-                    ('TEXTCOLOR', (4, i), (4, i), colors.red)
-                ]))
-            else:
-                t_table.setStyle(TableStyle([
-                    ('TEXTCOLOR', (3, i), (3, i), colors.green),
-                    ('TEXTCOLOR', (4, i), (4, i), colors.green)
-                ]))
-
-    elements.append(t_table)
-    
-    # 4. Footer
-    elements.append(Spacer(1, 0.5 * inch))
-    footer_text = f"Dicetak pada: {now_wib().strftime('%d/%m/%Y %H:%M:%S')}"
-    elements.append(Paragraph(footer_text, ParagraphStyle('Footer', parent=styles['Italic'], alignment=2, fontSize=8, textColor=colors.grey)))
 
-    doc.build(elements)
-    buffer.seek(0)
-    
-    filename = f"Laporan_Keuangan_{current_user.username}_{now_wib().strftime('%Y%m%d')}.pdf"
-    return send_file(buffer, download_name=filename, as_attachment=True)
+@app.route('/jobs/<job_id>')
+@login_required
+def export_job_page(job_id):
+    job = get_job(current_user.id, job_id)
+    if not job:
+        flash('Laporan tidak ditemukan atau sudah kedaluwarsa', 'danger')
+        return redirect(url_for('reports'))
+    return render_template('export_job.html', job=job)
+
+
+@app.route('/jobs/<job_id>/download')
+@login_required
+def download_export_job(job_id):
+    job = get_job(current_user.id, job_id)
+    if (
+        not job
+        or job.status != 'done'
+        or is_job_expired(job)
+        or not job.file_path
+        or not os.path.exists(job.file_path)
+    ):
+        flash('Laporan belum siap atau sudah kedaluwarsa', 'danger')
+        return redirect(url_for('reports'))
+    return send_file(job.file_path, download_name=job.download_name, as_attachment=True)
 
 @app.route('/share/wallet', methods=['POST'])
 @login_required
@@ -1250,6 +1264,7 @@ def share_wallet():
         share = SharedWallet(wallet_id=wallet_id, shared_with_id=user_to_share.id, permission=permission)
         db.session.add(share)
     db.session.commit()
+    bump_data_version(current_user.id, user_to_share.id)
     flash('Dompet dibagikan')
     return redirect(url_for('wallets'))
 
@@ -1263,6 +1278,7 @@ def unshare_wallet(id):
         return redirect(url_for('wallets'))
     db.session.delete(share)
     db.session.commit()
+    bump_data_version(current_user.id, share.shared_with_id)
     flash('Berbagi dompet dihentikan')
     return redirect(url_for('wallets'))
 
@@ -1292,7 +1308,6 @@ def transfer():
                 fee=fee,
                 description=description,
             )
-            cache.delete_memoized(get_dashboard_data)
             logger.info(
                 f"Transfer completed: user={current_user.id}, from_wallet={from_wallet_id}, to_wallet={to_wallet_id}, amount={amount}, fee={fee}"
             )
@@ -1328,23 +1343,15 @@ def upload_photo():
         return redirect(url_for('profile'))
 
     try:
-        new_relative_path = optimize_and_save_profile_image(file, current_user.id)
+        # Request hanya memvalidasi header gambar; decode, resize dan encode varian di worker pool
+        staged_path = stage_profile_upload(file)
+        submit_background(process_profile_upload, current_user.id, staged_path)
 
-        # Hapus foto lama jika ada dan berbeda dengan file baru
-        if current_user.photo:
-            old_photo_path = safe_static_file_path(current_user.photo)
-            new_photo_path = safe_static_file_path(new_relative_path)
-            if old_photo_path and os.path.exists(old_photo_path) and old_photo_path != new_photo_path:
-                os.remove(old_photo_path)
-
-        # Update database
-        current_user.photo = new_relative_path
-        db.session.commit()
-
-        flash('Foto profil berhasil diubah')
+        flash('Foto profil sedang diproses dan akan tampil dalam beberapa saat')
     except ValueError as e:
         flash(str(e))
     except Exception:
+        logger.error('Failed to queue profile photo', exc_info=True)
         flash('Gagal memproses foto. Silakan coba gambar lain.')
 
     return redirect(url_for('profile'))
@@ -1352,101 +1359,6 @@ def upload_photo():
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_IMAGE_EXTENSIONS
 
-
-def safe_static_file_path(relative_path):
-    if not relative_path:
-        return None
-
-    normalized = relative_path.replace('\\', '/').lstrip('/')
-    if normalized.startswith('static/'):
-        normalized = normalized[len('static/'):]
-
-    static_root = os.path.abspath(os.path.join(app.root_path, 'static'))
-    full_path = os.path.abspath(os.path.join(static_root, normalized))
-    if not full_path.startswith(static_root + os.sep) and full_path != static_root:
-        return None
-    return full_path
-
-
-def get_profile_photo_url(relative_path):
-    file_path = safe_static_file_path(relative_path)
-    if not file_path or not os.path.exists(file_path):
-        return None
-
-    normalized = relative_path.replace('\\', '/').lstrip('/')
-    if normalized.startswith('static/'):
-        normalized = normalized[len('static/'):]
-    return url_for('static', filename=normalized)
-
-
-def image_has_transparency(image):
-    if image.mode in ('RGBA', 'LA'):
-        alpha = image.getchannel('A')
-        return alpha.getextrema()[0] < 255
-    if image.mode == 'P':
-        return 'transparency' in image.info
-    return False
-
-
-def optimize_and_save_profile_image(file_storage, user_id):
-    try:
-        file_storage.stream.seek(0)
-        image = Image.open(file_storage.stream)
-        image.verify()
-    except (UnidentifiedImageError, OSError):
-        raise ValueError('File bukan gambar yang valid')
-
-    try:
-        file_storage.stream.seek(0)
-        image = Image.open(file_storage.stream)
-        image = ImageOps.exif_transpose(image)
-    except Exception:
-        raise ValueError('Gagal membaca data gambar')
-
-    width, height = image.size
-    if width <= 0 or height <= 0:
-        raise ValueError('Ukuran gambar tidak valid')
-    if width * height > MAX_PROFILE_IMAGE_PIXELS:
-        raise ValueError('Resolusi gambar terlalu besar')
-
-    if max(width, height) > MAX_PROFILE_IMAGE_DIMENSION:
-        image.thumbnail((MAX_PROFILE_IMAGE_DIMENSION, MAX_PROFILE_IMAGE_DIMENSION), Image.Resampling.LANCZOS)
-
-    original_ext = file_storage.filename.rsplit('.', 1)[1].lower()
-    keep_png = (original_ext == 'png' and image_has_transparency(image))
-
-    if keep_png:
-        filename = f"user_{user_id}.png"
-        output_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        temp_output = f"{output_path}.tmp"
-
-        if image.mode != 'RGBA':
-            image = image.convert('RGBA')
-
-        image.save(temp_output, format='PNG', optimize=True)
-        os.replace(temp_output, output_path)
-        return f'uploads/{filename}'
-
-    filename = f"user_{user_id}.jpg"
-    output_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    temp_output = f"{output_path}.tmp"
-
-    if image.mode not in ('RGB', 'L'):
-        image = image.convert('RGB')
-    elif image.mode == 'L':
-        image = image.convert('RGB')
-
-    image.save(
-        temp_output,
-        format='JPEG',
-        quality=PROFILE_JPEG_QUALITY,
-        optimize=True,
-        progressive=True,
-        subsampling='4:2:0'
-    )
-    os.replace(temp_output, output_path)
-    return f'uploads/{filename}'
-
 @app.route('/change_password', methods=['GET', 'POST'])
 @login_required
 def change_password():
@@ -1455,7 +1367,8 @@ def change_password():
         new_password = request.form['new_password']
         confirm_password = request.form['confirm_password']
         
-        if not current_user.check_password(current_password):
+        user = get_user_record(current_user.id)
+        if not user.check_password(current_password):
             flash('Password saat ini salah')
             return redirect(url_for('change_password'))
         
@@ -1463,8 +1376,9 @@ def change_password():
             flash('Password baru tidak cocok')
             return redirect(url_for('change_password'))
         
-        current_user.set_password(new_password)  # Hash password baru sebelum menyimpan
+        user.set_password(new_password)  # Hash password baru sebelum menyimpan
         db.session.commit()
+        invalidate_session_user(user.id)
         flash('Password berhasil diubah')
         return redirect(url_for('profile'))
     
@@ -1473,36 +1387,16 @@ def change_password():
 @app.route('/backup')
 @login_required
 def backup():
-    # Backup data ke CSV
-    import csv
-    from io import StringIO
-    
-    output = StringIO()
-    writer = csv.writer(output)
-    
-    # Header untuk transactions
-    writer.writerow(['Date', 'Amount', 'Description', 'Type', 'Category', 'Wallet'])
-    
-    transactions = Transaction.query.filter_by(user_id=current_user.id).all()
-    for t in transactions:
-        category = Category.query.get(t.category_id)
-        wallet = Wallet.query.get(t.wallet_id)
-        writer.writerow([
-            to_wib(t.date).strftime('%Y-%m-%d %H:%M:%S'),
-            t.amount,
-            t.description,
-            t.type,
-            category.name if category else '',
-            wallet.name if wallet else ''
-        ])
-    
-    output.seek(0)
-    return send_file(
-        BytesIO(output.getvalue().encode('utf-8')),
-        mimetype='text/csv',
-        as_attachment=True,
-        download_name='finance_backup.csv'
+    # Backup data ke CSV, dikirim bertahap (chunked) agar memori tetap konstan
+    compress = request.args.get('compress') == 'gzip'
+    download_name = 'finance_backup.csv.gz' if compress else 'finance_backup.csv'
+
+    response = Response(
+        stream_with_context(iter_backup_csv(current_user.id, compress=compress)),
+        mimetype='application/gzip' if compress else 'text/csv',
     )
+    response.headers['Content-Disposition'] = f'attachment; filename={download_name}'
+    return response
 
 @app.route('/import_data', methods=['GET', 'POST'])
 @login_required
@@ -1518,90 +1412,33 @@ def import_data():
             return redirect(request.url)
         
         if file and file.filename.endswith('.csv'):
-            import csv
             from io import TextIOWrapper
-            
+
             stream = TextIOWrapper(file.stream, encoding='utf-8')
-            csv_reader = csv.reader(stream)
-            
-            # Skip header
-            next(csv_reader, None)
-            
-            imported_count = 0
-            errors = []
-            
-            for row_num, row in enumerate(csv_reader, start=2):
-                try:
-                    if len(row) != 6:
-                        errors.append(f'Baris {row_num}: Format tidak valid')
-                        continue
-                    
-                    date_str, amount_str, description, type_, category_name, wallet_name = row
-                    
-                    # Parse date
-                    try:
-                        date = normalize_wib_storage(datetime.strptime(date_str, '%Y-%m-%d %H:%M:%S'))
-                    except ValueError:
-                        errors.append(f'Baris {row_num}: Format tanggal tidak valid')
-                        continue
-                    
-                    # Parse amount
-                    try:
-                        amount = parse_positive_amount(amount_str)
-                    except ValueError:
-                        errors.append(f'Baris {row_num}: Jumlah tidak valid')
-                        continue
-                    
-                    # Validate type
-                    if type_ not in ['income', 'expense']:
-                        errors.append(f'Baris {row_num}: Tipe harus income atau expense')
-                        continue
-                    
-                    # Get or create category
-                    category = Category.query.filter_by(user_id=current_user.id, name=category_name, type=type_).first()
-                    if not category:
-                        category = Category(name=category_name, type=type_, user_id=current_user.id)
-                        db.session.add(category)
-                        db.session.flush()
-                    
-                    # Get or create wallet
-                    wallet = Wallet.query.filter_by(user_id=current_user.id, name=wallet_name).first()
-                    if not wallet:
-                        wallet = Wallet(name=wallet_name, type='cash', balance=0.0, user_id=current_user.id)
-                        db.session.add(wallet)
-                        db.session.flush()
-                    
-                    # Create transaction
-                    transaction = Transaction(
-                        amount=amount,
-                        description=description,
-                        date=date,
-                        type=type_,
-                        category_id=category.id,
-                        wallet_id=wallet.id,
-                        user_id=current_user.id
-                    )
-                    db.session.add(transaction)
-                    
-                    # Update wallet balance
-                    if type_ == 'income':
-                        wallet.balance += amount
-                    else:
-                        wallet.balance -= amount
-                    
-                    imported_count += 1
-                    
-                except Exception as e:
-                    errors.append(f'Baris {row_num}: Error - {str(e)}')
-            
-            db.session.commit()
-            
-            if imported_count > 0:
-                flash(f'Berhasil mengimpor {imported_count} transaksi')
+            dry_run = bool(request.form.get('dry_run'))
+
+            try:
+                result = import_transactions_csv(current_user.id, stream, dry_run=dry_run)
+            except Exception:
+                logger.error('Import error', exc_info=True)
+                flash('Gagal mengimpor data', 'danger')
+                return redirect(request.url)
+
+            imported_count = result['imported']
+            errors = result['errors']
+            logger.info(
+                f"Import {'validated' if dry_run else 'completed'}: user={current_user.id}, rows={imported_count}, "
+                f"errors={len(errors)}, rows_per_second={result['rows_per_second']:.0f}"
+            )
+
+            if dry_run:
+                flash(f'Validasi selesai: {imported_count} transaksi siap diimpor')
+            elif imported_count > 0:
+                flash(f"Berhasil mengimpor {imported_count} transaksi ({result['rows_per_second']:,.0f} baris/detik)")
             if errors:
                 flash(f'Error pada {len(errors)} baris: ' + '; '.join(errors[:5]))  # Show first 5 errors
             
-            return redirect(url_for('profile'))
+            return redirect(request.url if dry_run else url_for('profile'))
         else:
             flash('File harus berformat CSV')
             return redirect(request.url)
@@ -0,0 +1,413 @@
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from models import db, Category, Transaction, User, Wallet
+from services.export_service import transaction_projection, write_transactions_xlsx
+from services.search_service import (
+    build_match_query,
+    description_like_filter,
+    ensure_search_index,
+    full_text_filter,
+    rebuild_search_index,
+)
+from services.transaction_service import order_newest_first
+from services.wallet_service import balance_update_statement
+from utils.sqlite_utils import apply_sqlite_pragmas
+
+
+DESCRIPTION_WORDS = [
+    'makan', 'siang', 'malam', 'kopi', 'bensin', 'parkir', 'tol', 'listrik', 'air', 'pulsa',
+    'internet', 'sewa', 'kost', 'gaji', 'bonus', 'belanja', 'bulanan', 'sayur', 'buah', 'obat',
+    'dokter', 'sekolah', 'buku', 'hadiah', 'ulang', 'tahun', 'arisan', 'zakat', 'infak', 'servis',
+    'motor', 'mobil', 'tiket', 'kereta', 'pesawat', 'hotel', 'liburan', 'laundry', 'gas', 'galon',
+]
+CATEGORY_NAMES = ['Gaji', 'Hadiah', 'Makanan', 'Transport', 'Belanja', 'Tagihan']
+WALLET_NAMES = ['Dompet', 'Bank BCA', 'GoPay', 'OVO']
+SEARCH_TERMS = ['kopi', 'makan siang', 'list', 'tiket kereta', 'servis motor']
+
+
+def _timed(func, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return result, statistics.median(samples)
+
+
+def create_synthetic_database(rows, seed=42):
+    """Buat database SQLite sementara berisi satu user dengan `rows` transaksi"""
+    handle, path = tempfile.mkstemp(prefix='finance-bench-', suffix='.db')
+    os.close(handle)
+    engine = create_engine(f'sqlite:///{path}')
+    db.metadata.create_all(engine)
+
+    rng = random.Random(seed)
+    started_at = datetime(2020, 1, 1)
+    with engine.begin() as connection:
+        connection.execute(User.__table__.insert(), [{'id': 1, 'username': 'bench', 'password': '-'}])
+        connection.execute(Category.__table__.insert(), [
+            {'id': index, 'name': name, 'type': 'income' if index <= 2 else 'expense', 'user_id': 1}
+            for index, name in enumerate(CATEGORY_NAMES, start=1)
+        ])
+        connection.execute(Wallet.__table__.insert(), [
+            {'id': index, 'name': name, 'type': 'cash', 'balance': 0.0, 'user_id': 1}
+            for index, name in enumerate(WALLET_NAMES, start=1)
+        ])
+
+        batch = []
+        for index in range(rows):
+            category_id = rng.randint(1, len(CATEGORY_NAMES))
+            batch.append({
+                'amount': float(rng.randint(1, 500) * 1000),
+                'description': ' '.join(rng.choices(DESCRIPTION_WORDS, k=rng.randint(2, 5))),
+                'date': started_at + timedelta(minutes=index * 3),
+                'type': 'income' if category_id <= 2 else 'expense',
+                'category_id': category_id,
+                'wallet_id': rng.randint(1, len(WALLET_NAMES)),
+                'user_id': 1,
+            })
+            if len(batch) >= 50_000:
+                connection.execute(Transaction.__table__.insert(), batch)
+                batch = []
+        if batch:
+            connection.execute(Transaction.__table__.insert(), batch)
+
+    return engine, path
+
+
+def bench_search(rows, repeat=5, echo=print):
+    echo(f'Membuat dataset sintetis {rows:,} transaksi...')
+    engine, path = create_synthetic_database(rows)
+    try:
+        with engine.begin() as connection:
+            if not ensure_search_index(connection):
+                echo('SQLite tidak mendukung FTS5')
+                return
+            started = time.perf_counter()
+            rebuild_search_index(connection)
+            echo(f'Index FTS5 dibangun dalam {time.perf_counter() - started:.1f} dtk')
+
+        with Session(engine) as session:
+            echo(f"{'kata kunci':<16}{'mode':<6}{'halaman 1 (ms)':>16}{'hitung (ms)':>14}{'hasil':>10}")
+            for term in SEARCH_TERMS:
+                variants = [
+                    ('LIKE', description_like_filter(term)),
+                    ('FTS5', full_text_filter(build_match_query(term))),
+                ]
+                for label, criterion in variants:
+                    base = session.query(Transaction).filter(Transaction.user_id == 1, criterion)
+                    _, page_ms = _timed(lambda: order_newest_first(base).limit(10).all(), repeat)
+                    count, count_ms = _timed(
+                        lambda: session.query(db.func.count(Transaction.id))
+                        .filter(Transaction.user_id == 1, criterion)
+                        .scalar(),
+                        repeat,
+                    )
+                    echo(f'{term:<16}{label:<6}{page_ms:>16.2f}{count_ms:>14.2f}{count:>10,}')
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+
+def _measure(func):
+    """Waktu diukur tanpa tracemalloc, puncak memori diukur pada putaran kedua"""
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak / (1024 * 1024)
+
+
+def _legacy_excel_export(session):
+    from io import BytesIO
+
+    from openpyxl import Workbook
+    from sqlalchemy.orm import joinedload
+
+    transactions = session.query(Transaction).options(
+        joinedload(Transaction.wallet),
+        joinedload(Transaction.category),
+    ).filter(Transaction.user_id == 1).order_by(Transaction.date.desc()).all()
+
+    wb = Workbook()
+    ws = wb.active
+    for row_num, transaction in enumerate(transactions, 2):
+        ws.cell(row=row_num, column=1).value = transaction.date.strftime('%Y-%m-%d %H:%M')
+        ws.cell(row=row_num, column=2).value = transaction.description
+        ws.cell(row=row_num, column=3).value = transaction.amount
+        ws.cell(row=row_num, column=4).value = transaction.type
+        ws.cell(row=row_num, column=5).value = transaction.category.name
+        ws.cell(row=row_num, column=6).value = transaction.wallet.name
+    output = BytesIO()
+    wb.save(output)
+    return output.tell()
+
+
+def bench_excel(sizes, legacy=False, echo=print):
+    echo(f"{'baris':>10}  {'mode':<18}{'waktu (dtk)':>12}{'puncak memori (MB)':>20}{'ukuran (MB)':>13}")
+    for rows in sizes:
+        engine, path = create_synthetic_database(rows)
+        try:
+            with Session(engine) as session:
+                def streaming_export():
+                    projection = transaction_projection(1, session=session) \
+                        .order_by(Transaction.date.desc(), Transaction.id.desc())
+                    output_path = write_transactions_xlsx(projection)
+                    size = os.path.getsize(output_path)
+                    os.remove(output_path)
+                    return size
+
+                size, elapsed, peak = _measure(streaming_export)
+                echo(f'{rows:>10,}  {"constant_memory":<18}{elapsed:>12.1f}{peak:>20.1f}{size / 1048576:>13.1f}')
+
+                if legacy:
+                    def legacy_export():
+                        session.expunge_all()
+                        return _legacy_excel_export(session)
+
+                    size, elapsed, peak = _measure(legacy_export)
+                    echo(f'{rows:>10,}  {"openpyxl + ORM":<18}{elapsed:>12.1f}{peak:>20.1f}{size / 1048576:>13.1f}')
+        finally:
+            engine.dispose()
+            os.remove(path)
+
+
+CONCURRENCY_START_DELAY = 3.0  # detik, memberi waktu proses spawn selesai import
+
+
+def _percentile(samples, percent):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _concurrency_operation(connection, role, rng, rows):
+    if role == 'baca':
+        # Pola dashboard: agregat satu bulan + 10 transaksi terbaru
+        offset = rng.randint(0, max(rows - 15_000, 0))
+        start = datetime(2020, 1, 1) + timedelta(minutes=offset * 3)
+        end = start + timedelta(days=30)
+        connection.execute(
+            'SELECT category_id, type, SUM(amount) FROM "transaction" '
+            'WHERE user_id = 1 AND date >= ? AND date < ? GROUP BY category_id, type',
+            (start.isoformat(' '), end.isoformat(' ')),
+        ).fetchall()
+        connection.execute(
+            'SELECT id, amount, description FROM "transaction" WHERE user_id = 1 '
+            'ORDER BY date DESC, id DESC LIMIT 10'
+        ).fetchall()
+    elif role == 'tulis':
+        amount = float(rng.randint(1, 500) * 1000)
+        wallet_id = rng.randint(1, len(WALLET_NAMES))
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.execute(
+                'INSERT INTO "transaction" (amount, description, date, type, category_id, wallet_id, user_id) '
+                "VALUES (?, 'bench', ?, 'expense', 3, ?, 1)",
+                (amount, datetime.now().isoformat(' '), wallet_id),
+            )
+            connection.execute('UPDATE wallet SET balance = balance - ? WHERE id = ?', (amount, wallet_id))
+            connection.execute('COMMIT')
+        except sqlite3.Error:
+            connection.execute('ROLLBACK')
+            raise
+    else:
+        # Pembaca panjang seperti ekspor: scan penuh dengan join
+        for _ in connection.execute(
+            'SELECT t.date, t.amount, t.description, c.name, w.name FROM "transaction" t '
+            'LEFT JOIN category c ON c.id = t.category_id LEFT JOIN wallet w ON w.id = t.wallet_id '
+            'WHERE t.user_id = 1'
+        ):
+            pass
+
+
+def _concurrency_worker(path, role, journal_mode, busy_timeout, mmap_size, rows, duration, start_at, seed):
+    connection = sqlite3.connect(path, timeout=busy_timeout / 1000, isolation_level=None)
+    apply_sqlite_pragmas(connection, journal_mode, busy_timeout, mmap_size)
+    rng = random.Random(seed)
+    latencies = []
+    errors = 0
+
+    time.sleep(max(0.0, start_at - time.time()))
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            _concurrency_operation(connection, role, rng, rows)
+        except sqlite3.OperationalError:
+            # "database is locked" setelah busy_timeout habis
+            errors += 1
+            continue
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    connection.close()
+    return role, latencies, errors
+
+
+def bench_concurrency(rows, modes, duration=10.0, readers=4, writers=2, exporters=1,
+                      busy_timeout=5000, mmap_size=0, echo=print):
+    """Beban baca/tulis campuran dari beberapa proses, seperti worker gunicorn"""
+    echo(f'Membuat dataset sintetis {rows:,} transaksi...')
+    engine, source_path = create_synthetic_database(rows)
+    engine.dispose()
+
+    roles = ['baca'] * readers + ['tulis'] * writers + ['ekspor'] * exporters
+    context = multiprocessing.get_context('spawn')
+    echo(f"{'mode':<8}{'peran':<8}{'operasi':>9}{'ops/dtk':>10}{'p50 (ms)':>10}{'p99 (ms)':>10}{'gagal':>7}")
+    try:
+        for journal_mode in modes:
+            path = f'{source_path}.{journal_mode.lower()}'
+            shutil.copyfile(source_path, path)
+            connection = sqlite3.connect(path)
+            apply_sqlite_pragmas(connection, journal_mode, busy_timeout, mmap_size)
+            connection.close()
+
+            start_at = time.time() + CONCURRENCY_START_DELAY
+            with context.Pool(len(roles)) as pool:
+                results = pool.starmap(_concurrency_worker, [
+                    (path, role, journal_mode, busy_timeout, mmap_size, rows, duration, start_at, seed)
+                    for seed, role in enumerate(roles)
+                ])
+
+            for role in ('baca', 'tulis', 'ekspor'):
+                latencies = [value for result_role, values, _ in results if result_role == role for value in values]
+                errors = sum(failed for result_role, _, failed in results if result_role == role)
+                if not latencies and not errors:
+                    continue
+                echo(
+                    f'{journal_mode:<8}{role:<8}{len(latencies):>9,}{len(latencies) / duration:>10.1f}'
+                    f'{_percentile(latencies, 50):>10.1f}{_percentile(latencies, 99):>10.1f}{errors:>7}'
+                )
+
+            for suffix in ('', '-wal', '-shm', '-journal'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+    finally:
+        os.remove(source_path)
+
+
+BALANCE_BENCH_OPENING = 1_000_000.0
+
+
+def _legacy_balance_write(session, wallet_id, delta):
+    """Pola lama: baca saldo ke Python, cek, lalu tulis kembali"""
+    wallet = session.get(Wallet, wallet_id)
+    if delta < 0 and wallet.balance + delta < 0:
+        return False
+    wallet.balance += delta
+    return True
+
+
+def _atomic_balance_write(session, wallet_id, delta):
+    return session.execute(
+        balance_update_statement(wallet_id, delta, guard=delta < 0),
+        execution_options={'synchronize_session': False},
+    ).first() is not None
+
+
+def _balance_worker(engine, write, operations, seed, results):
+    rng = random.Random(seed)
+    applied = rejected = errors = 0
+    for _ in range(operations):
+        delta = float(rng.randint(1, 100) * 1000) * rng.choice((1, -1))
+        with Session(engine) as session:
+            try:
+                if write(session, 1, delta):
+                    session.add(Transaction(
+                        amount=abs(delta),
+                        description='bench saldo',
+                        date=datetime.now(),
+                        type='income' if delta > 0 else 'expense',
+                        category_id=1 if delta > 0 else 3,
+                        wallet_id=1,
+                        user_id=1,
+                    ))
+                    session.commit()
+                    applied += 1
+                else:
+                    session.rollback()
+                    rejected += 1
+            except Exception:
+                session.rollback()
+                errors += 1
+    results.append((applied, rejected, errors))
+
+
+def bench_balance_updates(threads=8, operations=200, busy_timeout=5000, echo=print):
+    """Banyak thread menulis ke satu dompet bersama; bandingkan pola lama dengan UPDATE atomik.
+
+    Drift = saldo akhir dikurangi (saldo awal + jumlah bersih transaksi yang tersimpan);
+    selain nol berarti ada update yang hilang.
+    """
+    echo(f'{threads} thread x {operations} operasi pada satu dompet')
+    echo(f"{'pola':<8}{'sukses':>8}{'ditolak':>9}{'gagal':>7}{'tulis/dtk':>11}{'drift (Rp)':>14}")
+    for label, write in (('lama', _legacy_balance_write), ('atomik', _atomic_balance_write)):
+        engine, path = create_synthetic_database(0)
+        engine.dispose()
+        engine = create_engine(
+            f'sqlite:///{path}',
+            pool_size=threads,
+            connect_args={'check_same_thread': False, 'timeout': busy_timeout / 1000},
+        )
+        event.listen(
+            engine,
+            'connect',
+            lambda connection, _: apply_sqlite_pragmas(connection, 'WAL', busy_timeout, 0),
+        )
+        try:
+            with engine.begin() as connection:
+                connection.execute(
+                    db.update(Wallet).where(Wallet.id == 1).values(balance=BALANCE_BENCH_OPENING)
+                )
+
+            results = []
+            workers = [
+                threading.Thread(target=_balance_worker, args=(engine, write, operations, seed, results))
+                for seed in range(threads)
+            ]
+            started = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - started
+
+            with engine.connect() as connection:
+                balance = connection.execute(db.select(Wallet.balance).where(Wallet.id == 1)).scalar()
+                net = connection.execute(
+                    db.select(db.func.coalesce(db.func.sum(db.case(
+                        (Transaction.type == 'income', Transaction.amount), else_=-Transaction.amount,
+                    )), 0)).where(Transaction.wallet_id == 1)
+                ).scalar()
+            applied = sum(result[0] for result in results)
+            rejected = sum(result[1] for result in results)
+            errors = sum(result[2] for result in results)
+            drift = balance - (BALANCE_BENCH_OPENING + net)
+            echo(f'{label:<8}{applied:>8,}{rejected:>9,}{errors:>7,}{applied / elapsed:>11.1f}{drift:>14,.0f}')
+        finally:
+            engine.dispose()
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
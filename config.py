@@ -0,0 +1,89 @@
+"""Konfigurasi Flask bersama untuk app web (app.py) dan proses pool (worker.py)"""
+import os
+import sqlite3
+from datetime import timedelta
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from utils.sqlite_utils import apply_sqlite_pragmas
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+
+
+def resolve_database_path():
+    db_path = os.environ.get('DB_PATH', 'dev.db').strip()
+    if not db_path:
+        db_path = 'dev.db'
+
+    if not os.path.isabs(db_path):
+        db_path = os.path.join(BASE_DIR, db_path)
+
+    return os.path.abspath(db_path)
+
+
+def configure_app(app):
+    """Isi app.config dari environment; kembalikan path file database"""
+    # gunakan environment variable untuk secret key agar tidak tersimpan di kode
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'kunci-rahasia-ubah-sekarang')
+    # durasi cookie untuk fitur "ingat saya" (opsional, default 365 hari)
+    app.config['REMEMBER_COOKIE_DURATION'] = timedelta(days=30)
+
+    db_path = resolve_database_path()
+
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{db_path.replace(os.sep, '/')}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['UPLOAD_FOLDER'] = os.path.join(app.root_path, 'static', 'uploads')
+    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+    # Cache dibagi semua worker gunicorn lewat file SQLite di samping database;
+    # set CACHE_TYPE=RedisCache dan CACHE_REDIS_URL untuk memakai server Redis
+    app.config['CACHE_TYPE'] = os.environ.get('CACHE_TYPE', 'utils.sqlite_cache.SQLiteCache')
+    app.config['CACHE_DEFAULT_TIMEOUT'] = 60
+    app.config['CACHE_SQLITE_PATH'] = os.environ.get('CACHE_SQLITE_PATH') or f'{os.path.splitext(db_path)[0]}.cache.db'
+    app.config['CACHE_THRESHOLD'] = int(os.environ.get('CACHE_THRESHOLD', 2000))
+    app.config['CACHE_MAX_BYTES'] = int(os.environ.get('CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    app.config['CACHE_WARM_ON_BOOT'] = os.environ.get('CACHE_WARM_ON_BOOT', '').lower() in ('1', 'true', 'yes')
+    app.config['CACHE_WARM_USERS'] = int(os.environ.get('CACHE_WARM_USERS', 50))
+    # Counter cache/loader/GET bersyarat per proses memuat aktivitas semua user; hanya untuk debug
+    app.config['CACHE_STATS_ENABLED'] = os.environ.get('CACHE_STATS_ENABLED', '').lower() in ('1', 'true', 'yes')
+    if os.environ.get('CACHE_REDIS_URL'):
+        app.config['CACHE_REDIS_URL'] = os.environ['CACHE_REDIS_URL']
+    # Mode journal SQLite: WAL membiarkan pembaca jalan bersamaan dengan satu penulis
+    app.config['SQLITE_JOURNAL_MODE'] = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL').upper()
+    app.config['SQLITE_BUSY_TIMEOUT'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000))  # ms
+    app.config['SQLITE_MMAP_SIZE'] = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    app.config['SQLITE_WAL_AUTOCHECKPOINT'] = int(os.environ.get('SQLITE_WAL_AUTOCHECKPOINT', 1000))  # halaman
+    app.config['SQLITE_CHECKPOINT_INTERVAL'] = int(os.environ.get('SQLITE_CHECKPOINT_INTERVAL', 300))  # detik, 0 = mati
+    app.config['SQLITE_WAL_TRUNCATE_BYTES'] = int(os.environ.get('SQLITE_WAL_TRUNCATE_BYTES', 64 * 1024 * 1024))
+    # Kompresi response dinamis; aset statis memakai file .gz/.br hasil `flask build-assets`
+    app.config['COMPRESS_MIN_SIZE'] = int(os.environ.get('COMPRESS_MIN_SIZE', 500))  # byte
+    app.config['COMPRESS_GZIP_LEVEL'] = int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))
+    app.config['COMPRESS_BROTLI_QUALITY'] = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 4))
+    app.config['STATIC_IMMUTABLE_MAX_AGE'] = 365 * 24 * 3600
+    # Umur maksimum salinan API yang boleh dipakai service worker sambil revalidasi (detik)
+    app.config['API_STALE_WHILE_REVALIDATE'] = int(os.environ.get('API_STALE_WHILE_REVALIDATE', 24 * 3600))
+    app.config['EXPORT_DIR'] = os.path.join(app.root_path, 'instance', 'exports')
+    app.config['EXPORT_JOB_WORKERS'] = int(os.environ.get('EXPORT_JOB_WORKERS', 2))
+    app.config['EXPORT_JOB_EXECUTOR'] = os.environ.get('EXPORT_JOB_EXECUTOR', 'process')  # 'process' atau 'inline'
+    app.config['EXPORT_JOB_TTL'] = timedelta(hours=1)
+
+    # Upload mentah menunggu diproses worker; di luar static agar tidak bisa diakses langsung
+    app.config['PROFILE_UPLOAD_STAGING'] = os.path.join(app.root_path, 'instance', 'uploads', 'incoming')
+    return db_path
+
+
+def register_sqlite_pragmas(app):
+    """PRAGMA (WAL, busy timeout, dll.) untuk setiap koneksi SQLite baru"""
+
+    @event.listens_for(Engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, connection_record):
+        if not app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite:///') or not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+
+        apply_sqlite_pragmas(
+            dbapi_connection,
+            journal_mode=app.config['SQLITE_JOURNAL_MODE'],
+            busy_timeout=app.config['SQLITE_BUSY_TIMEOUT'],
+            mmap_size=app.config['SQLITE_MMAP_SIZE'],
+            wal_autocheckpoint=app.config['SQLITE_WAL_AUTOCHECKPOINT'],
+        )
@@ -12,6 +12,7 @@ class User(UserMixin, db.Model):
     username = db.Column(db.String(80), unique=True, nullable=False)
     password = db.Column(db.String(255), nullable=False)  # Increased length for hash storage
     photo = db.Column(db.String(200), nullable=True)  # Path to profile photo
+    photo_manifest = db.Column(db.Text, nullable=True)  # JSON varian foto profil (lihat image_service)
     categories = db.relationship('Category', backref='user', lazy=True, cascade='all, delete-orphan')
     wallets = db.relationship('Wallet', backref='user', lazy=True, cascade='all, delete-orphan')
     transactions = db.relationship('Transaction', backref='user', lazy=True, cascade='all, delete-orphan')
@@ -52,12 +53,15 @@ class Transaction(db.Model):
     category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=False)
     wallet_id = db.Column(db.Integer, db.ForeignKey('wallet.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    client_id = db.Column(db.String(64))  # id buatan klien (outbox offline) agar kirim ulang tidak dobel
     category = db.relationship('Category')
 
     __table_args__ = (
-        db.Index('idx_trans_user_date', 'user_id', 'date'),
+        db.Index('idx_trans_user_date_id', 'user_id', 'date', 'id'),
+        db.Index('idx_trans_user_client', 'user_id', 'client_id', unique=True),
         db.Index('idx_trans_user_type', 'user_id', 'type'),
-        db.Index('idx_trans_user_cat', 'user_id', 'category_id'),
+        db.Index('idx_trans_user_cat_date', 'user_id', 'category_id', 'date'),
+        db.Index('idx_trans_wallet_date', 'wallet_id', 'date'),
     )
 
 class Budget(db.Model):
@@ -68,7 +72,56 @@ class Budget(db.Model):
     amount = db.Column(db.Float)
     category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    # Total transaksi kategori ini dalam periode anggaran, diperbarui saat transaksi ditulis
+    spent = db.Column(db.Float, nullable=False, default=0.0)
+    received = db.Column(db.Float, nullable=False, default=0.0)
     category = db.relationship('Category')
+    alerts = db.relationship('BudgetAlert', backref='budget', lazy=True, cascade='all, delete-orphan')
+
+class BudgetAlert(db.Model):
+    """Event saat pengeluaran anggaran melewati ambang (80% / 100%)"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    budget_id = db.Column(db.Integer, db.ForeignKey('budget.id'), nullable=False)
+    threshold = db.Column(db.Integer, nullable=False)  # persen
+    spent = db.Column(db.Float, nullable=False)
+    amount = db.Column(db.Float, nullable=False)
+    is_read = db.Column(db.Boolean, nullable=False, default=False)
+    created_at = db.Column(db.DateTime, default=lambda: now_wib().replace(tzinfo=None))
+
+    __table_args__ = (
+        db.Index('idx_budget_alert_user_id', 'user_id', 'id'),
+    )
+
+class MonthlyRollup(db.Model):
+    """Agregat bulanan per (user, tahun, bulan, kategori, tipe) yang diperbarui saat transaksi ditulis"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    month = db.Column(db.Integer, nullable=False)
+    category_id = db.Column(db.Integer, nullable=False)
+    type = db.Column(db.String(10), nullable=False)  # 'income' atau 'expense'
+    total = db.Column(db.Float, nullable=False, default=0.0)
+    tx_count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'year', 'month', 'category_id', 'type', name='uq_rollup_user_period_cat_type'),
+    )
+
+class ExportJob(db.Model):
+    """Job pembuatan laporan (PDF/Excel) yang dikerjakan di luar request"""
+    id = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    kind = db.Column(db.String(20), nullable=False)  # 'pdf', 'budget_pdf' atau 'excel'
+    params = db.Column(db.Text, nullable=False, default='{}')  # JSON
+    status = db.Column(db.String(10), nullable=False, default='queued')  # queued, running, done, failed
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    file_path = db.Column(db.String(255))
+    download_name = db.Column(db.String(200))
+    error = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, default=lambda: now_wib().replace(tzinfo=None))
+    finished_at = db.Column(db.DateTime)
+    expires_at = db.Column(db.DateTime, index=True)
 
 class SharedWallet(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -0,0 +1,224 @@
+from datetime import date
+
+from dateutil.relativedelta import relativedelta
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+
+from models import db, Budget, BudgetAlert, Transaction
+from utils.datetime_utils import now_wib
+
+
+# SQLite membatasi jumlah SELECT dalam satu compound query (default 500)
+BUDGET_WINDOW_CHUNK = 400
+BUDGET_ALERT_THRESHOLDS = (80, 100)
+
+def get_budget_period(budget):
+    start = budget.start_date
+    if not start:
+        if budget.year and budget.month:
+            start = date(int(budget.year), int(budget.month), 1)
+        else:
+            start = now_wib().date()
+    end = start + relativedelta(months=1)
+    return start, end
+
+
+def _budget_windows(budgets):
+    # SQLite tidak mendukung VALUES ber-alias kolom, jadi jendela dirangkai dengan UNION ALL
+    rows = []
+    for budget in budgets:
+        start_date, end_date = get_budget_period(budget)
+        rows.append(db.select(
+            db.literal(budget.id, db.Integer).label('budget_id'),
+            db.literal(budget.category_id, db.Integer).label('category_id'),
+            db.literal(start_date, db.Date).label('start_date'),
+            db.literal(end_date, db.Date).label('end_date'),
+        ))
+    return db.union_all(*rows).cte('budget_window')
+
+
+def budget_totals_query(user_id, budgets):
+    """Satu query ber-GROUP BY untuk total pemasukan/pengeluaran semua anggaran"""
+    window = _budget_windows(budgets)
+    return db.session.query(
+        window.c.budget_id,
+        db.func.coalesce(db.func.sum(db.case((Transaction.type == 'expense', Transaction.amount), else_=0)), 0),
+        db.func.coalesce(db.func.sum(db.case((Transaction.type == 'income', Transaction.amount), else_=0)), 0),
+    ).select_from(window).join(
+        Transaction,
+        db.and_(
+            Transaction.user_id == user_id,
+            Transaction.category_id == window.c.category_id,
+            Transaction.date >= window.c.start_date,
+            Transaction.date < window.c.end_date,
+        ),
+    ).group_by(window.c.budget_id)
+
+
+def compute_budget_totals(user_id, budgets):
+    """Hitung ulang (pengeluaran, pemasukan) per budget.id langsung dari transaksi"""
+    totals = {budget.id: (0.0, 0.0) for budget in budgets}
+    for offset in range(0, len(budgets), BUDGET_WINDOW_CHUNK):
+        chunk = budgets[offset:offset + BUDGET_WINDOW_CHUNK]
+        for budget_id, expense, income in budget_totals_query(user_id, chunk):
+            totals[budget_id] = (float(expense), float(income))
+    return totals
+
+
+def get_budget_summaries(user_id, budgets):
+    """Ringkasan terpakai/pemasukan/sisa dari counter anggaran; kembalikan dict per budget.id"""
+    summaries = {}
+    for budget in budgets:
+        start_date, end_date = get_budget_period(budget)
+        total_expense = float(budget.spent or 0)
+        total_income = float(budget.received or 0)
+        summaries[budget.id] = {
+            'start_date': start_date,
+            'end_date': end_date,
+            'total_expense': total_expense,
+            'total_income': total_income,
+            'remaining': float(budget.amount) - total_expense,
+            'net': total_income - total_expense,
+        }
+    return summaries
+
+
+def get_budget_summary(user_id, budget):
+    return get_budget_summaries(user_id, [budget])[budget.id]
+
+
+def get_budget_transactions(user_id, budget, newest_first=True):
+    start_date, end_date = get_budget_period(budget)
+    order = Transaction.date.desc() if newest_first else Transaction.date.asc()
+    return Transaction.query.options(joinedload(Transaction.wallet)).filter(
+        Transaction.user_id == user_id,
+        Transaction.category_id == budget.category_id,
+        Transaction.date >= start_date,
+        Transaction.date < end_date,
+    ).order_by(order).all()
+
+
+def get_user_budgets(user_id):
+    return Budget.query.options(joinedload(Budget.category)).filter_by(user_id=user_id) \
+        .order_by(Budget.start_date.desc(), Budget.id.desc()).all()
+
+
+def _record_alerts(budget, old_spent, new_spent):
+    amount = float(budget.amount or 0)
+    if amount <= 0:
+        return
+    for threshold in BUDGET_ALERT_THRESHOLDS:
+        limit = amount * threshold / 100
+        if old_spent < limit <= new_spent:
+            db.session.add(BudgetAlert(
+                user_id=budget.user_id,
+                budget_id=budget.id,
+                threshold=threshold,
+                spent=new_spent,
+                amount=amount,
+            ))
+
+
+def budget_usage_change(transaction, sign=1):
+    """(kategori, tanggal, tipe, jumlah) transaksi untuk apply_budget_changes; sign=-1 untuk membatalkan"""
+    return (transaction.category_id, transaction.date, transaction.type, sign * float(transaction.amount or 0))
+
+
+def apply_budget_changes(user_id, changes):
+    """Terapkan beberapa delta transaksi sekaligus ke anggaran yang periodenya mencakup tanggalnya.
+
+    Delta dijumlahkan dulu per anggaran lalu ditulis dengan satu UPDATE atomik per
+    anggaran, jadi edit yang membatalkan lalu mencatat ulang transaksi tidak sempat
+    turun di bawah ambang dan memicu alert yang sama dua kali.
+    """
+    changes = [change for change in changes if change[1] is not None and change[3]]
+    if not changes:
+        return
+
+    deltas = {}
+    budgets = Budget.query.filter(
+        Budget.user_id == user_id,
+        Budget.category_id.in_({category_id for category_id, _, _, _ in changes}),
+    ).all()
+    for budget in budgets:
+        start_date, end_date = get_budget_period(budget)
+        for category_id, tx_date, transaction_type, amount in changes:
+            day = tx_date.date() if hasattr(tx_date, 'date') else tx_date
+            if category_id != budget.category_id or not start_date <= day < end_date:
+                continue
+            spent, received = deltas.get(budget, (0.0, 0.0))
+            if transaction_type == 'expense':
+                spent += amount
+            elif transaction_type == 'income':
+                received += amount
+            deltas[budget] = (spent, received)
+
+    for budget, (spent_delta, received_delta) in deltas.items():
+        if not spent_delta and not received_delta:
+            continue
+        new_spent, new_received = db.session.execute(
+            db.update(Budget).where(Budget.id == budget.id).values(
+                spent=Budget.spent + spent_delta,
+                received=Budget.received + received_delta,
+            ).returning(Budget.spent, Budget.received),
+            execution_options={'synchronize_session': False},
+        ).one()
+        set_committed_value(budget, 'spent', new_spent)
+        set_committed_value(budget, 'received', new_received)
+        _record_alerts(budget, float(new_spent) - spent_delta, float(new_spent))
+
+
+def apply_budget_delta(user_id, category_id, tx_date, transaction_type, amount):
+    """Terapkan delta satu transaksi ke semua anggaran yang periodenya mencakup tanggal transaksi"""
+    apply_budget_changes(user_id, [(category_id, tx_date, transaction_type, amount)])
+
+
+def record_budget_usage(transaction):
+    apply_budget_changes(transaction.user_id, [budget_usage_change(transaction)])
+
+
+def unrecord_budget_usage(transaction):
+    apply_budget_changes(transaction.user_id, [budget_usage_change(transaction, -1)])
+
+
+def refresh_budget_counters(user_id, budgets, alerts=False):
+    totals = compute_budget_totals(user_id, budgets)
+    for budget in budgets:
+        old_spent = float(budget.spent or 0)
+        budget.spent, budget.received = totals[budget.id]
+        if alerts:
+            _record_alerts(budget, old_spent, budget.spent)
+
+
+def rebuild_budget_counters(user_id=None):
+    """Hitung ulang counter semua anggaran (per user) dari transaksi; kembalikan jumlah anggaran"""
+    query = Budget.query
+    if user_id is not None:
+        query = query.filter_by(user_id=user_id)
+
+    budgets_by_user = {}
+    for budget in query:
+        budgets_by_user.setdefault(budget.user_id, []).append(budget)
+
+    for owner_id, budgets in budgets_by_user.items():
+        refresh_budget_counters(owner_id, budgets)
+    db.session.commit()
+    return sum(len(budgets) for budgets in budgets_by_user.values())
+
+
+def get_unread_alerts(user_id, after_id=0):
+    return BudgetAlert.query.options(joinedload(BudgetAlert.budget).joinedload(Budget.category)).filter(
+        BudgetAlert.user_id == user_id,
+        BudgetAlert.id > after_id,
+        BudgetAlert.is_read.is_(False),
+    ).order_by(BudgetAlert.id).all()
+
+
+def mark_alerts_read(user_id, up_to_id):
+    updated = BudgetAlert.query.filter(
+        BudgetAlert.user_id == user_id,
+        BudgetAlert.id <= up_to_id,
+        BudgetAlert.is_read.is_(False),
+    ).update({'is_read': True}, synchronize_session=False)
+    db.session.commit()
+    return updated
@@ -0,0 +1,98 @@
+from datetime import datetime
+
+from models import db, Transaction, Wallet
+from utils.datetime_utils import BUCKET_GRANULARITIES, BUCKET_LABEL_FORMATS, iter_buckets
+from utils.series_utils import bucket_expression, lttb_indices
+
+
+MAX_CASHFLOW_BUCKETS = 5000
+
+
+def _signed_amount():
+    return db.case((Transaction.type == 'income', Transaction.amount), else_=-Transaction.amount)
+
+
+def _owned_wallet_ids(user_id):
+    return db.select(Wallet.id).where(Wallet.user_id == user_id).scalar_subquery()
+
+
+def get_opening_balance(user_id, start):
+    """Saldo total dompet milik user tepat sebelum `start`.
+
+    Dihitung mundur dari saldo sekarang dikurangi arus bersih sejak `start`,
+    sehingga saldo awal dompet dan transfer ikut terhitung. Transaksi dipilih
+    per dompet (termasuk catatan user lain di dompet yang dibagikan), bukan per
+    pencatat, agar sama dengan saldo yang dijumlahkan.
+    """
+    current_balance = db.session.query(db.func.coalesce(db.func.sum(Wallet.balance), 0)) \
+        .filter(Wallet.user_id == user_id).scalar()
+    net_since_start = db.session.query(db.func.coalesce(db.func.sum(_signed_amount()), 0)).filter(
+        Transaction.wallet_id.in_(_owned_wallet_ids(user_id)),
+        Transaction.date >= start,
+    ).scalar()
+    return float(current_balance) - float(net_since_start)
+
+
+def cashflow_query(user_id, start, end, granularity):
+    """Arus bersih per bucket beserta running total (window function) dalam satu query"""
+    bucket = bucket_expression(Transaction.date, granularity).label('bucket')
+    per_bucket = db.session.query(
+        bucket,
+        db.func.sum(_signed_amount()).label('net'),
+    ).filter(
+        Transaction.wallet_id.in_(_owned_wallet_ids(user_id)),
+        Transaction.date >= start,
+        Transaction.date < end,
+    ).group_by(bucket).subquery()
+
+    running = db.func.sum(per_bucket.c.net).over(order_by=per_bucket.c.bucket)
+    return db.session.query(per_bucket.c.bucket, per_bucket.c.net, running.label('running')) \
+        .order_by(per_bucket.c.bucket)
+
+
+def get_cashflow_series(user_id, start, end, granularity='day', max_points=None):
+    """Deret saldo [start, end) per bucket, diisi nol pada bucket kosong.
+
+    Jika `max_points` diberikan dan jumlah bucket melebihinya, deret
+    diperkecil dengan LTTB agar bentuk grafik saldo tetap terjaga.
+    """
+    if granularity not in BUCKET_GRANULARITIES:
+        raise ValueError(f"Granularitas harus salah satu dari {', '.join(BUCKET_GRANULARITIES)}")
+    if start >= end:
+        raise ValueError('Tanggal awal harus sebelum tanggal akhir')
+
+    buckets = list(iter_buckets(start, end, granularity))
+    if len(buckets) > MAX_CASHFLOW_BUCKETS:
+        raise ValueError('Rentang terlalu panjang untuk granularitas ini')
+
+    opening_balance = get_opening_balance(user_id, start)
+    rows = {
+        datetime.strptime(bucket, '%Y-%m-%d').date(): (float(net), float(running))
+        for bucket, net, running in cashflow_query(user_id, start, end, granularity)
+    }
+
+    dates, nets, balances = [], [], []
+    running_total = 0.0
+    for bucket in buckets:
+        net, running = rows.get(bucket, (0.0, running_total))
+        running_total = running
+        dates.append(bucket)
+        nets.append(net)
+        balances.append(opening_balance + running_total)
+
+    if max_points and len(balances) > max_points:
+        keep = lttb_indices(balances, max_points)
+        dates = [dates[index] for index in keep]
+        nets = [nets[index] for index in keep]
+        balances = [balances[index] for index in keep]
+
+    label_format = BUCKET_LABEL_FORMATS[granularity]
+    return {
+        'granularity': granularity,
+        'opening_balance': opening_balance,
+        'closing_balance': opening_balance + running_total,
+        'labels': [bucket.strftime(label_format) for bucket in dates],
+        'dates': [bucket.isoformat() for bucket in dates],
+        'net': nets,
+        'balance': balances,
+    }
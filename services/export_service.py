@@ -0,0 +1,119 @@
+import csv
+import os
+import tempfile
+import zlib
+from io import StringIO
+
+import xlsxwriter
+
+from models import db, Category, Transaction, Wallet
+from services.transaction_service import apply_transaction_filters
+from utils.datetime_utils import to_wib
+
+
+BACKUP_HEADER = ['Date', 'Amount', 'Description', 'Type', 'Category', 'Wallet']
+EXPORT_YIELD_PER = 1000
+CSV_FLUSH_ROWS = 500
+EXCEL_HEADERS = ['Tanggal', 'Deskripsi', 'Jumlah', 'Tipe', 'Kategori', 'Dompet']
+EXCEL_COLUMN_WIDTHS = [18, 25, 12, 12, 15, 15]
+
+
+def transaction_projection(user_id, filters=None, session=None):
+    """Query baris ringan (tanpa hydrate ORM) beserta nama kategori dan dompet"""
+    session = session or db.session
+    query = session.query(
+        Transaction.date,
+        Transaction.amount,
+        Transaction.description,
+        Transaction.type,
+        Category.name.label('category_name'),
+        Wallet.name.label('wallet_name'),
+    ).outerjoin(
+        Category, Category.id == Transaction.category_id,
+    ).outerjoin(
+        Wallet, Wallet.id == Transaction.wallet_id,
+    )
+    return apply_transaction_filters(query, user_id, filters or {}) \
+        .execution_options(yield_per=EXPORT_YIELD_PER)
+
+
+def _iter_csv_chunks(rows):
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(BACKUP_HEADER)
+
+    for index, row in enumerate(rows, start=1):
+        writer.writerow([
+            to_wib(row.date).strftime('%Y-%m-%d %H:%M:%S') if row.date else '',
+            row.amount,
+            row.description,
+            row.type,
+            row.category_name or '',
+            row.wallet_name or '',
+        ])
+        if index % CSV_FLUSH_ROWS == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate(0)
+
+    remaining = buffer.getvalue()
+    if remaining:
+        yield remaining.encode('utf-8')
+
+
+def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def iter_backup_csv(user_id, compress=False):
+    rows = transaction_projection(user_id).order_by(Transaction.date, Transaction.id)
+    chunks = _iter_csv_chunks(rows)
+    return _gzip_chunks(chunks) if compress else chunks
+
+
+def write_transactions_xlsx(rows, path=None):
+    """Tulis baris ke file .xlsx (default file sementara) dengan mode constant_memory; kembalikan path-nya"""
+    if path is None:
+        handle, path = tempfile.mkstemp(prefix='finance-export-', suffix='.xlsx')
+        os.close(handle)
+
+    try:
+        workbook = xlsxwriter.Workbook(path, {
+            'constant_memory': True,
+            'strings_to_formulas': False,
+            'strings_to_urls': False,
+        })
+        worksheet = workbook.add_worksheet('Transaksi')
+        header_format = workbook.add_format({
+            'bold': True,
+            'font_color': '#FFFFFF',
+            'bg_color': '#4472C4',
+            'align': 'center',
+            'valign': 'vcenter',
+        })
+
+        for col_num, width in enumerate(EXCEL_COLUMN_WIDTHS):
+            worksheet.set_column(col_num, col_num, width)
+        worksheet.write_row(0, 0, EXCEL_HEADERS, header_format)
+
+        for row_num, row in enumerate(rows, start=1):
+            worksheet.write_row(row_num, 0, [
+                to_wib(row.date).strftime('%Y-%m-%d %H:%M') if row.date else '',
+                row.description,
+                row.amount,
+                'Pemasukan' if row.type == 'income' else 'Pengeluaran',
+                row.category_name or '',
+                row.wallet_name or '',
+            ])
+
+        workbook.close()
+    except Exception:
+        os.remove(path)
+        raise
+
+    return path
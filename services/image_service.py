@@ -0,0 +1,197 @@
+import hashlib
+import io
+import json
+import os
+import uuid
+
+from flask import current_app, url_for
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from models import db, User
+from utils.cache_utils import bump_data_version
+
+
+MAX_PROFILE_IMAGE_PIXELS = 20_000_000
+PROFILE_JPEG_QUALITY = 78
+PROFILE_WEBP_QUALITY = 75
+# Sisi terpanjang tiap varian; gambar kecil tidak diperbesar
+PROFILE_IMAGE_VARIANTS = {'avatar': 96, 'thumbnail': 240, 'full': 720}
+PROFILE_IMAGE_DIR = 'uploads/profile'
+
+
+def image_has_transparency(image):
+    if image.mode in ('RGBA', 'LA'):
+        alpha = image.getchannel('A')
+        return alpha.getextrema()[0] < 255
+    if image.mode == 'P':
+        return 'transparency' in image.info
+    return False
+
+
+def stage_profile_upload(file_storage):
+    """Cek cepat di request (header saja, tanpa decode piksel) lalu simpan file mentah untuk worker"""
+    try:
+        file_storage.stream.seek(0)
+        image = Image.open(file_storage.stream)
+        image.verify()
+    except (UnidentifiedImageError, OSError):
+        raise ValueError('File bukan gambar yang valid')
+
+    width, height = image.size
+    if width <= 0 or height <= 0:
+        raise ValueError('Ukuran gambar tidak valid')
+    if width * height > MAX_PROFILE_IMAGE_PIXELS:
+        raise ValueError('Resolusi gambar terlalu besar')
+
+    staging_dir = current_app.config['PROFILE_UPLOAD_STAGING']
+    os.makedirs(staging_dir, exist_ok=True)
+    path = os.path.join(staging_dir, uuid.uuid4().hex)
+    file_storage.stream.seek(0)
+    file_storage.save(path)
+    return path
+
+
+def _encode(image, image_format, **options):
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, **options)
+    return buffer.getvalue()
+
+
+def _write_content_addressed(directory, variant, data, extension):
+    filename = f'{variant}.{hashlib.sha256(data).hexdigest()[:16]}.{extension}'
+    path = os.path.join(directory, filename)
+    if not os.path.exists(path):
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'wb') as handle:
+            handle.write(data)
+        os.replace(temp_path, path)
+    return filename
+
+
+def render_profile_variants(source_path, user_id):
+    """Decode sekali, lalu tiap ukuran di-encode ke JPEG/PNG dan WebP; kembalikan manifest"""
+    try:
+        with Image.open(source_path) as opened:
+            image = ImageOps.exif_transpose(opened)
+            image.load()
+    except Exception:
+        raise ValueError('Gagal membaca data gambar')
+
+    keep_png = image_has_transparency(image)
+    image = image.convert('RGBA' if keep_png else 'RGB')
+
+    relative_dir = f'{PROFILE_IMAGE_DIR}/{user_id}'
+    directory = os.path.join(current_app.static_folder, relative_dir)
+    os.makedirs(directory, exist_ok=True)
+
+    manifest = {}
+    for variant, size in PROFILE_IMAGE_VARIANTS.items():
+        resized = image.copy()
+        if max(resized.size) > size:
+            resized.thumbnail((size, size), Image.Resampling.LANCZOS)
+
+        if keep_png:
+            fallback = _encode(resized, 'PNG', optimize=True)
+            fallback_name = _write_content_addressed(directory, variant, fallback, 'png')
+        else:
+            fallback = _encode(
+                resized,
+                'JPEG',
+                quality=PROFILE_JPEG_QUALITY,
+                optimize=True,
+                progressive=True,
+                subsampling='4:2:0',
+            )
+            fallback_name = _write_content_addressed(directory, variant, fallback, 'jpg')
+        webp = _encode(resized, 'WEBP', quality=PROFILE_WEBP_QUALITY, method=4)
+
+        manifest[variant] = {
+            'width': resized.width,
+            'height': resized.height,
+            'src': f'{relative_dir}/{fallback_name}',
+            'webp': f'{relative_dir}/{_write_content_addressed(directory, variant, webp, "webp")}',
+        }
+    return manifest
+
+
+def _manifest_files(manifest):
+    return {path for entry in manifest.values() for path in (entry['src'], entry['webp'])}
+
+
+def _remove_static_files(relative_paths):
+    static_root = os.path.abspath(current_app.static_folder)
+    for relative_path in relative_paths:
+        path = os.path.abspath(os.path.join(static_root, relative_path))
+        if path.startswith(static_root + os.sep) and os.path.exists(path):
+            os.remove(path)
+
+
+def process_profile_upload(user_id, source_path):
+    """Dijalankan di worker pool: buat semua varian, simpan manifest, hapus file lama"""
+    try:
+        manifest = render_profile_variants(source_path, user_id)
+    except Exception:
+        current_app.logger.error('Profile image processing failed: user=%s', user_id, exc_info=True)
+        return None
+    finally:
+        if os.path.exists(source_path):
+            os.remove(source_path)
+
+    user = db.session.get(User, user_id)
+    if user is None:
+        _remove_static_files(_manifest_files(manifest))
+        return None
+
+    stale = set()
+    if user.photo_manifest:
+        stale |= _manifest_files(json.loads(user.photo_manifest))
+    if user.photo:
+        stale.add(user.photo)
+
+    user.photo = manifest['full']['src']
+    user.photo_manifest = json.dumps(manifest, sort_keys=True)
+    db.session.commit()
+    _remove_static_files(stale - _manifest_files(manifest))
+    bump_data_version(user_id)
+    return manifest
+
+
+def get_profile_photo_urls(user_id):
+    """URL varian foto profil dari manifest di DB (tanpa cek file); None bila belum ada foto.
+
+    Foto lama tanpa manifest dipakai apa adanya untuk semua varian.
+    """
+    row = db.session.query(User.photo, User.photo_manifest).filter(User.id == user_id).first()
+    if row is None:
+        return None
+
+    photo, photo_manifest = row
+    if photo_manifest:
+        return {
+            variant: {
+                'width': entry['width'],
+                'height': entry['height'],
+                'src': url_for('static', filename=entry['src']),
+                'webp': url_for('static', filename=entry['webp']),
+            }
+            for variant, entry in json.loads(photo_manifest).items()
+        }
+    if photo:
+        normalized = photo.replace('\\', '/').lstrip('/')
+        if normalized.startswith('static/'):
+            normalized = normalized[len('static/'):]
+        url = url_for('static', filename=normalized)
+        return {variant: {'src': url, 'webp': None} for variant in PROFILE_IMAGE_VARIANTS}
+    return None
+
+
+def photo_srcset(photo, key='src'):
+    """Nilai srcset "url lebarw" dari varian yang lebarnya diketahui.
+
+    Gambar kecil menghasilkan beberapa varian selebar sama; cukup satu per lebar.
+    """
+    by_width = {}
+    for entry in photo.values():
+        if entry.get(key) and entry.get('width'):
+            by_width.setdefault(entry['width'], entry[key])
+    return ', '.join(f'{url} {width}w' for width, url in sorted(by_width.items()))
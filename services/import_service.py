@@ -0,0 +1,152 @@
+import csv
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from models import db, Budget, Category, Transaction, Wallet
+from services.budget_service import refresh_budget_counters
+from services.rollup_service import apply_rollup_delta
+from services.transaction_service import normalize_wib_storage, parse_positive_amount
+from utils.cache_utils import bump_data_version
+
+
+IMPORT_CHUNK_SIZE = 2000
+IMPORT_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def _parse_row(row, row_num):
+    if len(row) != 6:
+        raise ValueError(f'Baris {row_num}: Format tidak valid')
+
+    date_str, amount_str, description, type_, category_name, wallet_name = row
+
+    try:
+        date = normalize_wib_storage(datetime.strptime(date_str, IMPORT_DATE_FORMAT))
+    except ValueError:
+        raise ValueError(f'Baris {row_num}: Format tanggal tidak valid')
+
+    try:
+        amount = parse_positive_amount(amount_str)
+    except ValueError:
+        raise ValueError(f'Baris {row_num}: Jumlah tidak valid')
+
+    if type_ not in ['income', 'expense']:
+        raise ValueError(f'Baris {row_num}: Tipe harus income atau expense')
+
+    return date, amount, description, type_, category_name, wallet_name
+
+
+def _resolve_category_id(user_id, category_ids, name, category_type, dry_run):
+    key = (name, category_type)
+    if key not in category_ids:
+        if dry_run:
+            category_ids[key] = None
+        else:
+            category = Category(name=name, type=category_type, user_id=user_id)
+            db.session.add(category)
+            db.session.flush()
+            category_ids[key] = category.id
+    return category_ids[key]
+
+
+def _resolve_wallet_id(user_id, wallet_ids, name, dry_run):
+    if name not in wallet_ids:
+        if dry_run:
+            wallet_ids[name] = None
+        else:
+            wallet = Wallet(name=name, type='cash', balance=0.0, user_id=user_id)
+            db.session.add(wallet)
+            db.session.flush()
+            wallet_ids[name] = wallet.id
+    return wallet_ids[name]
+
+
+def import_transactions_csv(user_id, stream, dry_run=False, chunk_size=IMPORT_CHUNK_SIZE):
+    """Impor CSV format backup secara massal.
+
+    Nama kategori/dompet dimuat sekali ke map, transaksi di-insert per chunk
+    dengan executemany, dan saldo dompet serta rollup diperbarui sekali per
+    kunci di akhir. Dengan dry_run=True baris hanya divalidasi.
+    """
+    started = time.perf_counter()
+
+    # Nama kembar: pakai id terkecil, sama seperti query .first() pada impor per baris
+    category_ids = {}
+    for category_id, name, category_type in db.session.query(Category.id, Category.name, Category.type) \
+            .filter(Category.user_id == user_id).order_by(Category.id):
+        category_ids.setdefault((name, category_type), category_id)
+    wallet_ids = {}
+    for wallet_id, name in db.session.query(Wallet.id, Wallet.name).filter(Wallet.user_id == user_id).order_by(Wallet.id):
+        wallet_ids.setdefault(name, wallet_id)
+
+    wallet_deltas = defaultdict(float)
+    rollup_deltas = defaultdict(lambda: [0.0, 0])
+    errors = []
+    imported_count = 0
+    batch = []
+
+    def flush_batch():
+        if batch and not dry_run:
+            db.session.execute(Transaction.__table__.insert(), batch)
+        batch.clear()
+
+    csv_reader = csv.reader(stream)
+    next(csv_reader, None)  # Skip header
+
+    try:
+        for row_num, row in enumerate(csv_reader, start=2):
+            try:
+                date, amount, description, type_, category_name, wallet_name = _parse_row(row, row_num)
+                category_id = _resolve_category_id(user_id, category_ids, category_name, type_, dry_run)
+                wallet_id = _resolve_wallet_id(user_id, wallet_ids, wallet_name, dry_run)
+            except ValueError as e:
+                errors.append(str(e))
+                continue
+
+            batch.append({
+                'amount': amount,
+                'description': description,
+                'date': date,
+                'type': type_,
+                'category_id': category_id,
+                'wallet_id': wallet_id,
+                'user_id': user_id,
+            })
+            wallet_deltas[wallet_name] += amount if type_ == 'income' else -amount
+            rollup_key = (date.year, date.month, category_id, type_)
+            rollup_deltas[rollup_key][0] += amount
+            rollup_deltas[rollup_key][1] += 1
+            imported_count += 1
+
+            if len(batch) >= chunk_size:
+                flush_batch()
+
+        flush_batch()
+
+        if dry_run:
+            db.session.rollback()
+        else:
+            for wallet_name, delta in wallet_deltas.items():
+                db.session.execute(
+                    db.update(Wallet)
+                    .where(Wallet.id == wallet_ids[wallet_name])
+                    .values(balance=Wallet.balance + delta)
+                )
+            for (year, month, category_id, type_), (total, count) in rollup_deltas.items():
+                apply_rollup_delta(user_id, datetime(year, month, 1), category_id, type_, total, count=count)
+            # Jendela anggaran tidak selalu sebulan penuh, jadi counter dihitung ulang dengan satu query
+            refresh_budget_counters(user_id, Budget.query.filter_by(user_id=user_id).all(), alerts=True)
+            db.session.commit()
+            bump_data_version(user_id)
+    except Exception:
+        db.session.rollback()
+        raise
+
+    elapsed = time.perf_counter() - started
+    return {
+        'imported': imported_count,
+        'errors': errors,
+        'dry_run': dry_run,
+        'elapsed': elapsed,
+        'rows_per_second': imported_count / elapsed if elapsed > 0 else 0.0,
+    }
@@ -0,0 +1,161 @@
+import json
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from flask import current_app
+
+from models import db, ExportJob
+from utils.datetime_utils import now_wib
+
+
+JOB_KINDS = {'pdf', 'budget_pdf', 'excel'}
+JOB_FILE_EXTENSIONS = {'pdf': 'pdf', 'budget_pdf': 'pdf', 'excel': 'xlsx'}
+STALE_JOB_AGE = timedelta(days=1)
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _now():
+    return now_wib().replace(tzinfo=None)
+
+
+def _get_executor():
+    global _executor, _executor_pid
+
+    # Pool dibuat per proses (setelah fork gunicorn), bukan diwarisi dari master
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ProcessPoolExecutor(
+                max_workers=current_app.config['EXPORT_JOB_WORKERS'],
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def enqueue_job(user_id, kind, params):
+    if kind not in JOB_KINDS:
+        raise ValueError('Jenis laporan tidak valid')
+
+    cleanup_expired_jobs()
+
+    job = ExportJob(id=uuid.uuid4().hex, user_id=user_id, kind=kind, params=json.dumps(params))
+    db.session.add(job)
+    db.session.commit()
+
+    submit_background(execute_job, job.id)
+    return job
+
+
+def run_in_app_context(func, *args):
+    """Titik masuk di proses pool: app context ringan tanpa efek samping boot app.py"""
+    from worker import get_worker_app
+
+    with get_worker_app().app_context():
+        return func(*args)
+
+
+def submit_background(func, *args):
+    """Jalankan func (fungsi level modul) di pool proses, atau langsung bila executor 'inline'"""
+    if current_app.config['EXPORT_JOB_EXECUTOR'] == 'inline':
+        return func(*args)
+    return _get_executor().submit(run_in_app_context, func, *args)
+
+
+def get_job(user_id, job_id):
+    return ExportJob.query.filter_by(id=job_id, user_id=user_id).first()
+
+
+def serialize_job(job):
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'progress': job.progress,
+        'error': job.error,
+        'download_name': job.download_name,
+        'created_at': job.created_at.strftime('%Y-%m-%d %H:%M:%S') if job.created_at else None,
+        'expires_at': job.expires_at.strftime('%Y-%m-%d %H:%M:%S') if job.expires_at else None,
+    }
+
+
+def _build_job_file(job, path, progress):
+    from services.export_service import transaction_projection, write_transactions_xlsx
+    from services.report_service import build_budget_pdf, build_transactions_pdf
+    from models import Transaction
+
+    params = json.loads(job.params or '{}')
+
+    if job.kind == 'pdf':
+        return build_transactions_pdf(path, job.user_id, params.get('username', ''), params.get('filters') or {}, progress)
+
+    if job.kind == 'budget_pdf':
+        return build_budget_pdf(path, job.user_id, int(params['budget_id']), progress)
+
+    rows = transaction_projection(job.user_id, params.get('filters') or {}) \
+        .order_by(Transaction.date.desc(), Transaction.id.desc())
+    progress(30)
+    write_transactions_xlsx(rows, path=path)
+    return 'laporan_keuangan.xlsx'
+
+
+def execute_job(job_id):
+    job = db.session.get(ExportJob, job_id)
+    if not job or job.status != 'queued':
+        return
+
+    job.status = 'running'
+    db.session.commit()
+
+    def progress(percent):
+        job.progress = int(percent)
+        db.session.commit()
+
+    export_dir = current_app.config['EXPORT_DIR']
+    os.makedirs(export_dir, exist_ok=True)
+    path = os.path.join(export_dir, f'{job.id}.{JOB_FILE_EXTENSIONS[job.kind]}')
+
+    try:
+        download_name = _build_job_file(job, path, progress)
+        job.status = 'done'
+        job.progress = 100
+        job.file_path = path
+        job.download_name = download_name
+    except Exception as exc:
+        current_app.logger.error('Export job failed: %s', job_id, exc_info=True)
+        db.session.rollback()
+        job = db.session.get(ExportJob, job_id)
+        job.status = 'failed'
+        job.error = str(exc)[:255] or 'Gagal membuat laporan'
+        if os.path.exists(path):
+            os.remove(path)
+
+    job.finished_at = _now()
+    job.expires_at = job.finished_at + current_app.config['EXPORT_JOB_TTL']
+    db.session.commit()
+
+
+def is_job_expired(job):
+    return job.expires_at is not None and job.expires_at <= _now()
+
+
+def cleanup_expired_jobs():
+    now = _now()
+    expired = ExportJob.query.filter(
+        db.or_(ExportJob.expires_at < now, ExportJob.created_at < now - STALE_JOB_AGE)
+    ).all()
+
+    for job in expired:
+        if job.file_path and os.path.exists(job.file_path):
+            os.remove(job.file_path)
+        db.session.delete(job)
+
+    if expired:
+        db.session.commit()
+    return len(expired)
@@ -0,0 +1,53 @@
+from collections import namedtuple
+
+from models import db, Category, SharedWallet, Wallet
+from utils.cache_utils import get_or_set_user_cache
+
+
+REFERENCE_CACHE_TIMEOUT = 600
+
+# Representasi ringan (bisa di-pickle ke cache bersama) untuk dropdown di template
+CategoryOption = namedtuple('CategoryOption', 'id name type')
+WalletOption = namedtuple('WalletOption', 'id name type balance user_id')
+
+
+def _load_categories(user_id):
+    rows = db.session.query(Category.id, Category.name, Category.type) \
+        .filter(Category.user_id == user_id).order_by(Category.id)
+    return [CategoryOption(*row) for row in rows]
+
+
+def _load_wallets(user_id):
+    columns = (Wallet.id, Wallet.name, Wallet.type, Wallet.balance, Wallet.user_id)
+    owned = db.session.query(*columns).filter(Wallet.user_id == user_id).order_by(Wallet.id).all()
+    # Dompet bersama dengan izin 'add' diambil lewat join, bukan lazy load per baris
+    shared = db.session.query(*columns).join(SharedWallet, SharedWallet.wallet_id == Wallet.id).filter(
+        SharedWallet.shared_with_id == user_id,
+        SharedWallet.permission == 'add',
+    ).order_by(SharedWallet.id).all()
+    return [WalletOption(*row) for row in owned + shared]
+
+
+def get_category_options(user_id):
+    return get_or_set_user_cache(
+        user_id, 'ref-categories', (), lambda: _load_categories(user_id), timeout=REFERENCE_CACHE_TIMEOUT,
+    )
+
+
+def get_wallet_options(user_id):
+    """Dompet milik user ditambah dompet bersama yang boleh ditambah transaksinya"""
+    return get_or_set_user_cache(
+        user_id, 'ref-wallets', (), lambda: _load_wallets(user_id), timeout=REFERENCE_CACHE_TIMEOUT,
+    )
+
+
+def get_wallet_audience(*wallets):
+    """User yang melihat dompet ini: pemilik dan penerima berbagi"""
+    wallets = [wallet for wallet in wallets if wallet is not None]
+    user_ids = {wallet.user_id for wallet in wallets}
+    if wallets:
+        user_ids.update(
+            user_id for user_id, in db.session.query(SharedWallet.shared_with_id)
+            .filter(SharedWallet.wallet_id.in_({wallet.id for wallet in wallets}))
+        )
+    return user_ids
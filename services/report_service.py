@@ -0,0 +1,287 @@
+from dateutil.relativedelta import relativedelta
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter, portrait
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+from models import Budget, Transaction
+from services.budget_service import get_budget_summary, get_budget_transactions
+from services.transaction_service import get_filtered_totals, get_filtered_transactions
+from utils.datetime_utils import now_wib, to_wib
+
+
+def _report_progress(progress, percent):
+    if progress:
+        progress(percent)
+
+
+def build_transactions_pdf(output, user_id, username, filters, progress=None):
+    """Tulis laporan transaksi ke `output` (path atau file object); kembalikan nama file unduhan"""
+    start_date = filters['start_date']
+    end_date = filters['end_date']
+
+    transactions = get_filtered_transactions(user_id, filters).order_by(Transaction.date.asc()).all()
+    
+    # Calculate summary
+    totals = get_filtered_totals(user_id, filters)
+    total_income = totals['total_income']
+    total_expense = totals['total_expense']
+    net_flow = totals['net_total']
+    _report_progress(progress, 30)
+
+    doc = SimpleDocTemplate(output, pagesize=portrait(letter),
+                            rightMargin=40, leftMargin=40,
+                            topMargin=40, bottomMargin=40)
+    elements = []
+    
+    styles = getSampleStyleSheet()
+    
+    # Custom Styles
+    title_style = ParagraphStyle(
+        'TitleStyle',
+        parent=styles['Heading1'],
+        fontSize=20,
+        spaceAfter=10,
+        alignment=1,  # Center
+        textColor=colors.HexColor("#1e40af")
+    )
+    
+    subtitle_style = ParagraphStyle(
+        'SubtitleStyle',
+        parent=styles['Normal'],
+        fontSize=11,
+        spaceAfter=20,
+        alignment=1,  # Center
+        textColor=colors.grey
+    )
+
+    header_style = ParagraphStyle(
+        'HeaderStyle',
+        parent=styles['Heading2'],
+        fontSize=14,
+        spaceBefore=15,
+        spaceAfter=10,
+        textColor=colors.HexColor("#1e40af")
+    )
+
+    normal_style = styles['Normal']
+    
+    # 1. Title & Header
+    elements.append(Paragraph("LAPORAN KEUANGAN", title_style))
+    date_range = "Semua Waktu"
+    if start_date and end_date:
+        date_range = f"{start_date} s/d {end_date}"
+    elif start_date:
+        date_range = f"Mulai {start_date}"
+    elif end_date:
+        date_range = f"Hingga {end_date}"
+        
+    elements.append(Paragraph(f"Periode: {date_range}", subtitle_style))
+    elements.append(Paragraph(f"User: {username}", subtitle_style))
+    elements.append(Spacer(1, 0.2 * inch))
+
+    # 2. Summary Card
+    elements.append(Paragraph("Ringkasan", header_style))
+    summary_data = [
+        ["Total Pemasukan", f"Rp {total_income:,.0f}"],
+        ["Total Pengeluaran", f"Rp {total_expense:,.0f}"],
+        ["Arus Kas Bersih", f"Rp {net_flow:,.0f}"]
+    ]
+    
+    summary_table = Table(summary_data, colWidths=[2.5*inch, 2.5*inch])
+    summary_table.setStyle(TableStyle([
+        ('ALIGN', (0,0), (0,-1), 'LEFT'),
+        ('ALIGN', (1,0), (1,-1), 'RIGHT'),
+        ('FONTNAME', (0,0), (-1,-1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0,0), (-1,-1), 11),
+        ('BOTTOMPADDING', (0,0), (-1,-1), 8),
+        ('LINEBELOW', (0,0), (-1,-1), 0.5, colors.lightgrey),
+        ('TEXTCOLOR', (1,2), (1,2), colors.green if net_flow >= 0 else colors.red),
+    ]))
+    elements.append(summary_table)
+    elements.append(Spacer(1, 0.4 * inch))
+
+    # 3. Transactions Table
+    elements.append(Paragraph("Rincian Transaksi", header_style))
+    
+    table_data = [['Tanggal', 'Deskripsi', 'Kategori', 'Tipe', 'Jumlah']]
+    for t in transactions:
+        table_data.append([
+            to_wib(t.date).strftime('%d/%m/%Y'),
+            Paragraph(t.description, normal_style),
+            t.category.name,
+            'Masuk' if t.type == 'income' else 'Keluar',
+            f"Rp {t.amount:,.0f}"
+        ])
+    
+    if not transactions:
+        table_data.append(['-', 'Tidak ada transaksi ditemukan', '-', '-', '-'])
+
+    t_table = Table(table_data, colWidths=[1.0*inch, 2.4*inch, 1.2*inch, 0.8*inch, 1.5*inch])
+    t_table.setStyle(TableStyle([
+        ('BACKGROUND', (0,0), (-1,0), colors.HexColor("#1e40af")),
+        ('TEXTCOLOR', (0,0), (-1,0), colors.whitesmoke),
+        ('ALIGN', (0,0), (-1,0), 'CENTER'),
+        ('ALIGN', (4,1), (4,-1), 'RIGHT'),
+        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0,0), (-1,0), 10),
+        ('BOTTOMPADDING', (0,0), (-1,0), 10),
+        ('TOPPADDING', (0,0), (-1,0), 10),
+        ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
+        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+        ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.whitesmoke, colors.white]),
+        ('TEXTCOLOR', (3,1), (3,-1), colors.green), # Default column 3 color (Type)
+    ]))
+    
+    # Conditional coloring for type column
+    if transactions:
+        for i, t in enumerate(transactions, 1):
+            if t.type == 'expense':
+                t_table.setStyle(TableStyle([
+                    ('TEXTCOLOR', (3, i), (3, i), colors.red),
+                    ('TEXTCOLOR', (4, i), (4, i), colors.red)
+                ]))
+            else:
+                t_table.setStyle(TableStyle([
+                    ('TEXTCOLOR', (3, i), (3, i), colors.green),
+                    ('TEXTCOLOR', (4, i), (4, i), colors.green)
+                ]))
+
+    elements.append(t_table)
+    
+    # 4. Footer
+    elements.append(Spacer(1, 0.5 * inch))
+    footer_text = f"Dicetak pada: {now_wib().strftime('%d/%m/%Y %H:%M:%S')}"
+    elements.append(Paragraph(footer_text, ParagraphStyle('Footer', parent=styles['Italic'], alignment=2, fontSize=8, textColor=colors.grey)))
+
+    _report_progress(progress, 60)
+    doc.build(elements)
+    _report_progress(progress, 100)
+    
+    return f"Laporan_Keuangan_{username}_{now_wib().strftime('%Y%m%d')}.pdf"
+
+
+def build_budget_pdf(output, user_id, budget_id, progress=None):
+    """Tulis laporan detail anggaran ke `output`; kembalikan nama file unduhan"""
+    budget = Budget.query.filter_by(id=budget_id, user_id=user_id).first()
+    if not budget:
+        raise ValueError('Anggaran tidak ditemukan')
+    summary = get_budget_summary(user_id, budget)
+    transactions = get_budget_transactions(user_id, budget, newest_first=False)
+    start_date, end_date = summary['start_date'], summary['end_date']
+    total_expense = summary['total_expense']
+    total_income = summary['total_income']
+    remaining = summary['remaining']
+    net = summary['net']
+
+    _report_progress(progress, 30)
+
+    doc = SimpleDocTemplate(output, pagesize=portrait(letter), 
+                            rightMargin=50, leftMargin=50, 
+                            topMargin=50, bottomMargin=50)
+    elements = []
+    
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'TitleStyle',
+        parent=styles['Heading1'],
+        fontSize=18,
+        spaceAfter=20,
+        alignment=1, # Center
+        textColor=colors.HexColor("#1e40af")
+    )
+    
+    subtitle_style = ParagraphStyle(
+        'SubtitleStyle',
+        parent=styles['Normal'],
+        fontSize=12,
+        spaceAfter=12,
+        alignment=1, # Center
+        textColor=colors.grey
+    )
+    
+    section_title_style = ParagraphStyle(
+        'SectionTitle',
+        parent=styles['Heading2'],
+        fontSize=14,
+        spaceBefore=15,
+        spaceAfter=10,
+        textColor=colors.HexColor("#1e40af"),
+        borderPadding=5,
+        borderWidth=0,
+        borderStyle=None
+    )
+
+    normal_style = styles['Normal']
+    
+    # Header
+    elements.append(Paragraph("Laporan Detail Anggaran", title_style))
+    elements.append(Paragraph(f"Periode: {start_date.strftime('%d/%m/%Y')} - {(end_date - relativedelta(days=1)).strftime('%d/%m/%Y')}", subtitle_style))
+    elements.append(Spacer(1, 0.2 * inch))
+    
+    # Summary Info
+    summary_data = [
+        [Paragraph("<b>Kategori</b>", normal_style), f": {budget.category.name}"],
+        [Paragraph("<b>Target Anggaran</b>", normal_style), f": Rp {budget.amount:,.0f}"],
+        [Paragraph("<b>Total Pengeluaran</b>", normal_style), f": Rp {total_expense:,.0f}"],
+        [Paragraph("<b>Total Pemasukan</b>", normal_style), f": Rp {total_income:,.0f}"],
+        [Paragraph("<b>Sisa Anggaran</b>", normal_style), f": Rp {remaining:,.0f}"],
+        [Paragraph("<b>Selisih (Informasi)</b>", normal_style), f": Rp {net:,.0f}"],
+        [Paragraph("<b>Status</b>", normal_style), f": {'Melebihi' if total_expense > budget.amount else 'Aman'}"]
+    ]
+    
+    summary_table = Table(summary_data, colWidths=[1.5*inch, 4*inch])
+    summary_table.setStyle(TableStyle([
+        ('ALIGN', (0,0), (-1,-1), 'LEFT'),
+        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+        ('TEXTCOLOR', (1,2), (1,2), colors.red if total_expense > budget.amount else colors.green),
+        ('TEXTCOLOR', (1,3), (1,3), colors.green),
+        ('TEXTCOLOR', (1,5), (1,5), colors.green if net >= 0 else colors.red),
+        ('FONTNAME', (0,0), (-1,-1), 'Helvetica'),
+        ('FONTSIZE', (0,0), (-1,-1), 11),
+        ('BOTTOMPADDING', (0,0), (-1,-1), 8),
+    ]))
+    elements.append(summary_table)
+    elements.append(Spacer(1, 0.3 * inch))
+    
+    # Transactions Table
+    elements.append(Paragraph("Rincian Transaksi", section_title_style))
+    
+    table_data = [['Tanggal', 'Deskripsi', 'Dompet', 'Jumlah']]
+    for t in transactions:
+        table_data.append([
+            to_wib(t.date).strftime('%d/%m/%Y'),
+            Paragraph(t.description, normal_style),
+            t.wallet.name,
+            f"Rp {t.amount:,.0f}"
+        ])
+    
+    if len(transactions) == 0:
+        table_data.append(['-', 'Tidak ada transaksi', '-', '-'])
+
+    t_table = Table(table_data, colWidths=[1.0*inch, 2.5*inch, 1.2*inch, 1.3*inch])
+    t_table.setStyle(TableStyle([
+        ('BACKGROUND', (0,0), (-1,0), colors.HexColor("#1e40af")),
+        ('TEXTCOLOR', (0,0), (-1,0), colors.whitesmoke),
+        ('ALIGN', (0,0), (-1,0), 'CENTER'),
+        ('ALIGN', (3,1), (3,-1), 'RIGHT'),
+        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0,0), (-1,0), 10),
+        ('BOTTOMPADDING', (0,0), (-1,0), 10),
+        ('TOPPADDING', (0,0), (-1,0), 10),
+        ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
+        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+        ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.whitesmoke, colors.white])
+    ]))
+    elements.append(t_table)
+    
+    # Footer
+    elements.append(Spacer(1, 0.5 * inch))
+    footer_text = f"Dicetak pada: {now_wib().strftime('%d/%m/%Y %H:%M:%S')}"
+    elements.append(Paragraph(footer_text, ParagraphStyle('Footer', parent=styles['Italic'], alignment=2, fontSize=8)))
+
+    _report_progress(progress, 60)
+    doc.build(elements)
+    _report_progress(progress, 100)
+    return f"Laporan_Anggaran_{budget.category.name}_{start_date.strftime('%Y%m%d')}.pdf"
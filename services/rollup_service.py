@@ -0,0 +1,113 @@
+
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from models import db, Category, MonthlyRollup, Transaction
+
+
+def apply_rollup_delta(user_id, tx_date, category_id, transaction_type, amount, count=1):
+    if tx_date is None:
+        return
+
+    stmt = sqlite_insert(MonthlyRollup).values(
+        user_id=user_id,
+        year=tx_date.year,
+        month=tx_date.month,
+        category_id=category_id,
+        type=transaction_type,
+        total=float(amount or 0),
+        tx_count=count,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id', 'year', 'month', 'category_id', 'type'],
+        set_={
+            'total': MonthlyRollup.total + stmt.excluded.total,
+            'tx_count': MonthlyRollup.tx_count + stmt.excluded.tx_count,
+        },
+    )
+    db.session.execute(stmt)
+
+
+def record_transaction(transaction):
+    apply_rollup_delta(
+        transaction.user_id,
+        transaction.date,
+        transaction.category_id,
+        transaction.type,
+        transaction.amount,
+    )
+
+
+def unrecord_transaction(transaction):
+    apply_rollup_delta(
+        transaction.user_id,
+        transaction.date,
+        transaction.category_id,
+        transaction.type,
+        -float(transaction.amount or 0),
+        count=-1,
+    )
+
+
+def rebuild_rollups(user_id=None):
+    delete_query = MonthlyRollup.query
+    if user_id is not None:
+        delete_query = delete_query.filter_by(user_id=user_id)
+    delete_query.delete(synchronize_session=False)
+
+    year_expr = db.cast(db.func.strftime('%Y', Transaction.date), db.Integer)
+    month_expr = db.cast(db.func.strftime('%m', Transaction.date), db.Integer)
+    source = db.session.query(
+        Transaction.user_id,
+        year_expr,
+        month_expr,
+        Transaction.category_id,
+        Transaction.type,
+        db.func.sum(Transaction.amount),
+        db.func.count(Transaction.id),
+    ).filter(Transaction.date.isnot(None))
+    if user_id is not None:
+        source = source.filter(Transaction.user_id == user_id)
+    source = source.group_by(
+        Transaction.user_id, year_expr, month_expr, Transaction.category_id, Transaction.type,
+    )
+
+    result = db.session.execute(
+        db.insert(MonthlyRollup).from_select(
+            ['user_id', 'year', 'month', 'category_id', 'type', 'total', 'tx_count'],
+            source.statement,
+        )
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def get_month_totals(user_id, year, month):
+    rows = db.session.query(MonthlyRollup.type, db.func.sum(MonthlyRollup.total)).filter(
+        MonthlyRollup.user_id == user_id,
+        MonthlyRollup.year == year,
+        MonthlyRollup.month == month,
+    ).group_by(MonthlyRollup.type).all()
+
+    totals = {tx_type: float(total or 0) for tx_type, total in rows}
+    total_income = totals.get('income', 0.0)
+    total_expense = totals.get('expense', 0.0)
+    return {
+        'total_income': total_income,
+        'total_expense': total_expense,
+        'net_total': total_income - total_expense,
+    }
+
+
+def get_expense_by_category(user_id, year, month):
+    category_name = db.func.coalesce(Category.name, 'Tanpa Kategori')
+    rows = db.session.query(category_name, db.func.sum(MonthlyRollup.total)).outerjoin(
+        Category, Category.id == MonthlyRollup.category_id,
+    ).filter(
+        MonthlyRollup.user_id == user_id,
+        MonthlyRollup.year == year,
+        MonthlyRollup.month == month,
+        MonthlyRollup.type == 'expense',
+        MonthlyRollup.tx_count > 0,
+    ).group_by(category_name).order_by(db.func.sum(MonthlyRollup.total).desc()).all()
+
+    return {name: float(total or 0) for name, total in rows}
@@ -0,0 +1,111 @@
+import re
+import weakref
+
+from sqlalchemy.exc import OperationalError
+
+from models import db, Transaction
+
+
+SEARCH_TABLE = 'transaction_fts'
+_TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+_SEARCH_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        description, category, wallet, tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_transaction_fts_insert AFTER INSERT ON "transaction" BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, description, category, wallet) VALUES (
+            new.id,
+            new.description,
+            (SELECT name FROM category WHERE id = new.category_id),
+            (SELECT name FROM wallet WHERE id = new.wallet_id)
+        );
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_transaction_fts_delete AFTER DELETE ON "transaction" BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_transaction_fts_update
+        AFTER UPDATE OF description, category_id, wallet_id ON "transaction" BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id;
+        INSERT INTO {SEARCH_TABLE}(rowid, description, category, wallet) VALUES (
+            new.id,
+            new.description,
+            (SELECT name FROM category WHERE id = new.category_id),
+            (SELECT name FROM wallet WHERE id = new.wallet_id)
+        );
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_category_fts_rename AFTER UPDATE OF name ON category BEGIN
+        UPDATE {SEARCH_TABLE} SET category = new.name
+        WHERE rowid IN (SELECT id FROM "transaction" WHERE category_id = new.id);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_wallet_fts_rename AFTER UPDATE OF name ON wallet BEGIN
+        UPDATE {SEARCH_TABLE} SET wallet = new.name
+        WHERE rowid IN (SELECT id FROM "transaction" WHERE wallet_id = new.id);
+    END""",
+]
+
+# Status index per engine, dibaca dari skema sekali per proses: proses pool ekspor
+# tidak menjalankan boot app.py, jadi tidak bisa mengandalkan flag yang diset di sana
+_search_index_engines = weakref.WeakKeyDictionary()
+
+
+def ensure_search_index(connection):
+    """Buat tabel FTS5 beserta trigger sinkronisasinya; False jika SQLite tanpa FTS5"""
+    try:
+        for statement in _SEARCH_DDL:
+            connection.exec_driver_sql(statement)
+    except OperationalError:
+        _search_index_engines[connection.engine] = False
+        return False
+
+    _search_index_engines[connection.engine] = True
+    return True
+
+
+def search_index_enabled():
+    engine = db.engine
+    if engine not in _search_index_engines:
+        with engine.connect() as connection:
+            _search_index_engines[engine] = connection.exec_driver_sql(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (SEARCH_TABLE,)
+            ).first() is not None
+    return _search_index_engines[engine]
+
+
+def rebuild_search_index(connection):
+    connection.exec_driver_sql(f"DELETE FROM {SEARCH_TABLE}")
+    result = connection.exec_driver_sql(f"""
+        INSERT INTO {SEARCH_TABLE}(rowid, description, category, wallet)
+        SELECT t.id, t.description, c.name, w.name
+        FROM "transaction" t
+        LEFT JOIN category c ON c.id = t.category_id
+        LEFT JOIN wallet w ON w.id = t.wallet_id
+    """)
+    return result.rowcount
+
+
+def build_match_query(term):
+    """Ubah input bebas menjadi query FTS5: setiap kata dicocokkan sebagai prefix (AND)"""
+    tokens = _TOKEN_PATTERN.findall(term or '')
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def description_like_filter(term):
+    return Transaction.description.ilike(f'%{term}%')
+
+
+def full_text_filter(match_query):
+    matches = db.text(f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :fts_query") \
+        .bindparams(fts_query=match_query) \
+        .columns(db.column('rowid'))
+    return Transaction.id.in_(matches)
+
+
+def search_filter(term):
+    if not search_index_enabled():
+        return description_like_filter(term)
+
+    match_query = build_match_query(term)
+    if not match_query:
+        return description_like_filter(term)
+    return full_text_filter(match_query)
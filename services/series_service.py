@@ -0,0 +1,69 @@
+from datetime import datetime
+
+from models import db, MonthlyRollup, Transaction
+from utils.datetime_utils import BUCKET_GRANULARITIES, iter_buckets
+from utils.series_utils import bucket_expression
+
+
+MAX_SERIES_BUCKETS = 5000
+
+
+def _is_month_aligned(value):
+    return value.day == 1 and value == datetime(value.year, value.month, 1)
+
+
+def _rollup_rows(user_id, start, end, granularity):
+    # Bulan/tahun penuh cukup dibaca dari tabel rollup, bukan dari transaksi mentah
+    if granularity == 'month':
+        bucket = db.func.printf('%04d-%02d-01', MonthlyRollup.year, MonthlyRollup.month)
+    else:
+        bucket = db.func.printf('%04d-01-01', MonthlyRollup.year)
+    bucket = bucket.label('bucket')
+    return db.session.query(bucket, MonthlyRollup.type, db.func.sum(MonthlyRollup.total)).filter(
+        MonthlyRollup.user_id == user_id,
+        db.tuple_(MonthlyRollup.year, MonthlyRollup.month) >= (start.year, start.month),
+        db.tuple_(MonthlyRollup.year, MonthlyRollup.month) < (end.year, end.month),
+    ).group_by(bucket, MonthlyRollup.type)
+
+
+def _transaction_rows(user_id, start, end, granularity):
+    bucket = bucket_expression(Transaction.date, granularity).label('bucket')
+    return db.session.query(bucket, Transaction.type, db.func.sum(Transaction.amount)).filter(
+        Transaction.user_id == user_id,
+        Transaction.date >= start,
+        Transaction.date < end,
+    ).group_by(bucket, Transaction.type)
+
+
+def income_expense_query(user_id, start, end, granularity):
+    """Satu GROUP BY (bucket, tipe) untuk rentang [start, end)"""
+    if granularity in ('month', 'year') and _is_month_aligned(start) and _is_month_aligned(end):
+        return _rollup_rows(user_id, start, end, granularity)
+    return _transaction_rows(user_id, start, end, granularity)
+
+
+def get_income_expense_series(user_id, start, end, granularity='month'):
+    """Deret pemasukan/pengeluaran per bucket dalam [start, end), bucket kosong diisi nol"""
+    if granularity not in BUCKET_GRANULARITIES:
+        raise ValueError(f"Granularitas harus salah satu dari {', '.join(BUCKET_GRANULARITIES)}")
+    if start >= end:
+        raise ValueError('Tanggal awal harus sebelum tanggal akhir')
+
+    buckets = list(iter_buckets(start, end, granularity))
+    if len(buckets) > MAX_SERIES_BUCKETS:
+        raise ValueError('Rentang terlalu panjang untuk granularitas ini')
+
+    totals = {}
+    for bucket, tx_type, total in income_expense_query(user_id, start, end, granularity):
+        if tx_type in ('income', 'expense'):
+            totals[(datetime.strptime(bucket, '%Y-%m-%d').date(), tx_type)] = float(total or 0)
+
+    income = [totals.get((bucket, 'income'), 0.0) for bucket in buckets]
+    expense = [totals.get((bucket, 'expense'), 0.0) for bucket in buckets]
+    return {
+        'granularity': granularity,
+        'buckets': buckets,
+        'income': income,
+        'expense': expense,
+        'net': [inc - exp for inc, exp in zip(income, expense)],
+    }
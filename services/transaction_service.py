@@ -1,14 +1,37 @@
+import base64
+import hashlib
+import json
 from datetime import datetime, timedelta
 from decimal import Decimal, InvalidOperation
 
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import joinedload
 
 from models import db, Transaction, Wallet
+from services.search_service import search_filter
+from utils.cache_utils import bump_data_version, get_or_set_user_cache
 from utils.datetime_utils import now_wib, to_wib
 
 
 DATETIME_LOCAL_FORMAT = '%Y-%m-%dT%H:%M'
 DATE_INPUT_FORMAT = '%Y-%m-%d'
+TRANSACTION_COUNT_CACHE_TIMEOUT = 300
+TRANSACTION_BATCH_MAX_ITEMS = 500
+CLIENT_ID_MAX_LENGTH = 64
+
+
+class CursorPage:
+    """Satu halaman hasil keyset pagination (tanpa OFFSET dan tanpa COUNT wajib)"""
+
+    def __init__(self, items, per_page, next_cursor=None, total=None):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.total = total
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
 
 
 def normalize_wib_storage(dt):
@@ -48,6 +71,40 @@ def parse_transaction_datetime(raw_value):
     return normalize_wib_storage(parsed)
 
 
+def parse_transaction_payload(payload):
+    """Validasi satu transaksi dari body JSON API menjadi dict argumen create_transaction"""
+    if not isinstance(payload, dict):
+        raise ValueError('Data transaksi tidak valid')
+
+    amount = parse_positive_amount(payload.get('amount'))
+    try:
+        category_id = int(payload.get('category_id'))
+        wallet_id = int(payload.get('wallet_id'))
+    except (TypeError, ValueError):
+        raise ValueError('Kategori atau dompet tidak valid')
+
+    transaction_type = str(payload.get('type', '')).strip()
+    if transaction_type not in {'income', 'expense'}:
+        raise ValueError('Tipe transaksi tidak valid')
+
+    client_id = payload.get('client_id')
+    if client_id is not None:
+        client_id = str(client_id).strip()
+        if not client_id or len(client_id) > CLIENT_ID_MAX_LENGTH:
+            raise ValueError('client_id tidak valid')
+
+    raw_date = payload.get('date')
+    return {
+        'client_id': client_id,
+        'wallet_id': wallet_id,
+        'amount': amount,
+        'category_id': category_id,
+        'description': (payload.get('description') or '').strip(),
+        'transaction_type': transaction_type,
+        'date': parse_transaction_datetime(raw_date) if raw_date else None,
+    }
+
+
 def parse_date_filter(raw_value, end_of_day=False):
     if not raw_value or not str(raw_value).strip():
         raise ValueError('Tanggal tidak boleh kosong')
@@ -63,7 +120,7 @@ def parse_date_filter(raw_value, end_of_day=False):
     return normalize_wib_storage(parsed)
 
 
-def get_filtered_transactions(user_id, filters):
+def apply_transaction_filters(query, user_id, filters):
     category_filter = filters.get('category_id')
     wallet_filter = filters.get('wallet_id')
     start_date = filters.get('start_date')
@@ -71,14 +128,11 @@ def get_filtered_transactions(user_id, filters):
     tx_type = filters.get('type')
     search = filters.get('search')
 
-    query = Transaction.query.options(
-        joinedload(Transaction.wallet),
-        joinedload(Transaction.category),
-    ).filter_by(user_id=user_id)
+    query = query.filter(Transaction.user_id == user_id)
 
     if category_filter:
         try:
-            query = query.filter_by(category_id=int(category_filter))
+            query = query.filter(Transaction.category_id == int(category_filter))
         except (TypeError, ValueError):
             pass
 
@@ -106,24 +160,113 @@ def get_filtered_transactions(user_id, filters):
     if search:
         search = search.strip()
         if search:
-            query = query.filter(Transaction.description.ilike(f'%{search}%'))
+            query = query.filter(search_filter(search))
 
     return query
 
 
-def calculate_transaction_totals(transactions):
-    total_income = sum(t.amount for t in transactions if t.type == 'income')
-    total_expense = sum(t.amount for t in transactions if t.type == 'expense')
+def get_filtered_transactions(user_id, filters):
+    query = Transaction.query.options(
+        joinedload(Transaction.wallet),
+        joinedload(Transaction.category),
+    )
+    return apply_transaction_filters(query, user_id, filters)
+
+
+def get_filtered_totals(user_id, filters):
+    income_sum = db.func.sum(db.case((Transaction.type == 'income', Transaction.amount), else_=0))
+    expense_sum = db.func.sum(db.case((Transaction.type == 'expense', Transaction.amount), else_=0))
+    query = db.session.query(
+        db.func.coalesce(income_sum, 0),
+        db.func.coalesce(expense_sum, 0),
+        db.func.count(Transaction.id),
+    )
+    total_income, total_expense, count = apply_transaction_filters(query, user_id, filters).one()
+
+    total_income = float(total_income or 0)
+    total_expense = float(total_expense or 0)
     return {
         'total_income': total_income,
         'total_expense': total_expense,
         'net_total': total_income - total_expense,
+        'count': int(count or 0),
     }
 
 
-def create_transaction(user_id, wallet_id, amount, category_id, description, transaction_type, date=None):
+def encode_cursor(transaction):
+    payload = json.dumps([transaction.date.isoformat(), transaction.id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(raw_cursor):
+    try:
+        padded = raw_cursor + '=' * (-len(raw_cursor) % 4)
+        raw_date, transaction_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(raw_date), int(transaction_id)
+    except (TypeError, ValueError, UnicodeError):
+        raise ValueError('Cursor tidak valid')
+
+
+def order_newest_first(query):
+    return query.order_by(Transaction.date.desc(), Transaction.id.desc())
+
+
+def paginate_by_cursor(query, cursor=None, per_page=10):
+    """Ambil satu halaman urut (date, id) menurun mulai setelah cursor"""
+    if cursor:
+        cursor_date, cursor_id = decode_cursor(cursor)
+        query = query.filter(db.tuple_(Transaction.date, Transaction.id) < (cursor_date, cursor_id))
+
+    rows = order_newest_first(query).limit(per_page + 1).all()
+    items = rows[:per_page]
+    next_cursor = encode_cursor(items[-1]) if len(rows) > per_page else None
+    return CursorPage(items, per_page, next_cursor=next_cursor)
+
+
+def count_filtered_transactions(user_id, filters):
+    normalized = json.dumps(
+        {key: value for key, value in filters.items() if value not in (None, '')},
+        sort_keys=True,
+        default=str,
+    )
+
+    def count_rows():
+        query = db.session.query(db.func.count(Transaction.id))
+        return apply_transaction_filters(query, user_id, filters).scalar() or 0
+
+    return get_or_set_user_cache(
+        user_id,
+        'tx-count',
+        [hashlib.sha1(normalized.encode('utf-8')).hexdigest()],
+        count_rows,
+        timeout=TRANSACTION_COUNT_CACHE_TIMEOUT,
+    )
+
+
+def find_transactions_by_client_id(user_id, client_ids):
+    if not client_ids:
+        return {}
+    return {
+        transaction.client_id: transaction
+        for transaction in Transaction.query.options(
+            joinedload(Transaction.category),
+            joinedload(Transaction.wallet),
+        ).filter(Transaction.user_id == user_id, Transaction.client_id.in_(set(client_ids)))
+    }
+
+
+def create_transaction(user_id, wallet_id, amount, category_id, description, transaction_type, date=None,
+                       client_id=None):
+    from services.budget_service import record_budget_usage
+    from services.reference_service import get_wallet_audience
+    from services.rollup_service import record_transaction
     from services.wallet_service import apply_transaction_effect, get_wallet_for_transaction
 
+    # Kiriman ulang dengan client_id yang sama mengembalikan transaksi yang sudah ada
+    existing = find_transactions_by_client_id(user_id, [client_id] if client_id else [])
+    if client_id in existing:
+        return existing[client_id]
+
     try:
         transaction_date = date or normalize_wib_storage(now_wib())
         wallet = get_wallet_for_transaction(user_id, wallet_id, require_add_permission=True)
@@ -137,21 +280,213 @@ def create_transaction(user_id, wallet_id, amount, category_id, description, tra
             description=description,
             type=transaction_type,
             date=transaction_date,
+            client_id=client_id,
         )
 
         db.session.add(transaction)
+        record_transaction(transaction)
+        record_budget_usage(transaction)
         db.session.commit()
+        bump_data_version(user_id, *get_wallet_audience(wallet))
         return transaction
+    except IntegrityError:
+        db.session.rollback()
+        existing = find_transactions_by_client_id(user_id, [client_id] if client_id else [])
+        if client_id in existing:
+            return existing[client_id]
+        raise
     except Exception:
         db.session.rollback()
         raise
 
 
+class TransactionBatchError(ValueError):
+    """Batch atomik ditolak; `results` berisi status tiap item"""
+
+    def __init__(self, results):
+        super().__init__('Batch ditolak, tidak ada transaksi yang disimpan')
+        self.results = results
+
+
+def create_transactions_batch(user_id, payloads, atomic=True):
+    """Simpan banyak transaksi dalam satu transaksi database.
+
+    Semua item divalidasi di depan, izin dompet diperiksa sekali per dompet,
+    lalu saldo tiap dompet diubah dengan satu UPDATE berisi delta gabungan.
+    Dengan atomic=True satu item gagal membatalkan semuanya (TransactionBatchError);
+    selain itu item yang valid tetap disimpan. Item dengan client_id yang sudah
+    tersimpan tidak dibuat ulang. Hasil per item sesuai urutan input:
+    {'index', 'status': 'created'|'duplicate'|'error'|'skipped', 'transaction' atau 'message'}.
+    """
+    try:
+        return _create_transactions_batch(user_id, payloads, atomic)
+    except IntegrityError:
+        # Kiriman ulang yang sama sedang diproses bersamaan; ulangi sekali,
+        # kali ini item tersebut terdeteksi sebagai duplikat
+        return _create_transactions_batch(user_id, payloads, atomic)
+
+
+def _create_transactions_batch(user_id, payloads, atomic):
+    from models import Budget, Category
+    from services.budget_service import refresh_budget_counters
+    from services.reference_service import get_wallet_audience
+    from services.rollup_service import apply_rollup_delta
+    from services.wallet_service import adjust_wallet_balance, get_wallets_for_transactions, transaction_delta
+
+    if not isinstance(payloads, list) or not payloads:
+        raise ValueError('Daftar transaksi kosong')
+    if len(payloads) > TRANSACTION_BATCH_MAX_ITEMS:
+        raise ValueError(f'Maksimal {TRANSACTION_BATCH_MAX_ITEMS} transaksi per batch')
+
+    results = [{'index': index} for index in range(len(payloads))]
+    items = {}
+    for index, payload in enumerate(payloads):
+        try:
+            items[index] = parse_transaction_payload(payload)
+        except ValueError as exc:
+            results[index].update(status='error', message=str(exc))
+            continue
+        if items[index]['client_id']:
+            results[index]['client_id'] = items[index]['client_id']
+
+    def reject(index, message):
+        results[index].update(status='error', message=message)
+        items.pop(index, None)
+
+    existing = find_transactions_by_client_id(
+        user_id, [item['client_id'] for item in items.values() if item['client_id']]
+    )
+    first_by_client_id = {}
+    for index, item in list(items.items()):
+        client_id = item['client_id']
+        if not client_id:
+            continue
+        if client_id in existing or client_id in first_by_client_id:
+            results[index].update(status='duplicate')
+            items.pop(index)
+        else:
+            first_by_client_id[client_id] = index
+
+    wallets = get_wallets_for_transactions(user_id, {item['wallet_id'] for item in items.values()})
+    category_types = dict(
+        db.session.query(Category.id, Category.type).filter(
+            Category.user_id == user_id,
+            Category.id.in_({item['category_id'] for item in items.values()}),
+        )
+    )
+
+    # Cek saldo berurutan seperti bila item dikirim satu per satu
+    balances = {wallet_id: wallet.balance for wallet_id, wallet in wallets.items() if isinstance(wallet, Wallet)}
+    for index, item in list(items.items()):
+        wallet = wallets[item['wallet_id']]
+        if not isinstance(wallet, Wallet):
+            reject(index, wallet)
+        elif item['category_id'] not in category_types:
+            reject(index, 'Kategori tidak ditemukan')
+        elif item['transaction_type'] == 'expense' and balances[wallet.id] < item['amount']:
+            reject(index, 'Saldo tidak mencukupi')
+        else:
+            balances[wallet.id] += transaction_delta(item['amount'], item['transaction_type'])
+
+    def abort_if_atomic():
+        if atomic and any(result.get('status') == 'error' for result in results):
+            for result in results:
+                if 'status' not in result:
+                    result['status'] = 'skipped'
+            raise TransactionBatchError(results)
+
+    abort_if_atomic()
+
+    try:
+        wallet_deltas = {}
+        for item in items.values():
+            delta = transaction_delta(item['amount'], item['transaction_type'])
+            wallet_deltas[item['wallet_id']] = wallet_deltas.get(item['wallet_id'], 0.0) + delta
+
+        for wallet_id, delta in wallet_deltas.items():
+            has_expense = any(
+                item['wallet_id'] == wallet_id and item['transaction_type'] == 'expense' for item in items.values()
+            )
+            try:
+                adjust_wallet_balance(wallets[wallet_id], delta, guard=has_expense)
+            except ValueError as exc:
+                # Saldo berubah oleh penulis lain sejak dicek di atas
+                for index in [index for index, item in items.items() if item['wallet_id'] == wallet_id]:
+                    reject(index, str(exc))
+        abort_if_atomic()
+
+        default_date = normalize_wib_storage(now_wib())
+        transactions = {}
+        rollup_deltas = {}
+        for index, item in items.items():
+            transaction = Transaction(
+                user_id=user_id,
+                wallet_id=item['wallet_id'],
+                amount=item['amount'],
+                category_id=item['category_id'],
+                description=item['description'],
+                type=item['transaction_type'],
+                date=item['date'] or default_date,
+                client_id=item['client_id'],
+            )
+            transactions[index] = transaction
+            key = (transaction.date.year, transaction.date.month, transaction.category_id, transaction.type)
+            total, count = rollup_deltas.get(key, (0.0, 0))
+            rollup_deltas[key] = (total + transaction.amount, count + 1)
+
+        db.session.add_all(transactions.values())
+        for (year, month, category_id, transaction_type), (total, count) in rollup_deltas.items():
+            apply_rollup_delta(user_id, datetime(year, month, 1), category_id, transaction_type, total, count=count)
+        if transactions:
+            db.session.flush()
+            budgets = Budget.query.filter(
+                Budget.user_id == user_id,
+                Budget.category_id.in_({item['category_id'] for item in items.values()}),
+            ).all()
+            refresh_budget_counters(user_id, budgets, alerts=True)
+
+        created_ids = {index: transaction.id for index, transaction in transactions.items()}
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    # Muat ulang hasil commit sekaligus, bukan refresh satu per satu saat diserialisasi
+    created = {
+        transaction.id: transaction
+        for transaction in Transaction.query.options(
+            joinedload(Transaction.category),
+            joinedload(Transaction.wallet),
+        ).filter(Transaction.id.in_(created_ids.values()))
+    }
+    for index, transaction_id in created_ids.items():
+        results[index].update(status='created', transaction=created[transaction_id])
+        client_id = created[transaction_id].client_id
+        if client_id:
+            existing[client_id] = created[transaction_id]
+    for result in results:
+        if result.get('status') != 'duplicate':
+            continue
+        if result['client_id'] in existing:
+            result['transaction'] = existing[result['client_id']]
+        else:
+            # Item pertama dengan client_id ini ditolak, jadi salinannya juga
+            result.update(status='error', message='Item dengan client_id yang sama gagal disimpan')
+    if transactions:
+        bump_data_version(user_id, *get_wallet_audience(*(wallets[wallet_id] for wallet_id in wallet_deltas)))
+    return results
+
+
 def update_transaction(transaction, user_id, wallet_id, amount, category_id, description, transaction_type, date):
+    from services.budget_service import apply_budget_changes, budget_usage_change
+    from services.reference_service import get_wallet_audience
+    from services.rollup_service import record_transaction, unrecord_transaction
     from services.wallet_service import (
+        adjust_wallet_balance,
         apply_transaction_effect,
         get_wallet_for_transaction,
         revert_transaction_effect,
+        transaction_delta,
     )
 
     if transaction.user_id != user_id:
@@ -163,25 +498,38 @@ def update_transaction(transaction, user_id, wallet_id, amount, category_id, des
         if not old_tx:
             raise ValueError('Transaksi tidak ditemukan')
 
-        # 1) Revert efek transaksi lama terlebih dulu.
         old_wallet = Wallet.query.get(old_tx.wallet_id)
         if not old_wallet:
             raise ValueError('Dompet lama tidak ditemukan')
-        revert_transaction_effect(old_wallet, old_tx.amount, old_tx.type)
-
-        # 2) Ambil dompet tujuan (bisa sama / bisa berbeda), lalu apply nilai baru.
         new_wallet = get_wallet_for_transaction(user_id, wallet_id, require_add_permission=True)
-        apply_transaction_effect(new_wallet, amount, transaction_type)
 
-        # 3) Simpan data transaksi terbaru.
+        # 1) Revert efek lama lalu apply nilai baru. Untuk dompet yang sama cukup
+        #    satu UPDATE dengan selisih bersih, agar saldo tidak sempat dicek di tengah jalan.
+        if old_wallet.id == new_wallet.id:
+            adjust_wallet_balance(
+                new_wallet,
+                transaction_delta(amount, transaction_type) - transaction_delta(old_tx.amount, old_tx.type),
+                guard=transaction_type != 'income',
+            )
+        else:
+            revert_transaction_effect(old_wallet, old_tx.amount, old_tx.type)
+            apply_transaction_effect(new_wallet, amount, transaction_type)
+        unrecord_transaction(old_tx)
+        old_budget_usage = budget_usage_change(old_tx, -1)
+
+        # 2) Simpan data transaksi terbaru.
         old_tx.amount = amount
         old_tx.description = description
         old_tx.type = transaction_type
         old_tx.category_id = category_id
         old_tx.wallet_id = wallet_id
         old_tx.date = date
+        record_transaction(old_tx)
+        # Selisih bersih lama/baru diterapkan sekali per anggaran
+        apply_budget_changes(user_id, [old_budget_usage, budget_usage_change(old_tx)])
 
         db.session.commit()
+        bump_data_version(user_id, *get_wallet_audience(old_wallet, new_wallet))
         return old_tx
     except Exception:
         db.session.rollback()
@@ -189,6 +537,9 @@ def update_transaction(transaction, user_id, wallet_id, amount, category_id, des
 
 
 def delete_transaction(transaction, user_id):
+    from services.budget_service import unrecord_budget_usage
+    from services.reference_service import get_wallet_audience
+    from services.rollup_service import unrecord_transaction
     from services.wallet_service import revert_transaction_effect
 
     if transaction.user_id != user_id:
@@ -197,8 +548,11 @@ def delete_transaction(transaction, user_id):
     try:
         wallet = Wallet.query.get(transaction.wallet_id)
         revert_transaction_effect(wallet, transaction.amount, transaction.type)
+        unrecord_transaction(transaction)
+        unrecord_budget_usage(transaction)
         db.session.delete(transaction)
         db.session.commit()
+        bump_data_version(user_id, *get_wallet_audience(wallet))
     except Exception:
         db.session.rollback()
         raise
\ No newline at end of file
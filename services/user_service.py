@@ -0,0 +1,77 @@
+import threading
+import time
+from collections import Counter
+
+from flask_login import UserMixin
+
+from models import db, User
+
+
+USER_CACHE_TTL = 30  # detik; cache per proses, jadi ini batas basi antar worker
+USER_CACHE_MAX_ENTRIES = 1024
+
+_identity_cache = {}
+_identity_lock = threading.Lock()
+user_cache_stats = Counter()
+
+
+class SessionUser(UserMixin):
+    """Salinan ringan User untuk current_user; ambil User asli lewat get_user_record untuk menulis.
+
+    Foto profil tidak ikut disalin: worker foto memperbaruinya di proses lain, jadi
+    dibaca dari manifest di DB lewat cache per versi data (get_profile_photo_urls).
+    """
+
+    def __init__(self, id, username):
+        self.id = id
+        self.username = username
+
+    def __repr__(self):
+        return f'<SessionUser {self.id}>'
+
+
+def load_session_user(user_id):
+    now = time.monotonic()
+    entry = _identity_cache.get(user_id)
+    if entry is not None and entry[0] > now:
+        user_cache_stats['hits'] += 1
+        return entry[1]
+
+    user_cache_stats['misses'] += 1
+    row = db.session.query(User.id, User.username).filter(User.id == user_id).first()
+    if row is None:
+        invalidate_session_user(user_id)
+        return None
+
+    user = SessionUser(*row)
+    with _identity_lock:
+        if len(_identity_cache) >= USER_CACHE_MAX_ENTRIES:
+            for key in [key for key, (expires_at, _) in _identity_cache.items() if expires_at <= now]:
+                del _identity_cache[key]
+            while len(_identity_cache) >= USER_CACHE_MAX_ENTRIES:
+                del _identity_cache[next(iter(_identity_cache))]
+        _identity_cache[user_id] = (now + USER_CACHE_TTL, user)
+    return user
+
+
+def invalidate_session_user(user_id):
+    with _identity_lock:
+        if _identity_cache.pop(user_id, None) is not None:
+            user_cache_stats['invalidations'] += 1
+
+
+def get_user_record(user_id):
+    return db.session.get(User, user_id)
+
+
+def get_user_cache_stats():
+    hits = user_cache_stats['hits']
+    misses = user_cache_stats['misses']
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'invalidations': user_cache_stats['invalidations'],
+        'entries': len(_identity_cache),
+        'hit_ratio': hits / lookups if lookups else 0.0,
+    }
@@ -1,6 +1,12 @@
+from sqlalchemy.orm.attributes import set_committed_value
+
 from models import db, Category, SharedWallet, Transaction, Wallet
 from utils.datetime_utils import now_wib
+from services.budget_service import record_budget_usage
+from services.reference_service import get_wallet_audience
+from services.rollup_service import record_transaction
 from services.transaction_service import normalize_wib_storage
+from utils.cache_utils import bump_data_version
 
 
 def validate_wallet_ownership(wallet, user_id):
@@ -37,30 +43,81 @@ def get_wallet_for_transaction(user_id, wallet_id, require_add_permission=False)
     return wallet
 
 
-def apply_transaction_effect(wallet, amount, transaction_type):
-    if transaction_type == 'income':
-        wallet.balance += amount
-        return wallet
+def get_wallets_for_transactions(user_id, wallet_ids):
+    """Versi massal get_wallet_for_transaction (izin tambah): {wallet_id: Wallet atau pesan galat}"""
+    wallet_ids = set(wallet_ids)
+    wallets = {wallet.id: wallet for wallet in Wallet.query.filter(Wallet.id.in_(wallet_ids))}
+    permissions = dict(
+        db.session.query(SharedWallet.wallet_id, SharedWallet.permission).filter(
+            SharedWallet.shared_with_id == user_id,
+            SharedWallet.wallet_id.in_(wallet_ids),
+        )
+    )
+
+    resolved = {}
+    for wallet_id in wallet_ids:
+        wallet = wallets.get(wallet_id)
+        if not wallet:
+            resolved[wallet_id] = 'Dompet tidak ditemukan'
+        elif wallet.user_id == user_id:
+            resolved[wallet_id] = wallet
+        elif wallet_id not in permissions:
+            resolved[wallet_id] = 'Anda tidak memiliki akses ke dompet yang dipilih'
+        elif permissions[wallet_id] != 'add':
+            resolved[wallet_id] = 'Anda tidak memiliki izin menambah transaksi di dompet ini'
+        else:
+            resolved[wallet_id] = wallet
+    return resolved
+
+
+def balance_update_statement(wallet_id, delta, guard=True):
+    """UPDATE wallet SET balance = balance + :delta [AND balance + :delta >= 0] RETURNING balance"""
+    stmt = db.update(Wallet).where(Wallet.id == wallet_id)
+    if guard:
+        stmt = stmt.where(Wallet.balance + delta >= 0)
+    return stmt.values(balance=Wallet.balance + delta).returning(Wallet.balance)
+
+
+def adjust_wallet_balance(wallet, delta, guard=True, error_message='Saldo tidak mencukupi'):
+    """Ubah saldo dengan satu UPDATE atomik di database.
+
+    Dengan `guard`, UPDATE hanya berlaku jika saldo akhir tidak negatif, jadi cek
+    saldo dan penulisannya tidak bisa diselingi penulis lain pada dompet yang sama.
+    """
+    result = db.session.execute(
+        balance_update_statement(wallet.id, delta, guard),
+        execution_options={'synchronize_session': False},
+    )
+    updated = result.all()
+    if len(updated) != 1:
+        raise ValueError(error_message)
+
+    # Samakan objek di session dengan nilai di database tanpa menandainya dirty
+    set_committed_value(wallet, 'balance', updated[0][0])
+    return wallet
 
-    if wallet.balance < amount:
-        raise ValueError('Saldo tidak mencukupi')
 
-    wallet.balance -= amount
-    return wallet
+def transaction_delta(amount, transaction_type):
+    return amount if transaction_type == 'income' else -amount
+
+
+def apply_transaction_effect(wallet, amount, transaction_type):
+    return adjust_wallet_balance(
+        wallet,
+        transaction_delta(amount, transaction_type),
+        guard=transaction_type != 'income',
+    )
 
 
 def revert_transaction_effect(wallet, amount, transaction_type):
-    if transaction_type == 'income':
-        wallet.balance -= amount
-    else:
-        wallet.balance += amount
-    return wallet
+    return adjust_wallet_balance(wallet, -transaction_delta(amount, transaction_type), guard=False)
 
 
 def create_wallet(user_id, name, wallet_type, balance):
     wallet = Wallet(name=name, type=wallet_type, balance=balance, user_id=user_id)
     db.session.add(wallet)
     db.session.commit()
+    bump_data_version(user_id)
     return wallet
 
 
@@ -70,6 +127,7 @@ def update_wallet(wallet, user_id, name, wallet_type, balance):
     wallet.type = wallet_type
     wallet.balance = balance
     db.session.commit()
+    bump_data_version(user_id, *get_wallet_audience(wallet))
     return wallet
 
 
@@ -79,8 +137,10 @@ def delete_wallet(wallet, user_id):
     if wallet.transactions:
         raise ValueError('Dompet memiliki transaksi, tidak dapat dihapus')
 
+    audience = get_wallet_audience(wallet)
     db.session.delete(wallet)
     db.session.commit()
+    bump_data_version(user_id, *audience)
 
 
 def get_or_create_transfer_category(user_id, name, category_type):
@@ -102,8 +162,8 @@ def transfer_balance(user_id, from_wallet_id, to_wallet_id, amount, fee=0, descr
         from_wallet = get_owned_wallet(user_id, from_wallet_id)
         to_wallet = get_owned_wallet(user_id, to_wallet_id)
 
-        if from_wallet.balance < amount + fee:
-            raise ValueError('Saldo tidak mencukupi (termasuk biaya transfer)')
+        adjust_wallet_balance(from_wallet, -(amount + fee), error_message='Saldo tidak mencukupi (termasuk biaya transfer)')
+        adjust_wallet_balance(to_wallet, amount, guard=False)
 
         transfer_time = normalize_wib_storage(now_wib())
         transfer_out_cat = get_or_create_transfer_category(user_id, 'Transfer (Keluar)', 'expense')
@@ -118,8 +178,9 @@ def transfer_balance(user_id, from_wallet_id, to_wallet_id, amount, fee=0, descr
             user_id=user_id,
             date=transfer_time,
         )
-        from_wallet.balance -= amount
         db.session.add(trans_out)
+        record_transaction(trans_out)
+        record_budget_usage(trans_out)
 
         trans_in = Transaction(
             amount=amount,
@@ -130,8 +191,9 @@ def transfer_balance(user_id, from_wallet_id, to_wallet_id, amount, fee=0, descr
             user_id=user_id,
             date=transfer_time,
         )
-        to_wallet.balance += amount
         db.session.add(trans_in)
+        record_transaction(trans_in)
+        record_budget_usage(trans_in)
 
         if fee > 0:
             fee_cat = get_or_create_transfer_category(user_id, 'Biaya Transfer', 'expense')
@@ -144,10 +206,12 @@ def transfer_balance(user_id, from_wallet_id, to_wallet_id, amount, fee=0, descr
                 user_id=user_id,
                 date=transfer_time,
             )
-            from_wallet.balance -= fee
             db.session.add(trans_fee)
+            record_transaction(trans_fee)
+            record_budget_usage(trans_fee)
 
         db.session.commit()
+        bump_data_version(user_id, *get_wallet_audience(from_wallet, to_wallet))
         return {'from_wallet': from_wallet, 'to_wallet': to_wallet, 'amount': amount, 'fee': fee}
     except Exception:
         db.session.rollback()
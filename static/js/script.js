@@ -5,6 +5,8 @@ document.addEventListener('DOMContentLoaded', function() {
     initializeGlobalSkeletonLoading();
     initializePaginationUX();
     initializeIOSModalFix();
+    initializeBudgetAlerts();
+    initializeOfflineOutbox();
 
     // Konfirmasi hapus dengan sweet alert style (opsional)
     const deleteLinks = document.querySelectorAll('.delete-confirm');
@@ -355,3 +357,96 @@ function initializeIOSModalFix() {
         modal.addEventListener('hidden.bs.modal', unlockBodyScroll);
     });
 }
+
+function showFlashAlert(message, level, icon = 'bi-exclamation-triangle-fill') {
+    let stack = document.querySelector('.flash-stack');
+    if (!stack) {
+        stack = document.createElement('div');
+        stack.className = 'flash-stack';
+        stack.setAttribute('aria-live', 'polite');
+        document.querySelector('main').prepend(stack);
+    }
+
+    const alert = document.createElement('div');
+    alert.className = `alert alert-${level} alert-dismissible fade show shadow-sm flash-alert`;
+    alert.setAttribute('role', 'alert');
+    alert.innerHTML = `<div class="d-flex align-items-start"><i class="bi ${icon} me-2 mt-1"></i><div class="flex-grow-1"></div></div>`
+        + '<button type="button" class="btn-close" data-bs-dismiss="alert" aria-label="Close"></button>';
+    alert.querySelector('.flex-grow-1').textContent = message;
+    stack.appendChild(alert);
+}
+
+function initializeBudgetAlerts() {
+    const alertsUrl = document.body.dataset.budgetAlertsUrl;
+    if (!alertsUrl || !window.fetch) {
+        return;
+    }
+
+    const showAlert = (item) => {
+        showFlashAlert(item.message, item.threshold >= 100 ? 'danger' : 'warning');
+    };
+
+    const poll = () => {
+        fetch(alertsUrl, { credentials: 'same-origin' })
+            .then((response) => response.ok ? response.json() : null)
+            .then((payload) => {
+                const items = payload && payload.data ? payload.data.alerts : [];
+                if (!items.length) {
+                    return;
+                }
+                items.forEach(showAlert);
+                return fetch(alertsUrl + '/read', {
+                    method: 'POST',
+                    credentials: 'same-origin',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ up_to: items[items.length - 1].id }),
+                });
+            })
+            .catch(() => {});
+    };
+
+    poll();
+    setInterval(poll, 60000);
+}
+
+
+// Transaksi yang dibuat saat offline disimpan service worker di outbox IndexedDB
+// dan dikirim sekaligus lewat /api/transactions/batch begitu koneksi kembali.
+function initializeOfflineOutbox() {
+    if (!('serviceWorker' in navigator)) {
+        return;
+    }
+
+    // Hanya halaman yang login; id user memberi tahu worker antrean siapa yang boleh dikirim
+    const userId = document.body.dataset.userId;
+    if (!userId) {
+        return;
+    }
+
+    const requestFlush = () => {
+        navigator.serviceWorker.ready.then((registration) => {
+            if (registration.active) {
+                registration.active.postMessage({ type: 'flush-outbox', user_id: userId });
+            }
+        });
+    };
+
+    navigator.serviceWorker.addEventListener('message', (event) => {
+        const data = event.data || {};
+        if (data.type === 'outbox-queued') {
+            showFlashAlert('Sedang offline: transaksi disimpan dan akan dikirim saat online', 'info', 'bi-cloud-slash');
+        } else if (data.type === 'outbox-synced') {
+            if (data.saved) {
+                showFlashAlert(`${data.saved} transaksi offline berhasil dikirim`, 'success', 'bi-cloud-check');
+            }
+            (data.failed || []).forEach((item) => {
+                showFlashAlert(`Transaksi offline gagal disimpan: ${item.message}`, 'danger');
+            });
+        }
+    });
+
+    window.addEventListener('online', requestFlush);
+    if (navigator.onLine) {
+        requestFlush();
+    }
+}
@@ -1,12 +1,32 @@
-const CACHE_NAME = 'finance-app-v5';
+// Dibuat oleh `flask build-assets`: versi + peta nama aset ber-hash.
+// Browser ikut memeriksa perubahan file ini, jadi CACHE_NAME tidak perlu dinaikkan manual.
+try {
+  importScripts('/static/dist/sw-assets.js');
+} catch (e) {
+  // Aset belum di-build (mode pengembangan)
+}
 
+const ASSET_MANIFEST = self.ASSET_MANIFEST || {};
+const CACHE_NAME = 'finance-app-' + (self.ASSET_VERSION || 'dev');
+// Cache data user: dipisah dari aset dan dihapus saat logout
+const API_CACHE = 'finance-api-v1';
+const PAGE_CACHE = 'finance-pages-v1';
+const KNOWN_CACHES = [CACHE_NAME, API_CACHE, PAGE_CACHE];
+
+const API_CACHE_MAX_ENTRIES = 60;
+const PAGE_CACHE_MAX_ENTRIES = 20;
+const PAGE_CACHE_MAX_AGE = 7 * 24 * 3600;
+const FETCHED_AT_HEADER = 'sw-fetched-at';
+
+function assetUrl(path) {
+  return '/static/' + (ASSET_MANIFEST[path] || path);
+}
+
+// Halaman tidak di-precache: tanpa sesi login hasilnya hanya redirect ke /login
 const urlsToCache = [
-  '/',
-  '/dashboard',
-  '/transactions',
   '/offline',
-  '/static/css/style.css',
-  '/static/js/script.js'
+  assetUrl('css/style.css'),
+  assetUrl('js/script.js')
 ];
 
 // 🟢 INSTALL
@@ -26,7 +46,7 @@ self.addEventListener('activate', event => {
     caches.keys().then(names => {
       return Promise.all(
         names.map(name => {
-          if (name !== CACHE_NAME) {
+          if (!KNOWN_CACHES.includes(name)) {
             return caches.delete(name);
           }
         })
@@ -35,40 +55,379 @@ self.addEventListener('activate', event => {
   );
 });
 
-// 🟢 FETCH (CORE LOGIC)
-self.addEventListener('fetch', event => {
-  if (event.request.method !== 'GET') return;
-
-  event.respondWith(
-    caches.match(event.request, { ignoreSearch: true }).then(cached => {
-      
-      // ✅ kalau ada di cache → langsung pakai
-      if (cached) {
-        return cached;
+// ⚙️ KEBIJAKAN CACHE DARI SERVER
+// Cache-Control: no-store -> jangan disimpan; stale-while-revalidate=N -> salinan
+// boleh dipakai paling lama N detik sambil diperbarui di belakang.
+function cachePolicy(response) {
+  const header = response.headers.get('Cache-Control') || '';
+  const swr = /stale-while-revalidate=(\d+)/.exec(header);
+  return {
+    noStore: /no-store/.test(header),
+    maxStale: swr ? parseInt(swr[1], 10) : 0
+  };
+}
+
+function isFresh(response, maxAge) {
+  const fetchedAt = parseInt(response.headers.get(FETCHED_AT_HEADER) || '0', 10);
+  return Date.now() - fetchedAt <= maxAge * 1000;
+}
+
+// Simpan dengan cap waktu agar umur entri bisa dicek, lalu buang entri tertua
+async function putBounded(cacheName, request, response, maxEntries) {
+  const headers = new Headers(response.headers);
+  headers.set(FETCHED_AT_HEADER, String(Date.now()));
+  const body = await response.blob();
+  const stamped = new Response(body, { status: response.status, statusText: response.statusText, headers });
+
+  const cache = await caches.open(cacheName);
+  // Hapus dulu agar entri yang diperbarui pindah ke urutan paling baru
+  await cache.delete(request);
+  await cache.put(request, stamped);
+
+  const keys = await cache.keys();
+  await Promise.all(keys.slice(0, Math.max(0, keys.length - maxEntries)).map(key => cache.delete(key)));
+}
+
+// 🔒 Aset ber-hash: isinya tidak pernah berubah untuk URL yang sama
+async function cacheFirst(request) {
+  const cached = await caches.match(request, { cacheName: CACHE_NAME });
+  if (cached) {
+    return cached;
+  }
+
+  const response = await fetch(request);
+  if (response.ok) {
+    const cache = await caches.open(CACHE_NAME);
+    await cache.put(request, response.clone());
+  }
+  return response;
+}
+
+// 🔄 API/JSON: tampilkan salinan per URL lengkap, perbarui di belakang
+async function staleWhileRevalidate(event) {
+  const request = event.request;
+  const cache = await caches.open(API_CACHE);
+  let cached = await cache.match(request);
+  if (cached && !isFresh(cached, cachePolicy(cached).maxStale)) {
+    // Lewat batas umur dari server: buang, jangan ditampilkan lagi
+    await cache.delete(request);
+    cached = undefined;
+  }
+
+  // cache: 'no-cache' memaksa validasi ke server (If-None-Match -> 304 murah)
+  const network = fetch(request, { cache: 'no-cache' }).then(async response => {
+    const policy = cachePolicy(response);
+    if (response.ok && !policy.noStore && policy.maxStale > 0) {
+      await putBounded(API_CACHE, request, response.clone(), API_CACHE_MAX_ENTRIES);
+    } else if (!response.ok || policy.noStore) {
+      await cache.delete(request);
+    }
+    return response;
+  });
+
+  if (cached) {
+    event.waitUntil(network.catch(() => undefined));
+    return cached;
+  }
+  return network;
+}
+
+// 🌐 Halaman HTML: selalu coba jaringan, salinan hanya untuk offline
+async function networkFirst(request) {
+  try {
+    const response = await fetch(request);
+    const contentType = response.headers.get('Content-Type') || '';
+    if (response.ok && contentType.startsWith('text/html') && !cachePolicy(response).noStore) {
+      await putBounded(PAGE_CACHE, request, response.clone(), PAGE_CACHE_MAX_ENTRIES);
+    }
+    return response;
+  } catch (error) {
+    const cached = await caches.match(request, { cacheName: PAGE_CACHE });
+    if (cached && isFresh(cached, PAGE_CACHE_MAX_AGE)) {
+      return cached;
+    }
+    // 📵 fallback kalau offline
+    return caches.match('/offline');
+  }
+}
+
+// 📮 OUTBOX OFFLINE: transaksi baru disimpan di IndexedDB lalu dikirim sekali batch
+const OUTBOX_DB = 'finance-outbox';
+const OUTBOX_DB_VERSION = 2;
+const OUTBOX_STORE = 'transactions';
+// Menyimpan user yang sedang login (dikabarkan halaman), karena worker bisa dimatikan kapan saja
+const OUTBOX_META_STORE = 'meta';
+const OUTBOX_SYNC_TAG = 'outbox-sync';
+const OUTBOX_BATCH_SIZE = 100;
+const OUTBOX_FIELDS = ['client_id', 'amount', 'category_id', 'wallet_id', 'type', 'description', 'date'];
+
+function openOutbox() {
+  return new Promise((resolve, reject) => {
+    const request = indexedDB.open(OUTBOX_DB, OUTBOX_DB_VERSION);
+    request.onupgradeneeded = () => {
+      const db = request.result;
+      // Antrean versi 1 tidak mencatat pemiliknya, jadi tidak aman dikirim atas nama siapa pun
+      if (db.objectStoreNames.contains(OUTBOX_STORE)) {
+        db.deleteObjectStore(OUTBOX_STORE);
       }
+      db.createObjectStore(OUTBOX_STORE, { keyPath: 'client_id' });
+      db.createObjectStore(OUTBOX_META_STORE, { keyPath: 'key' });
+    };
+    request.onsuccess = () => resolve(request.result);
+    request.onerror = () => reject(request.error);
+  });
+}
 
-      // 🌐 kalau tidak ada → ambil dari network
-      return fetch(event.request)
-        .then(networkResponse => {
-          // cache response jika valid
-          if (
-            networkResponse &&
-            networkResponse.status === 200 &&
-            event.request.url.startsWith(self.location.origin)
-          ) {
-            const clone = networkResponse.clone();
-
-            caches.open(CACHE_NAME).then(cache => {
-              cache.put(event.request, clone);
-            });
-          }
+async function withOutbox(mode, callback, storeName = OUTBOX_STORE) {
+  const db = await openOutbox();
+  return new Promise((resolve, reject) => {
+    const tx = db.transaction(storeName, mode);
+    const request = callback(tx.objectStore(storeName));
+    tx.oncomplete = () => {
+      db.close();
+      resolve(request ? request.result : undefined);
+    };
+    tx.onerror = () => {
+      db.close();
+      reject(tx.error);
+    };
+  });
+}
 
-          return networkResponse;
-        })
-        .catch(() => {
-          // 📵 fallback kalau offline
-          return caches.match('/offline');
-        });
-    })
+async function getOutboxOwner() {
+  const entry = await withOutbox('readonly', store => store.get('owner'), OUTBOX_META_STORE);
+  return entry ? entry.value : null;
+}
+
+function setOutboxOwner(userId) {
+  return withOutbox(
+    'readwrite',
+    store => (userId ? store.put({ key: 'owner', value: String(userId) }) : store.delete('owner')),
+    OUTBOX_META_STORE
   );
-});
\ No newline at end of file
+}
+
+function outboxItem(source) {
+  const item = {};
+  OUTBOX_FIELDS.forEach(field => {
+    const value = typeof source.get === 'function' ? source.get(field) : source[field];
+    if (value !== undefined && value !== null && value !== '') {
+      item[field] = value;
+    }
+  });
+  return item;
+}
+
+async function notifyClients(message) {
+  const clientList = await self.clients.matchAll({ includeUncontrolled: true });
+  clientList.forEach(client => client.postMessage(message));
+}
+
+async function requestOutboxSync() {
+  if (self.registration.sync) {
+    try {
+      await self.registration.sync.register(OUTBOX_SYNC_TAG);
+    } catch (e) {
+      // Background Sync ditolak; halaman tetap meminta flush saat event 'online'
+    }
+  }
+}
+
+// client_id dipasang sebelum request pertama, jadi bila server sempat menyimpan
+// tapi jawabannya hilang, kiriman ulang dari outbox dikenali sebagai duplikat
+async function prepareTransactionPost(request, isJson) {
+  if (isJson) {
+    const body = await request.clone().json();
+    body.client_id = body.client_id || self.crypto.randomUUID();
+    return {
+      item: outboxItem(body),
+      request: new Request(request.url, {
+        method: 'POST',
+        headers: request.headers,
+        body: JSON.stringify(body),
+        credentials: 'same-origin'
+      })
+    };
+  }
+
+  const form = await request.clone().formData();
+  if (!form.get('client_id')) {
+    form.set('client_id', self.crypto.randomUUID());
+  }
+  return {
+    item: outboxItem(form),
+    request: new Request(request.url, {
+      method: 'POST',
+      body: new URLSearchParams(form),
+      credentials: 'same-origin',
+      // Redirect halaman dikembalikan apa adanya ke browser
+      redirect: 'manual'
+    })
+  };
+}
+
+async function sendOrQueueTransaction(event, isJson) {
+  const prepared = await prepareTransactionPost(event.request, isJson);
+  try {
+    return await fetch(prepared.request);
+  } catch (error) {
+    // Tanpa pemilik yang jelas transaksi tidak diantrekan: bisa terkirim ke akun lain
+    const owner = await getOutboxOwner();
+    if (!owner) {
+      if (isJson) {
+        return new Response(JSON.stringify({ status: 'error', message: 'Sedang offline' }), {
+          status: 503,
+          headers: { 'Content-Type': 'application/json' }
+        });
+      }
+      return caches.match('/offline');
+    }
+    await withOutbox('readwrite', store => store.put({ ...prepared.item, owner }));
+    await requestOutboxSync();
+    await notifyClients({ type: 'outbox-queued', client_id: prepared.item.client_id });
+    if (isJson) {
+      return new Response(JSON.stringify({ status: 'queued', data: { client_id: prepared.item.client_id } }), {
+        status: 202,
+        headers: { 'Content-Type': 'application/json' }
+      });
+    }
+    return Response.redirect(new URL('/transactions', self.location.origin).href, 303);
+  }
+}
+
+async function sendOutbox() {
+  // Hanya antrean milik user yang sedang login; milik user lain menunggu user itu login lagi
+  const owner = await getOutboxOwner();
+  if (!owner) {
+    return;
+  }
+  const items = (await withOutbox('readonly', store => store.getAll())).filter(item => item.owner === owner);
+  let saved = 0;
+  const failed = [];
+
+  for (let start = 0; start < items.length; start += OUTBOX_BATCH_SIZE) {
+    const chunk = items.slice(start, start + OUTBOX_BATCH_SIZE);
+    const response = await fetch('/api/transactions/batch', {
+      method: 'POST',
+      credentials: 'same-origin',
+      headers: { 'Content-Type': 'application/json', 'Accept': 'application/json' },
+      body: JSON.stringify({
+        mode: 'best_effort',
+        user_id: owner,
+        transactions: chunk.map(item => outboxItem(item))
+      })
+    });
+
+    // Sesi habis (redirect ke login), sesi milik user lain (409) atau server bermasalah:
+    // simpan dulu, coba lagi nanti
+    const contentType = response.headers.get('Content-Type') || '';
+    if (response.status >= 500 || response.status === 409 || !contentType.includes('application/json')) {
+      throw new Error('Outbox belum bisa dikirim');
+    }
+    const payload = await response.json();
+    const results = payload.data && payload.data.results;
+    if (!results) {
+      throw new Error(payload.message || 'Outbox belum bisa dikirim');
+    }
+
+    // Item yang ditolak validasi tidak akan berhasil bila dikirim ulang, jadi ikut dihapus
+    results.forEach(result => {
+      if (result.status === 'error') {
+        failed.push({ client_id: chunk[result.index].client_id, message: result.message });
+      } else {
+        saved += 1;
+      }
+    });
+    await withOutbox('readwrite', store => chunk.forEach(item => store.delete(item.client_id)));
+  }
+
+  if (items.length) {
+    await notifyClients({ type: 'outbox-synced', saved, failed });
+  }
+}
+
+let outboxFlush = null;
+
+function flushOutbox() {
+  if (!outboxFlush) {
+    outboxFlush = sendOutbox().finally(() => {
+      outboxFlush = null;
+    });
+  }
+  return outboxFlush;
+}
+
+self.addEventListener('sync', event => {
+  if (event.tag === OUTBOX_SYNC_TAG) {
+    event.waitUntil(flushOutbox());
+  }
+});
+
+self.addEventListener('message', event => {
+  if (event.data && event.data.type === 'flush-outbox') {
+    // Halaman menyertakan user yang login, jadi outbox tidak dikirim dengan cookie user lain
+    event.waitUntil(
+      setOutboxOwner(event.data.user_id)
+        .then(() => flushOutbox())
+        .catch(() => undefined)
+    );
+  }
+});
+
+async function clearUserCaches() {
+  await Promise.all([caches.delete(API_CACHE), caches.delete(PAGE_CACHE), setOutboxOwner(null)]);
+}
+
+// 🗺️ TABEL ROUTING: urutan penting, aturan pertama yang cocok dipakai
+const routes = [
+  {
+    match: (url, request) => request.mode === 'navigate' && url.pathname === '/logout',
+    handle: event => {
+      event.waitUntil(clearUserCaches());
+      return fetch(event.request);
+    }
+  },
+  {
+    match: url => url.pathname.startsWith('/static/dist/'),
+    handle: event => cacheFirst(event.request)
+  },
+  {
+    // Aset tanpa hash (mode pengembangan, ikon): jaringan dulu, precache untuk offline
+    match: url => url.pathname.startsWith('/static/'),
+    handle: event => fetch(event.request).catch(() => caches.match(event.request, { cacheName: CACHE_NAME }))
+  },
+  {
+    match: url => url.pathname.startsWith('/api/'),
+    handle: event => staleWhileRevalidate(event)
+  },
+  {
+    match: (url, request) => request.mode === 'navigate',
+    handle: event => networkFirst(event.request)
+  }
+];
+
+// Pembuatan transaksi yang boleh masuk outbox saat offline (nilai: body berupa JSON?)
+const outboxRoutes = {
+  '/transaction/add': false,
+  '/api/transactions': true
+};
+
+// 🟢 FETCH (CORE LOGIC)
+self.addEventListener('fetch', event => {
+  const request = event.request;
+  const url = new URL(request.url);
+  if (url.origin !== self.location.origin) return;
+
+  if (request.method === 'POST' && url.pathname in outboxRoutes) {
+    event.respondWith(sendOrQueueTransaction(event, outboxRoutes[url.pathname]));
+    return;
+  }
+  if (request.method !== 'GET') return;
+
+  const route = routes.find(candidate => candidate.match(url, request));
+  if (!route) {
+    // Selain itu (ekspor, unduhan, dll.) langsung ke jaringan
+    return;
+  }
+  event.respondWith(route.handle(event));
+});
@@ -0,0 +1,64 @@
+"""Ekspor ber-filter pencarian di proses pool harus memberi baris yang sama dengan app web"""
+import os
+import tempfile
+
+os.environ['DB_PATH'] = os.environ.get('TEST_DB_PATH') or os.path.join(tempfile.mkdtemp(), 'test.db')
+os.environ['TEST_DB_PATH'] = os.environ['DB_PATH']  # proses pool (spawn) memakai database yang sama
+os.environ['EXPORT_JOB_EXECUTOR'] = 'process'
+
+import json  # noqa: E402
+
+from openpyxl import load_workbook  # noqa: E402
+
+from app import app  # noqa: E402
+from models import db, Category, ExportJob, Transaction, User, Wallet  # noqa: E402
+from services.job_service import execute_job, submit_background  # noqa: E402
+from services.transaction_service import apply_transaction_filters  # noqa: E402
+from utils.datetime_utils import now_wib  # noqa: E402
+
+
+def test_search_filtered_export_in_worker_matches_web():
+    filters = {'search': 'Makanan'}
+    with app.app_context():
+        user = User(username='pencari')
+        user.set_password('rahasia')
+        db.session.add(user)
+        db.session.commit()
+
+        food = Category(name='Makanan', type='expense', user_id=user.id)
+        other = Category(name='Transport', type='expense', user_id=user.id)
+        wallet = Wallet(name='Tunai', type='cash', balance=0, user_id=user.id)
+        db.session.add_all([food, other, wallet])
+        db.session.commit()
+
+        # Kata kunci hanya ada di nama kategori, jadi LIKE pada deskripsi tidak menemukannya
+        date = now_wib().replace(tzinfo=None)
+        for description, category in [('nasi goreng', food), ('bakso', food), ('ojek', other)]:
+            db.session.add(Transaction(
+                amount=10000, description=description, type='expense', date=date,
+                category_id=category.id, wallet_id=wallet.id, user_id=user.id,
+            ))
+        db.session.commit()
+
+        expected = sorted(
+            transaction.description
+            for transaction in apply_transaction_filters(Transaction.query, user.id, filters)
+        )
+        assert expected == ['bakso', 'nasi goreng']
+
+        job = ExportJob(id='search-export', user_id=user.id, kind='excel', params=json.dumps({'filters': filters}))
+        db.session.add(job)
+        db.session.commit()
+
+        submit_background(execute_job, job.id).result(timeout=120)
+
+        db.session.expire_all()
+        job = db.session.get(ExportJob, 'search-export')
+        assert job.status == 'done', job.error
+        try:
+            sheet = load_workbook(job.file_path, read_only=True).active
+            exported = sorted(row[1] for row in sheet.iter_rows(min_row=2, values_only=True))
+        finally:
+            os.remove(job.file_path)
+
+    assert exported == expected
@@ -0,0 +1,64 @@
+import time
+from collections import Counter
+
+from flask_caching import Cache
+
+cache = Cache()
+
+# Penghitung hit/miss per proses untuk cache yang berbasis versi data user
+cache_stats = Counter()
+
+
+def _data_version_key(user_id):
+    return f'user-data-version:{user_id}'
+
+
+def get_data_version(user_id):
+    key = _data_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Mulai dari timestamp, bukan 1, agar versi yang hilang dari cache tidak
+        # bertabrakan dengan entri lama yang masih tersimpan
+        version = int(time.time() * 1000)
+        cache.set(key, version, timeout=0)
+    return version
+
+
+def bump_data_version(*user_ids):
+    for user_id in {user_id for user_id in user_ids if user_id is not None}:
+        key = _data_version_key(user_id)
+        if cache.get(key) is None:
+            cache.set(key, int(time.time() * 1000), timeout=0)
+        else:
+            cache.cache.inc(key)
+        cache_stats['invalidations'] += 1
+
+
+def user_cache_key(user_id, namespace, *parts):
+    suffix = ':'.join(str(part) for part in parts)
+    return f'{namespace}:{user_id}:{get_data_version(user_id)}:{suffix}'
+
+
+def get_or_set_user_cache(user_id, namespace, parts, builder, timeout=None):
+    key = user_cache_key(user_id, namespace, *parts)
+    value = cache.get(key)
+    if value is not None:
+        cache_stats['hits'] += 1
+        return value
+
+    cache_stats['misses'] += 1
+    value = builder()
+    cache.set(key, value, timeout=timeout)
+    return value
+
+
+def get_cache_stats():
+    hits = cache_stats['hits']
+    misses = cache_stats['misses']
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'invalidations': cache_stats['invalidations'],
+        'hit_ratio': hits / lookups if lookups else 0.0,
+    }
@@ -1,6 +1,8 @@
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
+from dateutil.relativedelta import relativedelta
+
 WIB = ZoneInfo("Asia/Jakarta")
 
 
@@ -13,4 +15,56 @@ def to_wib(dt):
         return None
     if dt.tzinfo is None:
         return dt.replace(tzinfo=WIB)
-    return dt.astimezone(WIB)
\ No newline at end of file
+    return dt.astimezone(WIB)
+
+
+def month_bounds(year, month):
+    """Rentang setengah terbuka [awal bulan, awal bulan berikutnya)"""
+    start = datetime(int(year), int(month), 1)
+    return start, start + relativedelta(months=1)
+
+
+def year_bounds(year):
+    start = datetime(int(year), 1, 1)
+    return start, start + relativedelta(years=1)
+
+
+def last_n_months_bounds(reference, months):
+    """Rentang [start, end) untuk N bulan terakhir, termasuk bulan reference"""
+    end = datetime(reference.year, reference.month, 1) + relativedelta(months=1)
+    return end - relativedelta(months=months), end
+
+
+BUCKET_GRANULARITIES = ('day', 'week', 'month', 'year')
+BUCKET_LABEL_FORMATS = {'day': '%d/%m', 'week': '%d/%m', 'month': '%m/%Y', 'year': '%Y'}
+
+
+def bucket_start(dt, granularity):
+    """Awal bucket (tanggal) yang memuat dt; minggu dimulai hari Senin"""
+    day = dt.date() if isinstance(dt, datetime) else dt
+    if granularity == 'day':
+        return day
+    if granularity == 'week':
+        return day - relativedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    if granularity == 'year':
+        return day.replace(month=1, day=1)
+    raise ValueError(f'Granularitas tidak dikenal: {granularity}')
+
+
+def iter_buckets(start, end, granularity):
+    """Yield awal setiap bucket yang beririsan dengan rentang [start, end)"""
+    step = {
+        'day': relativedelta(days=1),
+        'week': relativedelta(weeks=1),
+        'month': relativedelta(months=1),
+        'year': relativedelta(years=1),
+    }[granularity]
+    current = bucket_start(start, granularity)
+    if isinstance(end, datetime):
+        # Bucket ikut jika awalnya masih sebelum end, walau end jatuh di tengah hari
+        end = end.date() if end.time() == datetime.min.time() else end.date() + relativedelta(days=1)
+    while current < end:
+        yield current
+        current += step
@@ -0,0 +1,118 @@
+import gzip
+import hashlib
+from collections import Counter
+from functools import wraps
+
+from flask import current_app, make_response, request
+from flask_login import current_user
+
+from utils.cache_utils import get_data_version
+from utils.datetime_utils import now_wib
+
+try:
+    import brotli
+except ImportError:  # opsional: tanpa paket brotli hanya gzip yang ditawarkan
+    brotli = None
+
+# Penghitung per proses: berapa GET bersyarat yang cukup dijawab 304
+conditional_stats = Counter()
+
+
+def data_version_etag(user_id):
+    """Validator murah dari versi data user, URL + query string, dan tanggal hari ini.
+
+    Tanggal ikut karena endpoint memakai bulan/rentang berjalan sebagai default.
+    """
+    raw = f'{user_id}:{get_data_version(user_id)}:{request.full_path}:{now_wib().date().isoformat()}'
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def conditional_by_data_version(view):
+    """Jawab If-None-Match dengan 304 sebelum view (dan query transaksinya) dijalankan"""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        etag = data_version_etag(current_user.id)
+        if request.if_none_match.contains_weak(etag):
+            conditional_stats['not_modified'] += 1
+            response = make_response('', 304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            conditional_stats['full'] += 1
+
+        # Weak ETag agar tetap valid setelah response dikompresi
+        response.set_etag(etag, weak=True)
+        # Cache HTTP browser selalu validasi ulang; stale-while-revalidate dibaca service
+        # worker sebagai batas umur salinan yang boleh ditampilkan sambil memperbarui
+        response.headers['Cache-Control'] = (
+            f"private, no-cache, stale-while-revalidate={current_app.config['API_STALE_WHILE_REVALIDATE']}"
+        )
+        return response
+
+    return wrapper
+
+
+def get_conditional_stats():
+    not_modified = conditional_stats['not_modified']
+    full = conditional_stats['full']
+    total = not_modified + full
+    return {
+        'not_modified': not_modified,
+        'full': full,
+        'not_modified_ratio': not_modified / total if total else 0.0,
+    }
+
+
+COMPRESSIBLE_MIMETYPES = {
+    'text/html',
+    'text/css',
+    'text/plain',
+    'text/csv',
+    'application/json',
+    'application/javascript',
+    'text/javascript',
+    'application/manifest+json',
+    'image/svg+xml',
+}
+
+
+def supported_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def compress_bytes(data, encoding, level):
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def negotiate_encoding(accept_encodings):
+    """Pilih encoding terbaik menurut q-value Accept-Encoding; None bila tidak ada yang cocok"""
+    return accept_encodings.best_match(supported_encodings())
+
+
+def compress_response(response, min_size=500, gzip_level=6, brotli_quality=4):
+    """Kompres response dinamis (HTML/JSON) sesuai Accept-Encoding bila cukup besar"""
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or response.is_streamed
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+
+    encoding = negotiate_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    response.set_data(compress_bytes(data, encoding, brotli_quality if encoding == 'br' else gzip_level))
+    response.headers['Content-Encoding'] = encoding
+    return response
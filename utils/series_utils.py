@@ -0,0 +1,50 @@
+from sqlalchemy import func
+
+from utils.datetime_utils import BUCKET_GRANULARITIES
+
+
+def bucket_expression(column, granularity):
+    """Ekspresi SQLite 'YYYY-MM-DD' awal bucket untuk kolom datetime (minggu mulai Senin)"""
+    if granularity == 'day':
+        return func.date(column)
+    if granularity == 'week':
+        return func.date(column, '-6 days', 'weekday 1')
+    if granularity == 'month':
+        return func.strftime('%Y-%m-01', column)
+    if granularity == 'year':
+        return func.strftime('%Y-01-01', column)
+    raise ValueError(f"Granularitas harus salah satu dari {', '.join(BUCKET_GRANULARITIES)}")
+
+
+def lttb_indices(values, threshold):
+    """Largest-Triangle-Three-Buckets: indeks titik yang dipertahankan saat downsampling"""
+    count = len(values)
+    if threshold >= count or threshold < 3:
+        return list(range(count))
+
+    selected = [0]
+    bucket_size = (count - 2) / (threshold - 2)
+    anchor = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+
+        # Rata-rata bucket berikutnya sebagai titik ketiga segitiga
+        next_start = end
+        next_end = min(int((bucket + 2) * bucket_size) + 1, count)
+        if next_start >= next_end:
+            next_start, next_end = count - 1, count
+        avg_x = (next_start + next_end - 1) / 2
+        avg_y = sum(values[next_start:next_end]) / (next_end - next_start)
+
+        best_index, best_area = start, -1.0
+        anchor_y = values[anchor]
+        for index in range(start, end):
+            area = abs((anchor - avg_x) * (values[index] - anchor_y) - (anchor - index) * (avg_y - anchor_y))
+            if area > best_area:
+                best_index, best_area = index, area
+        selected.append(best_index)
+        anchor = best_index
+
+    selected.append(count - 1)
+    return selected
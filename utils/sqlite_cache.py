@@ -0,0 +1,163 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from flask_caching.backends.base import BaseCache
+
+
+class SQLiteCache(BaseCache):
+    """Backend Flask-Caching berbasis file SQLite yang dipakai bersama semua worker.
+
+    Entri bertahan saat worker gunicorn di-recycle, invalidasi (termasuk
+    counter versi data lewat inc) langsung terlihat di proses lain, dan
+    ukuran dibatasi dengan eviksi LRU per jumlah entri maupun total byte.
+    """
+
+    # accessed_at hanya diperbarui jika sudah lebih tua dari ini, agar get tidak selalu menulis
+    TOUCH_INTERVAL = 5
+
+    def __init__(self, path, threshold=500, max_bytes=64 * 1024 * 1024, default_timeout=300, busy_timeout=5000):
+        super().__init__(default_timeout=default_timeout)
+        self.path = path
+        self.threshold = threshold
+        self.max_bytes = max_bytes
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connection() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache_entry ('
+                'key TEXT PRIMARY KEY, value BLOB, expires_at REAL NOT NULL, '
+                'accessed_at REAL NOT NULL, size INTEGER NOT NULL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS idx_cache_entry_accessed ON cache_entry (accessed_at)')
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        kwargs.update(dict(
+            path=config.get('CACHE_SQLITE_PATH') or os.path.join(app.instance_path, 'cache.db'),
+            threshold=config['CACHE_THRESHOLD'],
+            max_bytes=config.get('CACHE_MAX_BYTES', 64 * 1024 * 1024),
+        ))
+        return cls(*args, **kwargs)
+
+    def _connection(self):
+        # Koneksi per thread dan per proses: koneksi sqlite tidak boleh diwarisi lewat fork
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout / 1000, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _expires_at(self, timeout):
+        timeout = self._normalize_timeout(timeout)
+        return time.time() + timeout if timeout > 0 else 0
+
+    @staticmethod
+    def _dump(value):
+        # Integer disimpan apa adanya supaya inc/dec bisa atomik di SQL
+        if type(value) is int:
+            return value
+        return sqlite3.Binary(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+    @staticmethod
+    def _load(raw):
+        if isinstance(raw, int):
+            return raw
+        return pickle.loads(raw)
+
+    def _cull(self, connection):
+        now = time.time()
+        connection.execute('DELETE FROM cache_entry WHERE expires_at != 0 AND expires_at <= ?', (now,))
+        connection.execute(
+            'DELETE FROM cache_entry WHERE key IN ('
+            'SELECT key FROM cache_entry ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+            (self.threshold,),
+        )
+        if self.max_bytes:
+            connection.execute(
+                'DELETE FROM cache_entry WHERE key IN ('
+                'SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY accessed_at DESC) AS used '
+                'FROM cache_entry) WHERE used > ?)',
+                (self.max_bytes,),
+            )
+
+    def get(self, key):
+        connection = self._connection()
+        now = time.time()
+        row = connection.execute(
+            'SELECT value, accessed_at FROM cache_entry WHERE key = ? AND (expires_at = 0 OR expires_at > ?)',
+            (key, now),
+        ).fetchone()
+        if row is None:
+            return None
+
+        if now - row[1] > self.TOUCH_INTERVAL:
+            try:
+                connection.execute('UPDATE cache_entry SET accessed_at = ? WHERE key = ?', (now, key))
+            except sqlite3.OperationalError:
+                # Lock tulis sedang dipegang proses lain; touch yang gagal hanya menggeser urutan LRU
+                pass
+        try:
+            return self._load(row[0])
+        except (pickle.PickleError, EOFError, AttributeError, ImportError):
+            return None
+
+    def set(self, key, value, timeout=None):
+        dumped = self._dump(value)
+        size = len(dumped) if isinstance(dumped, (bytes, memoryview)) else 8
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute(
+                'INSERT INTO cache_entry (key, value, expires_at, accessed_at, size) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at, '
+                'accessed_at = excluded.accessed_at, size = excluded.size',
+                (key, dumped, self._expires_at(timeout), time.time(), size),
+            )
+            self._cull(connection)
+        return True
+
+    def add(self, key, value, timeout=None):
+        if self.has(key):
+            return False
+        return self.set(key, value, timeout)
+
+    def delete(self, key):
+        cursor = self._connection().execute('DELETE FROM cache_entry WHERE key = ?', (key,))
+        return cursor.rowcount > 0
+
+    def delete_many(self, *keys):
+        return [key for key in keys if self.delete(key)]
+
+    def has(self, key):
+        return self._connection().execute(
+            'SELECT 1 FROM cache_entry WHERE key = ? AND (expires_at = 0 OR expires_at > ?)',
+            (key, time.time()),
+        ).fetchone() is not None
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache_entry')
+        return True
+
+    def inc(self, key, delta=1):
+        now = time.time()
+        row = self._connection().execute(
+            'INSERT INTO cache_entry (key, value, expires_at, accessed_at, size) VALUES (?, ?, 0, ?, 8) '
+            'ON CONFLICT(key) DO UPDATE SET value = value + excluded.value, accessed_at = excluded.accessed_at '
+            'RETURNING value',
+            (key, delta, now),
+        ).fetchone()
+        return row[0] if row else None
+
+    def dec(self, key, delta=1):
+        return self.inc(key, -delta)
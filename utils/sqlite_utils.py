@@ -0,0 +1,88 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_MODES = {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'}
+CHECKPOINT_MODES = {'PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'}
+
+_checkpointer = None
+_checkpointer_pid = None
+_checkpointer_lock = threading.Lock()
+
+
+def apply_sqlite_pragmas(connection, journal_mode='WAL', busy_timeout=5000, mmap_size=0,
+                         wal_autocheckpoint=1000, synchronous='NORMAL'):
+    """Set PRAGMA koneksi; journal_mode WAL bersifat persisten di file database"""
+    journal_mode = journal_mode.upper()
+    if journal_mode not in JOURNAL_MODES:
+        raise ValueError(f'journal_mode tidak dikenal: {journal_mode}')
+
+    cursor = connection.cursor()
+    # busy_timeout lebih dulu agar penggantian journal_mode ikut menunggu lock
+    cursor.execute(f'PRAGMA busy_timeout={int(busy_timeout)}')
+    cursor.execute(f'PRAGMA journal_mode={journal_mode}')
+    cursor.execute(f'PRAGMA synchronous={synchronous}')
+    cursor.execute('PRAGMA cache_size=10000')
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    cursor.execute(f'PRAGMA mmap_size={int(mmap_size)}')
+    if journal_mode == 'WAL':
+        cursor.execute(f'PRAGMA wal_autocheckpoint={int(wal_autocheckpoint)}')
+    cursor.close()
+
+
+def wal_checkpoint(db_path, mode='PASSIVE', busy_timeout=5000):
+    """Jalankan wal_checkpoint; kembalikan (busy, frame_log, frame_checkpointed)"""
+    mode = mode.upper()
+    if mode not in CHECKPOINT_MODES:
+        raise ValueError(f'Mode checkpoint tidak dikenal: {mode}')
+
+    connection = sqlite3.connect(db_path, timeout=busy_timeout / 1000)
+    try:
+        return tuple(connection.execute(f'PRAGMA wal_checkpoint({mode})').fetchone())
+    finally:
+        connection.close()
+
+
+def wal_size(db_path):
+    wal_path = f'{db_path}-wal'
+    return os.path.getsize(wal_path) if os.path.exists(wal_path) else 0
+
+
+def _checkpoint_loop(db_path, interval, truncate_bytes, busy_timeout):
+    while True:
+        time.sleep(interval)
+        try:
+            # PASSIVE tidak pernah menunggu pembaca/penulis; TRUNCATE hanya jika WAL membengkak
+            mode = 'TRUNCATE' if truncate_bytes and wal_size(db_path) > truncate_bytes else 'PASSIVE'
+            busy, frames, checkpointed = wal_checkpoint(db_path, mode, busy_timeout)
+            if busy:
+                logger.info('WAL checkpoint %s busy: %s/%s frame', mode, checkpointed, frames)
+        except sqlite3.Error:
+            logger.warning('WAL checkpoint gagal', exc_info=True)
+
+
+def start_wal_checkpointer(db_path, interval, truncate_bytes=0, busy_timeout=5000):
+    """Mulai thread checkpoint periodik sekali per proses (aman dipanggil berulang)"""
+    global _checkpointer, _checkpointer_pid
+
+    if interval <= 0:
+        return None
+    if _checkpointer_pid == os.getpid():
+        return _checkpointer
+
+    with _checkpointer_lock:
+        if _checkpointer is None or _checkpointer_pid != os.getpid():
+            _checkpointer = threading.Thread(
+                target=_checkpoint_loop,
+                args=(db_path, interval, truncate_bytes, busy_timeout),
+                name='wal-checkpoint',
+                daemon=True,
+            )
+            _checkpointer.start()
+            _checkpointer_pid = os.getpid()
+        return _checkpointer
@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+
+from flask import current_app, url_for
+
+from utils.http_utils import brotli, compress_bytes
+
+ASSET_SOURCE_DIRS = ('css', 'js')
+# Service worker harus tetap di URL yang sama agar registrasinya tidak berubah
+ASSET_EXCLUDE = {'js/sw.js'}
+ASSET_DIST_DIR = 'dist'
+ASSET_MANIFEST_NAME = 'manifest.json'
+SW_ASSETS_SCRIPT = 'sw-assets.js'
+PRECOMPRESSED_SUFFIXES = ('.css', '.js', '.json', '.svg', '.txt')
+PRECOMPRESS_LEVELS = {'gzip': 9, 'br': 11}
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+_manifest_cache = {}
+
+
+def _hashed_name(relative_path, data):
+    stem, ext = os.path.splitext(relative_path)
+    return f'{ASSET_DIST_DIR}/{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}'
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as handle:
+        handle.write(data)
+
+
+def build_static_assets(static_folder):
+    """Salin aset ke static/dist dengan nama ber-hash isi, plus varian .gz/.br.
+
+    File hasil build lama dibiarkan agar halaman lama yang masih dibuka tetap
+    bisa memuat asetnya. Kembalikan manifest {nama asli: nama ber-hash}.
+    """
+    manifest = {}
+    for source_dir in ASSET_SOURCE_DIRS:
+        for root, _, files in os.walk(os.path.join(static_folder, source_dir)):
+            for filename in sorted(files):
+                relative_path = os.path.relpath(os.path.join(root, filename), static_folder).replace(os.sep, '/')
+                if relative_path in ASSET_EXCLUDE:
+                    continue
+
+                with open(os.path.join(static_folder, relative_path), 'rb') as handle:
+                    data = handle.read()
+                hashed_path = _hashed_name(relative_path, data)
+                target = os.path.join(static_folder, hashed_path)
+                _write(target, data)
+                if hashed_path.endswith(PRECOMPRESSED_SUFFIXES):
+                    _write(target + ENCODING_SUFFIXES['gzip'], compress_bytes(data, 'gzip', PRECOMPRESS_LEVELS['gzip']))
+                    if brotli is not None:
+                        _write(target + ENCODING_SUFFIXES['br'], compress_bytes(data, 'br', PRECOMPRESS_LEVELS['br']))
+                manifest[relative_path] = hashed_path
+
+    dist_folder = os.path.join(static_folder, ASSET_DIST_DIR)
+    payload = json.dumps(manifest, indent=2, sort_keys=True)
+    _write(os.path.join(dist_folder, ASSET_MANIFEST_NAME), payload.encode('utf-8'))
+
+    # Dimuat service worker lewat importScripts; isinya berubah setiap aset berubah
+    version = hashlib.sha256(payload.encode('utf-8')).hexdigest()[:12]
+    script = (
+        f'self.ASSET_VERSION = {json.dumps(version)};\n'
+        f'self.ASSET_MANIFEST = {json.dumps(manifest, sort_keys=True)};\n'
+    )
+    _write(os.path.join(dist_folder, SW_ASSETS_SCRIPT), script.encode('utf-8'))
+    _manifest_cache.clear()
+    return manifest
+
+
+def load_asset_manifest(static_folder):
+    """Manifest dibaca sekali per proses; restart worker setelah build ulang"""
+    if static_folder not in _manifest_cache:
+        try:
+            with open(os.path.join(static_folder, ASSET_DIST_DIR, ASSET_MANIFEST_NAME), encoding='utf-8') as handle:
+                manifest = json.load(handle)
+        except (OSError, ValueError):
+            manifest = {}
+        _manifest_cache[static_folder] = (manifest, frozenset(manifest.values()))
+    return _manifest_cache[static_folder][0]
+
+
+def is_hashed_asset(static_folder, path):
+    load_asset_manifest(static_folder)
+    return path in _manifest_cache[static_folder][1]
+
+
+def asset_url(filename):
+    """url_for('static') yang memakai nama ber-hash bila aset sudah di-build"""
+    manifest = load_asset_manifest(current_app.static_folder)
+    return url_for('static', filename=manifest.get(filename, filename))
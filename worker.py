@@ -0,0 +1,30 @@
+"""App Flask minimal untuk proses pool (ekspor, foto profil).
+
+Hanya konfigurasi, database dan cache: tanpa migrasi, backfill dan warm cache
+saat boot di app.py, yang bila dijalankan ulang di setiap proses pool akan
+berebut lock tulis SQLite dengan proses web.
+"""
+from dotenv import load_dotenv
+from flask import Flask
+
+from config import BASE_DIR, configure_app, register_sqlite_pragmas
+from models import db
+from utils.cache_utils import cache
+from utils.logger import setup_logger
+
+_worker_app = None
+
+
+def get_worker_app():
+    """Dibuat sekali per proses pool"""
+    global _worker_app
+    if _worker_app is None:
+        load_dotenv()
+        setup_logger()
+        app = Flask('app', root_path=BASE_DIR)
+        configure_app(app)
+        db.init_app(app)
+        cache.init_app(app)
+        register_sqlite_pragmas(app)
+        _worker_app = app
+    return _worker_app